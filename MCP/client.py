@@ -1,5 +1,8 @@
 #openrouiter key  = "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"
 import asyncio
+# Not MCPPool: run_interaction is the LLM loop (tool selection, chat memory) and
+# only accepts the manager returned by initialize_mcp. The pool only manages
+# sessions and tool calls; debug_mcp.py and api.py use it.
 from temprl_mcp_client.client import initialize_mcp, run_interaction
 
 async def main():
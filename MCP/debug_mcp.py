@@ -1,34 +1,29 @@
 import asyncio
-from temprl_mcp_client.client import initialize_mcp
+from mcp_pool import MCPPool
 
 async def main():
+    pool = MCPPool(config_path="mcp_config.json")
     try:
         print("Initializing MCP...")
-        mcp_manager = await initialize_mcp(config_path="mcp_config.json")
+        # All servers are started in parallel and kept connected
+        connected = await pool.start()
         print("MCP Initialized.")
-        
-        servers = mcp_manager.get_available_servers()
+
+        servers = pool.get_available_servers()
         print(f"Connected Servers: {servers}")
-        
-        if "weather" in servers:
-            print("Checking tools for 'weather' server...")
-            # Access the server client directly if possible, or list tools via manager
-            # The mcp_manager likely has a way to list tools. 
-            # If not, we can infer from the internal state.
-            # Looking at client.py, it uses mcp_manager.
-            
-            # Assuming mcp_manager has a .clients attribute or similar
-            weather_client = mcp_manager.clients.get("weather")
-            if weather_client:
-                tools_result = await weather_client.session.list_tools()
-                print(f"Tools available from weather server: {tools_result.tools}")
-            else:
-                print("Could not get weather client from manager.")
-        else:
-            print("Weather server not found in connected servers.")
-            
+        for name, ok in connected.items():
+            if not ok:
+                print(f"Server '{name}' failed to start: {pool.status()[name]['error']}")
+
+        # Tool lists are cached per server; refresh=True forces a re-query
+        tools_by_server = await pool.list_tools()
+        for name, tools in tools_by_server.items():
+            print(f"Tools available from {name} server: {[tool.name for tool in tools]}")
+
     except Exception as e:
         print(f"Error: {e}")
+    finally:
+        await pool.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,313 @@
+"""
+Long-lived MCP session pool.
+
+temprl_mcp_client.initialize_mcp (still used by client.py for its chat loop)
+starts every configured server one after another on each run and re-queries
+the tool lists every time. MCPPool instead:
+
+  * starts all servers from mcp_config.json in parallel,
+  * keeps one session per server open for the life of the process, with a
+    supervisor task that reconnects (with backoff) when a server dies,
+  * caches list_tools() per server until the TTL expires, the session is
+    re-established, or the server sends tools/list_changed,
+  * is a plain asyncio object, so it can live in the FastAPI process
+    (see api.py, enabled with MCP_POOL_ENABLED=true) as well as in scripts.
+
+Servers are either stdio processes ({"command", "args", "env"}) or remote
+endpoints ({"url", "transport": "sse" | "http"}).
+
+    python MCP/mcp_pool.py            # start all servers and print their tools
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from contextlib import AsyncExitStack
+
+from mcp import ClientSession, StdioServerParameters, types
+from mcp.client.stdio import stdio_client
+from mcp.client.sse import sse_client
+
+try:
+    from mcp.shared.exceptions import McpError
+except ImportError:
+    McpError = None
+
+try:
+    from mcp.client.streamable_http import streamable_http_client
+except ImportError:  # older SDKs
+    from mcp.client.streamable_http import streamablehttp_client as streamable_http_client
+
+DEFAULT_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mcp_config.json")
+MCP_CONFIG_PATH = os.getenv("MCP_CONFIG_PATH", DEFAULT_CONFIG)
+TOOLS_CACHE_TTL = float(os.getenv("MCP_TOOLS_TTL", "300"))
+CONNECT_TIMEOUT = float(os.getenv("MCP_CONNECT_TIMEOUT", "30"))
+CALL_TIMEOUT = float(os.getenv("MCP_CALL_TIMEOUT", "60"))
+KEEPALIVE_INTERVAL = float(os.getenv("MCP_KEEPALIVE_INTERVAL", "30"))
+RECONNECT_BACKOFF_MAX = 30.0
+
+# JSON-RPC error code the SDK uses when the transport to the server is gone
+CONNECTION_CLOSED = -32000
+
+logger = logging.getLogger(__name__)
+
+
+def _is_protocol_error(error) -> bool:
+    if McpError is None or not isinstance(error, McpError):
+        return False
+    code = getattr(getattr(error, "error", error), "code", None)
+    return code != CONNECTION_CLOSED
+
+
+def _input_schema(tool) -> dict:
+    # Renamed from inputSchema to input_schema in newer SDKs
+    return getattr(tool, "inputSchema", None) or getattr(tool, "input_schema", None)
+
+
+class ServerConnection:
+    """One MCP server, kept connected by a supervisor task."""
+
+    def __init__(self, name: str, config: dict, base_dir: str):
+        self.name = name
+        self.config = config
+        self.base_dir = base_dir
+        self.session = None
+        self.last_error = None
+        self.connects = 0
+        self._ready = asyncio.Event()
+        self._wake = asyncio.Event()
+        self._closing = False
+        self._task = None
+        self._tools = None
+        self._tools_at = 0.0
+
+    def _transport(self):
+        url = self.config.get("url")
+        if url:
+            headers = self.config.get("headers")
+            if self.config.get("transport", "sse") == "sse":
+                return sse_client(url, headers=headers) if headers else sse_client(url)
+            return streamable_http_client(url)
+
+        env = {**os.environ, **self.config.get("env", {})}
+        return stdio_client(StdioServerParameters(
+            command=self.config["command"],
+            args=self.config.get("args", []),
+            env=env,
+            # A relative cwd is relative to the config file, like the node_modules paths
+            cwd=os.path.join(self.base_dir, self.config.get("cwd", ".")),
+        ))
+
+    async def _on_message(self, message):
+        notification = getattr(message, "root", message)
+        if isinstance(notification, types.ToolListChangedNotification):
+            self.invalidate_tools()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._supervise(), name=f"mcp-{self.name}")
+
+    async def _supervise(self):
+        attempt = 0
+        while not self._closing:
+            try:
+                async with AsyncExitStack() as stack:
+                    streams = await stack.enter_async_context(self._transport())
+                    session = await stack.enter_async_context(
+                        ClientSession(streams[0], streams[1], message_handler=self._on_message)
+                    )
+                    await asyncio.wait_for(session.initialize(), CONNECT_TIMEOUT)
+                    self.session = session
+                    self.connects += 1
+                    self.last_error = None
+                    self.invalidate_tools()
+                    attempt = 0
+                    self._ready.set()
+                    logger.info("🔌 MCP server '%s' connected", self.name)
+                    # Hold the session open until close() or reconnect() wakes us; ping
+                    # idle sessions so a dead server is noticed before the next call
+                    while not self._wake.is_set():
+                        try:
+                            await asyncio.wait_for(self._wake.wait(), KEEPALIVE_INTERVAL)
+                        except asyncio.TimeoutError:
+                            await asyncio.wait_for(session.send_ping(), CONNECT_TIMEOUT)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = repr(e)
+                logger.warning("⚠️ MCP server '%s' failed: %r", self.name, e)
+            finally:
+                self.session = None
+                self._ready.clear()
+                self._wake.clear()
+
+            if self._closing:
+                break
+            delay = random.uniform(0, min(RECONNECT_BACKOFF_MAX, 0.5 * (2 ** attempt)))
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def reconnect(self):
+        """Drops the current session; the supervisor opens a new one."""
+        if self.session is not None:
+            self._ready.clear()
+            self._wake.set()
+
+    async def wait_ready(self, timeout: float = CONNECT_TIMEOUT) -> ClientSession:
+        await asyncio.wait_for(self._ready.wait(), timeout)
+        return self.session
+
+    def invalidate_tools(self):
+        self._tools = None
+
+    async def list_tools(self, refresh: bool = False) -> list:
+        if not refresh and self._tools is not None and time.monotonic() - self._tools_at < TOOLS_CACHE_TTL:
+            return self._tools
+        session = await self.wait_ready()
+        result = await session.list_tools()
+        self._tools, self._tools_at = list(result.tools), time.monotonic()
+        return self._tools
+
+    async def close(self):
+        self._closing = True
+        self._wake.set()
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, 10)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                self._task.cancel()
+            except Exception:
+                pass
+            self._task = None
+
+
+class MCPPool:
+    """Keeps every configured MCP server connected and serves cached tool lists."""
+
+    def __init__(self, config_path: str = MCP_CONFIG_PATH, servers: list = None):
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        base_dir = os.path.dirname(os.path.abspath(config_path))
+        selected = config.get("mcpServers", {})
+        if servers:
+            selected = {name: cfg for name, cfg in selected.items() if name in servers}
+        self.servers = {name: ServerConnection(name, cfg, base_dir) for name, cfg in selected.items()
+                        if not cfg.get("disabled")}
+
+    async def start(self, wait: bool = True, timeout: float = CONNECT_TIMEOUT) -> dict:
+        """
+        Starts all servers concurrently.
+
+        Returns:
+            dict: server name -> True if connected (when wait=True)
+        """
+        for server in self.servers.values():
+            server.start()
+        if not wait:
+            return {}
+        results = await asyncio.gather(
+            *(server.wait_ready(timeout) for server in self.servers.values()), return_exceptions=True
+        )
+        return {name: not isinstance(result, BaseException) for name, result in zip(self.servers, results)}
+
+    def get_available_servers(self) -> list:
+        return [name for name, server in self.servers.items() if server.session is not None]
+
+    def status(self) -> dict:
+        return {
+            name: {"connected": server.session is not None, "connects": server.connects, "error": server.last_error}
+            for name, server in self.servers.items()
+        }
+
+    async def list_tools(self, server_name: str = None, refresh: bool = False) -> dict:
+        """
+        Tool lists per server, from cache unless stale or `refresh` is set.
+
+        Returns:
+            dict: server name -> list of mcp Tool objects (servers that are down are omitted)
+        """
+        names = [server_name] if server_name else list(self.servers)
+        results = await asyncio.gather(
+            *(self.servers[name].list_tools(refresh) for name in names), return_exceptions=True
+        )
+        return {name: tools for name, tools in zip(names, results) if not isinstance(tools, BaseException)}
+
+    def invalidate_tools(self, server_name: str = None):
+        for name, server in self.servers.items():
+            if server_name in (None, name):
+                server.invalidate_tools()
+
+    async def openai_tools(self, refresh: bool = False) -> list:
+        """Tool schemas in the OpenAI/Ollama function-calling format, names prefixed with the server."""
+        tools = []
+        for server_name, server_tools in (await self.list_tools(refresh=refresh)).items():
+            for tool in server_tools:
+                tools.append({
+                    "type": "function",
+                    "function": {
+                        "name": f"{server_name}__{tool.name}",
+                        "description": tool.description or "",
+                        "parameters": _input_schema(tool) or {"type": "object", "properties": {}},
+                    },
+                })
+        return tools
+
+    async def call_tool(self, server_name: str, tool_name: str, arguments: dict = None,
+                        timeout: float = CALL_TIMEOUT, retry: bool = True):
+        """
+        Calls a tool on a pooled session. If the session turns out to be dead,
+        it is reconnected and (unless retry=False, for non-idempotent tools)
+        the call is retried once.
+        """
+        server = self.servers[server_name]
+        for attempt in range(2 if retry else 1):
+            session = await server.wait_ready()
+            try:
+                return await asyncio.wait_for(session.call_tool(tool_name, arguments or {}), timeout)
+            except asyncio.TimeoutError:
+                raise
+            except Exception as e:
+                # A protocol-level error means the session works; only transport failures reconnect
+                if _is_protocol_error(e):
+                    raise
+                logger.warning("⚠️ MCP call %s/%s failed (%r); reconnecting", server_name, tool_name, e)
+                server.reconnect()
+                if attempt or not retry:
+                    raise
+
+    async def close(self):
+        await asyncio.gather(*(server.close() for server in self.servers.values()), return_exceptions=True)
+
+
+_pool = None
+
+
+def get_pool(config_path: str = MCP_CONFIG_PATH) -> MCPPool:
+    """Process-wide pool (created on first use; call `await get_pool().start()` once)."""
+    global _pool
+    if _pool is None:
+        _pool = MCPPool(config_path)
+    return _pool
+
+
+async def _main():
+    pool = get_pool()
+    started = time.perf_counter()
+    connected = await pool.start()
+    print(f"Started {len(pool.servers)} server(s) in {time.perf_counter() - started:.2f}s: {connected}")
+    for name, tools in (await pool.list_tools()).items():
+        print(f"\n{name}: {len(tools)} tools")
+        for tool in tools:
+            print(f"  - {tool.name}: {(tool.description or '').splitlines()[0][:80] if tool.description else ''}")
+    started = time.perf_counter()
+    await pool.list_tools()
+    print(f"\nCached list_tools: {(time.perf_counter() - started) * 1000:.2f} ms")
+    await pool.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    asyncio.run(_main())
@@ -5,22 +5,46 @@ This module provides REST API endpoints to interact with the LLM agents
 for trip planning, travel information, and attraction details.
 """
 
-from fastapi import FastAPI, HTTPException, status
+from fastapi import FastAPI, HTTPException, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import contextvars
 import logging
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+from logs import setup_logging
+
+# Configure logging (queued, level from TRIP_LOG_LEVEL; see logs.py) before the
+# agent modules are imported, so their import-time messages are formatted too.
+# .env is loaded first so a TRIP_LOG_LEVEL set there applies.
+load_dotenv()
+setup_logging()
+logger = logging.getLogger(__name__)
 
-# Import agents from llm_agent
 # Import agents from llm_agent
 from llm_agent import TravelResearchAgent, AdditionalInfoAgent, OrchestrateAgent
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+from api_middleware import add_index_version_header, current_index_version
+import metrics
+import profiling
+import timing
+
+# Keep MCP server sessions open for the life of the API process (see MCP/mcp_pool.py)
+MCP_POOL_ENABLED = os.getenv("MCP_POOL_ENABLED", "false").lower() == "true"
+
+# The agents block on HTTP calls, so they run on a bounded worker pool instead of
+# the event loop. Once AGENT_WORKERS are busy and AGENT_QUEUE_SIZE more are waiting,
+# further agent requests are rejected with 429 instead of queueing without limit.
+AGENT_WORKERS = int(os.getenv("AGENT_WORKERS", "8"))
+AGENT_QUEUE_SIZE = int(os.getenv("AGENT_QUEUE_SIZE", "32"))
+_agent_executor = ThreadPoolExecutor(max_workers=AGENT_WORKERS, thread_name_prefix="agent")
+_agent_slots = threading.BoundedSemaphore(AGENT_WORKERS + AGENT_QUEUE_SIZE)
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -39,6 +63,104 @@ app.add_middleware(
 )
 
 
+app.middleware("http")(add_index_version_header)
+
+
+if profiling.ENABLED:
+    @app.middleware("http")
+    async def profile_request(request, call_next):
+        """
+        Profiles the agent run of requests that ask for it and carry the admin
+        token (see profiling.py). Only installed when TRIP_ADMIN_TOKEN is set.
+        """
+        if not profiling.requested(request.headers, request.query_params):
+            return await call_next(request)
+        if not profiling.authorized(request.headers):
+            return JSONResponse(
+                status_code=status.HTTP_403_FORBIDDEN,
+                content={"success": False, "error": "Profiling requires a valid X-Admin-Token"}
+            )
+        token = profiling.start(timing.request_id())
+        try:
+            response = await call_next(request)
+        finally:
+            summary = profiling.finish(token)
+        if summary and summary.get("file"):
+            response.headers["X-Profile-File"] = summary["file"]
+        return response
+
+
+@app.middleware("http")
+async def add_server_timing(request, call_next):
+    """
+    Collects the request's timing spans (see timing.py), returns them in the
+    Server-Timing header and logs them as one JSON line with the request id.
+    """
+    token = timing.start_request(request.headers.get("X-Request-ID", "")[:64] or None)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+        total_ms = (time.perf_counter() - started) * 1000
+        spans = timing.current_spans()
+        response.headers["Server-Timing"] = timing.server_timing_header(spans, total_ms)
+        response.headers["X-Request-ID"] = timing.request_id()
+        timing.log_request(logger, request.method, request.url.path, response.status_code, total_ms, spans)
+        # Route template, not the raw path, so query ids don't become label values
+        route = request.scope.get("route")
+        metrics.REQUEST_LATENCY.observe(total_ms / 1000, method=request.method,
+                                        route=getattr(route, "path", "unmatched"), status=response.status_code)
+        return response
+    finally:
+        timing.end_request(token)
+
+
+def _timings(requested: bool) -> Optional[dict]:
+    """Per-stage durations of the current request, if the client asked for them."""
+    return timing.summarize(timing.current_spans()) if requested else None
+
+
+def _run_on_worker(agent, args, kwargs):
+    metrics.EXECUTOR_QUEUE_DEPTH.dec()
+    metrics.EXECUTOR_ACTIVE.inc()
+    try:
+        return profiling.call(agent, *args, **kwargs)
+    finally:
+        metrics.EXECUTOR_ACTIVE.dec()
+
+
+def _agent_done(future):
+    # Runs when the agent finishes, even if the client has gone away meanwhile. A call
+    # cancelled while still queued never reached _run_on_worker to leave the queue.
+    if future.cancelled():
+        metrics.EXECUTOR_QUEUE_DEPTH.dec()
+    _agent_slots.release()
+
+
+async def _run_agent(agent, *args, **kwargs):
+    """
+    Runs a synchronous agent on the agent executor, keeping the request's
+    context (timing spans, request id).
+
+    Raises:
+        HTTPException: 429 if the executor queue is full
+    """
+    if not _agent_slots.acquire(blocking=False):
+        metrics.EXECUTOR_REJECTED.inc()
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many agent requests in progress, please retry shortly"
+        )
+    metrics.EXECUTOR_QUEUE_DEPTH.inc()
+    try:
+        future = _agent_executor.submit(contextvars.copy_context().run, _run_on_worker, agent, args, kwargs)
+    except BaseException:
+        metrics.EXECUTOR_QUEUE_DEPTH.dec()
+        _agent_slots.release()
+        raise
+    future.add_done_callback(_agent_done)
+    return await asyncio.wrap_future(future)
+
+
 # --- Request/Response Models ---
 
 class FinalResponseRequest(BaseModel):
@@ -60,6 +182,8 @@ class FinalResponseResponse(BaseModel):
     success: bool = Field(..., description="Whether the request was successful")
     response: str = Field(..., description="The generated final response")
     message: Optional[str] = Field(default=None, description="Additional message or status information")
+    timings: Optional[dict] = Field(default=None, description="Per-stage durations in ms and call counts (with ?timings=true)")
+    profile: Optional[dict] = Field(default=None, description="Top functions and allocation sites (with X-Profile and X-Admin-Token)")
 
     class Config:
         json_schema_extra = {
@@ -89,6 +213,8 @@ class AdditionalInfoResponse(BaseModel):
     info: str = Field(..., description="The comprehensive information gathered")
     query: str = Field(..., description="The original query that was analyzed")
     message: Optional[str] = Field(default=None, description="Additional message or status information")
+    timings: Optional[dict] = Field(default=None, description="Per-stage durations in ms and call counts (with ?timings=true)")
+    profile: Optional[dict] = Field(default=None, description="Top functions and allocation sites (with X-Profile and X-Admin-Token)")
 
     class Config:
         json_schema_extra = {
@@ -127,6 +253,7 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "health": "/api/health",
+            "metrics": "/metrics",
             "final_response": "/api/v1/final-response",
             "additional_info": "/api/v1/additional-info"
         }
@@ -154,15 +281,45 @@ async def health_check():
         missing.append("GOOGLE_API_KEY or HUGGINGFACE_API_KEY")
     
     mode = "cloud" if (groq_key and qdrant_url and has_cloud_embeddings) else "local_fallback"
+
+    try:
+        index_version = await current_index_version()
+    except Exception:
+        index_version = None
     
     return {
         "status": "healthy",
         "mode": mode,
         "missing_keys": missing,
+        "index_version": index_version,
+        "mcp_servers": _mcp_pool().status() if MCP_POOL_ENABLED else None,
         "version": "1.0.0"
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """
+    Prometheus scrape endpoint (see metrics.py).
+    """
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+def _mcp_pool():
+    from MCP.mcp_pool import get_pool
+    return get_pool()
+
+
+@app.get("/api/v1/mcp/tools", tags=["General"])
+async def list_mcp_tools(refresh: bool = False):
+    """
+    Tool schemas of the pooled MCP servers (cached; pass refresh=true to re-query).
+    """
+    if not MCP_POOL_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="MCP pool is disabled (MCP_POOL_ENABLED)")
+    return {"servers": _mcp_pool().status(), "tools": await _mcp_pool().openai_tools(refresh=refresh)}
+
+
 @app.post(
     "/api/v1/final-response",
     response_model=FinalResponseResponse,
@@ -171,7 +328,7 @@ async def health_check():
     summary="Generate Final Response",
     description="Synthesizes gathered information into a comprehensive final response using theTravelResearchAgent"
 )
-async def generate_final_response(request: FinalResponseRequest):
+async def generate_final_response(request: FinalResponseRequest, timings: bool = False):
     """
     Generate a comprehensive final response based on gathered information.
     
@@ -183,6 +340,7 @@ async def generate_final_response(request: FinalResponseRequest):
         request: FinalResponseRequest containing:
             - content: Optional gathered information to synthesize (if empty, agent will gather info using tools)
             - user_query: The user query (required if content is empty)
+        timings: Include per-stage durations in the response
     
     Returns:
         FinalResponseResponse: Contains the generated final response
@@ -201,7 +359,8 @@ async def generate_final_response(request: FinalResponseRequest):
         logger.info(f"Received final response request with content length: {len(request.content or '')}, user_query: {request.user_query[:50] if request.user_query else 'None'}...")
         
         # Call the OrchestrateAgent
-        final_response = OrchestrateAgent(
+        final_response = await _run_agent(
+            OrchestrateAgent,
             query=request.user_query or ""
         )
         
@@ -216,7 +375,9 @@ async def generate_final_response(request: FinalResponseRequest):
         return FinalResponseResponse(
             success=True,
             response=final_response,
-            message="Final response generated successfully"
+            message="Final response generated successfully",
+            timings=_timings(timings),
+            profile=profiling.summary()
         )
     
     except HTTPException:
@@ -236,19 +397,23 @@ async def generate_final_response(request: FinalResponseRequest):
     summary="Generate Final Response (GET)",
     description="Browser-friendly GET version of the final response agent."
 )
-async def generate_final_response_get(query: str):
+async def generate_final_response_get(query: str, timings: bool = False):
     """
     Generate a final response via GET request (e.g. for browser testing).
     """
     try:
         logger.info(f"Received GET final response request for query: {query}")
-        final_response = OrchestrateAgent(query=query)
+        final_response = await _run_agent(OrchestrateAgent, query=query)
         
         return {
             "success": True,
             "response": final_response,
-            "message": "Final response generated successfully"
+            "message": "Final response generated successfully",
+            "timings": _timings(timings),
+            "profile": profiling.summary()
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error generating final response: {str(e)}", exc_info=True)
         return {"success": False, "error": str(e)}
@@ -261,7 +426,7 @@ async def generate_final_response_get(query: str):
     summary="Gather Additional Information",
     description="Gathers comprehensive travel and trip information using the AdditionalInfoAgent with tool calling"
 )
-async def gather_additional_info(request: AdditionalInfoRequest):
+async def gather_additional_info(request: AdditionalInfoRequest, timings: bool = False):
     """
     Gather additional information about travel, attractions, and trip planning.
     
@@ -277,6 +442,7 @@ async def gather_additional_info(request: AdditionalInfoRequest):
     Args:
         request: AdditionalInfoRequest containing:
             - query: The travel/trip-related query (e.g., "about San Diego Zoo Day Pass")
+        timings: Include per-stage durations in the response
     
     Returns:
         AdditionalInfoResponse: Contains the comprehensive information gathered
@@ -288,7 +454,7 @@ async def gather_additional_info(request: AdditionalInfoRequest):
         logger.info(f"Received additional info request for query: {request.query}")
         
         # Call the AdditionalInfoAgent
-        gathered_info = AdditionalInfoAgent(query=request.query)
+        gathered_info = await _run_agent(AdditionalInfoAgent, query=request.query)
         
         if not gathered_info or not gathered_info.strip():
             raise HTTPException(
@@ -302,7 +468,9 @@ async def gather_additional_info(request: AdditionalInfoRequest):
             success=True,
             info=gathered_info,
             query=request.query,
-            message="Additional information gathered successfully"
+            message="Additional information gathered successfully",
+            timings=_timings(timings),
+            profile=profiling.summary()
         )
     
     except HTTPException:
@@ -321,20 +489,24 @@ async def gather_additional_info(request: AdditionalInfoRequest):
     summary="Gather Additional Information (GET)",
     description="Browser-friendly GET version of the additional info agent."
 )
-async def gather_additional_info_get(query: str):
+async def gather_additional_info_get(query: str, timings: bool = False):
     """
     Gather additional information via GET request (e.g. for browser testing).
     """
     try:
         logger.info(f"Received GET additional info request for query: {query}")
-        gathered_info = AdditionalInfoAgent(query=query)
+        gathered_info = await _run_agent(AdditionalInfoAgent, query=query)
         
         return {
             "success": True,
             "info": gathered_info,
             "query": query,
-            "message": "Additional information gathered successfully"
+            "message": "Additional information gathered successfully",
+            "timings": _timings(timings),
+            "profile": profiling.summary()
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error gathering additional info: {str(e)}", exc_info=True)
         return {"success": False, "error": str(e)}
@@ -352,12 +524,14 @@ async def test_browser_search(query: str):
     """
     try:
         logger.info(f"Browser test query: {query}")
-        result = OrchestrateAgent(query)
+        result = await _run_agent(OrchestrateAgent, query)
         return {
             "success": True,
             "query": query,
             "response": result
         }
+    except HTTPException:
+        raise
     except Exception as e:
         return {"success": False, "error": str(e)}
 
@@ -382,6 +556,10 @@ async def startup_event():
     Startup event handler
     """
     logger.info("Trip Agent API is starting up...")
+    if MCP_POOL_ENABLED:
+        # Servers connect in the background; requests don't wait for slow servers
+        await _mcp_pool().start(wait=False)
+        logger.info("MCP pool starting servers: %s", ", ".join(_mcp_pool().servers))
     logger.info("API endpoints are ready to accept requests")
 
 
@@ -391,6 +569,8 @@ async def shutdown_event():
     Shutdown event handler
     """
     logger.info("Trip Agent API is shutting down...")
+    if MCP_POOL_ENABLED:
+        await _mcp_pool().close()
 
 
 # --- Main Entry Point ---
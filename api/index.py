@@ -12,19 +12,25 @@ from typing import Optional
 import logging
 import os
 import sys
+import time
 
 # Add the parent directory to sys.path so we can import llm_agent
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from llm_agent import TravelResearchAgent, AdditionalInfoAgent, OrchestrateAgent
+from dotenv import load_dotenv
+from logs import setup_logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging (queued, level from TRIP_LOG_LEVEL; see logs.py) before the
+# agent modules are imported, so their import-time messages are formatted too.
+# .env is loaded first so a TRIP_LOG_LEVEL set there applies.
+load_dotenv()
+setup_logging()
 logger = logging.getLogger(__name__)
 
+from llm_agent import TravelResearchAgent, AdditionalInfoAgent, OrchestrateAgent
+from api_middleware import add_index_version_header, current_index_version
+import timing
+
 # Initialize FastAPI app
 # Note: In Vercel, the app instance must be named 'app'
 app = FastAPI(
@@ -43,6 +49,30 @@ app.add_middleware(
 )
 
 
+app.middleware("http")(add_index_version_header)
+
+
+@app.middleware("http")
+async def add_server_timing(request, call_next):
+    """Returns the request's timing spans as Server-Timing and logs them with the request id."""
+    token = timing.start_request(request.headers.get("X-Request-ID", "")[:64] or None)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+        total_ms = (time.perf_counter() - started) * 1000
+        spans = timing.current_spans()
+        response.headers["Server-Timing"] = timing.server_timing_header(spans, total_ms)
+        response.headers["X-Request-ID"] = timing.request_id()
+        timing.log_request(logger, request.method, request.url.path, response.status_code, total_ms, spans)
+        return response
+    finally:
+        timing.end_request(token)
+
+
+def _timings(requested: bool) -> Optional[dict]:
+    return timing.summarize(timing.current_spans()) if requested else None
+
+
 # --- Request/Response Models ---
 
 class FinalResponseRequest(BaseModel):
@@ -53,6 +83,7 @@ class FinalResponseResponse(BaseModel):
     success: bool = Field(..., description="Whether the request was successful")
     response: str = Field(..., description="The generated final response")
     message: Optional[str] = Field(default=None, description="Additional message")
+    timings: Optional[dict] = Field(default=None, description="Per-stage durations (with ?timings=true)")
 
 class AdditionalInfoRequest(BaseModel):
     query: str = Field(..., description="The travel/trip-related query", min_length=1)
@@ -62,6 +93,7 @@ class AdditionalInfoResponse(BaseModel):
     info: str = Field(..., description="The comprehensive information gathered")
     query: str = Field(..., description="The original query")
     message: Optional[str] = Field(default=None, description="Additional message")
+    timings: Optional[dict] = Field(default=None, description="Per-stage durations (with ?timings=true)")
 
 
 # --- API Endpoints ---
@@ -95,16 +127,22 @@ async def health_check():
         missing.append("GOOGLE_API_KEY or HUGGINGFACE_API_KEY")
     
     mode = "cloud" if (groq_key and qdrant_url and has_cloud_embeddings) else "local_fallback"
+
+    try:
+        index_version = await current_index_version()
+    except Exception:
+        index_version = None
     
     return {
         "status": "healthy",
         "mode": mode,
         "missing_keys": missing,
+        "index_version": index_version,
         "version": "1.0.0"
     }
 
 @app.post("/api/v1/final-response", response_model=FinalResponseResponse, tags=["Agents"])
-async def generate_final_response(request: FinalResponseRequest):
+async def generate_final_response(request: FinalResponseRequest, timings: bool = False):
     try:
         if not request.user_query:
             raise HTTPException(status_code=400, detail="User query is required")
@@ -114,21 +152,23 @@ async def generate_final_response(request: FinalResponseRequest):
         return FinalResponseResponse(
             success=True,
             response=final_response,
-            message="Final response generated successfully"
+            message="Final response generated successfully",
+            timings=_timings(timings)
         )
     except Exception as e:
         logger.error(f"Error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/v1/additional-info", response_model=AdditionalInfoResponse, tags=["Agents"])
-async def gather_additional_info(request: AdditionalInfoRequest):
+async def gather_additional_info(request: AdditionalInfoRequest, timings: bool = False):
     try:
         gathered_info = AdditionalInfoAgent(query=request.query)
         return AdditionalInfoResponse(
             success=True,
             info=gathered_info,
             query=request.query,
-            message="Additional information gathered successfully"
+            message="Additional information gathered successfully",
+            timings=_timings(timings)
         )
     except Exception as e:
         logger.error(f"Error: {str(e)}", exc_info=True)
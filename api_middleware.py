@@ -0,0 +1,22 @@
+"""
+HTTP middleware shared by api.py and api/index.py.
+"""
+
+import asyncio
+
+from tool_calls import get_index_version, peek_index_version
+
+
+async def current_index_version() -> str:
+    """The RAG index version, resolving the alias in a worker thread when the cached value expired."""
+    return peek_index_version() or await asyncio.to_thread(get_index_version)
+
+
+async def add_index_version_header(request, call_next):
+    """Tags every response with the RAG index version it was served from, for cache keying."""
+    response = await call_next(request)
+    try:
+        response.headers["X-Index-Version"] = await current_index_version()
+    except Exception:
+        pass
+    return response
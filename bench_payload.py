@@ -0,0 +1,151 @@
+"""
+Before/after benchmark for the slim Qdrant payload schema.
+
+Compares the legacy payload (full json_data serialized into metadata["json"],
+every field copied again, Firecrawl metadata merged in) with the slim payload
+built by rag_documents.build_documents, on the records in dataset_json.
+
+Reports payload bytes per document and search latency with payloads returned.
+Runs against an in-memory Qdrant by default, or Qdrant Cloud if QDRANT_URL and
+QDRANT_API_KEY are set (which also measures the bytes over the wire). Random
+vectors are used, so no embedding model is needed.
+
+    python bench_payload.py --copies 200 --queries 200 --k 3
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from dotenv import load_dotenv
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from rag_documents import build_documents, format_page_content, split_record
+import doc_store
+
+load_dotenv()
+
+DIM = 768
+
+
+def legacy_metadata(filename: str, file_path: str, loaded_data: dict) -> dict:
+    """The payload metadata rag_upload.py used to write (kept here for comparison)."""
+    json_data, full_metadata, _ = split_record(loaded_data)
+    metadata = {"source": filename, "file_path": file_path}
+    metadata["json"] = json.dumps(json_data) if json_data else ""
+    for key, value in json_data.items():
+        if key not in ["Why visit", "What included", "What not included",
+                       "Restrictions", "Location", "User Rating", "Duration"]:
+            metadata[key] = str(value) if not isinstance(value, (dict, list)) else json.dumps(value)
+    for key, value in full_metadata.items():
+        if key not in metadata:
+            metadata[key] = str(value) if not isinstance(value, (dict, list)) else json.dumps(value)
+    return metadata
+
+
+def load_dataset(folder: str = "dataset_json") -> list:
+    records = []
+    for filename in sorted(os.listdir(folder)):
+        if filename.endswith(".json"):
+            file_path = os.path.join(folder, filename)
+            with open(file_path, "r", encoding="utf-8") as f:
+                records.append((filename, file_path, json.load(f)))
+    return records
+
+
+def payload_bytes(payload: dict) -> int:
+    return len(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def bench_search(client, name: str, payloads: list, queries: int, k: int) -> dict:
+    client.create_collection(name, vectors_config=models.VectorParams(size=DIM, distance=models.Distance.COSINE))
+    rng = random.Random(0)
+    points = [
+        models.PointStruct(id=str(uuid.uuid4()), vector=[rng.gauss(0, 1) for _ in range(DIM)], payload=payload)
+        for payload in payloads
+    ]
+    for start in range(0, len(points), 256):
+        client.upsert(name, points=points[start:start + 256], wait=True)
+
+    latencies, returned_bytes = [], []
+    for _ in range(queries):
+        query = [rng.gauss(0, 1) for _ in range(DIM)]
+        started = time.perf_counter()
+        hits = client.query_points(name, query=query, limit=k, with_payload=True).points
+        latencies.append((time.perf_counter() - started) * 1000)
+        returned_bytes.append(sum(payload_bytes(hit.payload) for hit in hits))
+
+    client.delete_collection(name)
+    return {
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": percentile(latencies, 95),
+        "bytes_per_search": statistics.mean(returned_bytes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark legacy vs slim Qdrant payloads.")
+    parser.add_argument("--copies", type=int, default=200, help="How many times to replicate the dataset")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    records = load_dataset()
+    before, after, store_records = [], [], []
+    for filename, file_path, loaded_data in records:
+        json_data, _, _ = split_record(loaded_data)
+        before.append({"page_content": format_page_content(json_data),
+                       "metadata": legacy_metadata(filename, file_path, loaded_data)})
+        documents, _, store_record = build_documents(filename, file_path, loaded_data)
+        after.append({"page_content": documents[0].page_content, "metadata": documents[0].metadata})
+        store_records.append(store_record)
+
+    before_bytes = [payload_bytes(p) for p in before]
+    after_bytes = [payload_bytes(p) for p in after]
+    print(f"Documents: {len(records)}")
+    print(f"Payload bytes/doc  before: {statistics.mean(before_bytes):10.0f}   after: {statistics.mean(after_bytes):10.0f}"
+          f"   ({statistics.mean(before_bytes) / statistics.mean(after_bytes):.1f}x smaller)")
+
+    if os.getenv("QDRANT_URL") and os.getenv("QDRANT_API_KEY"):
+        client = QdrantClient(url=os.getenv("QDRANT_URL"), api_key=os.getenv("QDRANT_API_KEY"))
+        backend = "Qdrant Cloud"
+    else:
+        client = QdrantClient(":memory:")
+        backend = "in-memory Qdrant"
+
+    print(f"\nSearch with payload ({backend}, {len(records) * args.copies} points, k={args.k}):")
+    for label, payloads in (("before", before), ("after", after)):
+        stats = bench_search(client, f"bench_payload_{label}_{uuid.uuid4().hex[:8]}",
+                             payloads * args.copies, args.queries, args.k)
+        print(f"  {label:6}  p50 {stats['p50_ms']:7.2f} ms   p95 {stats['p95_ms']:7.2f} ms   "
+              f"{stats['bytes_per_search']:9.0f} payload bytes/search")
+
+    # Cost of hydrating the full records for one search result set on demand
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "docs.sqlite")
+        doc_store.put_documents(store_records, path=path)
+        doc_store._connect(path).execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        ids = [record["doc_id"] for record in store_records][:args.k]
+        latencies = []
+        for _ in range(args.queries):
+            started = time.perf_counter()
+            doc_store.get_documents(ids, path=path)
+            latencies.append((time.perf_counter() - started) * 1000)
+        print(f"\nOn-demand hydration of {len(ids)} records: p50 {statistics.median(latencies):.2f} ms   "
+              f"p95 {percentile(latencies, 95):.2f} ms   store size {os.path.getsize(path)} bytes")
+        doc_store._connect(path).close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark quantization / on-disk storage options for the RAG collection.
+
+For each storage configuration a collection of synthetic 768-dim vectors is
+built on a Qdrant server, then the same query set is run against it. Reported
+per configuration:
+
+  * estimated RAM footprint (vectors + quantized vectors + HNSW graph), computed
+    from Qdrant's sizing formula rather than measured on the server,
+  * p50 / p99 search latency,
+  * recall@k against exact search on the unquantized baseline.
+
+Quantization is only applied by a Qdrant server (local mode always does exact
+search), so point QDRANT_URL / QDRANT_API_KEY at a test cluster, or a local
+`docker run -p 6333:6333 qdrant/qdrant`:
+
+    python bench_quantization.py --url http://localhost:6333 --points 100000 --queries 500 --k 5
+"""
+
+import argparse
+import os
+import statistics
+import time
+import uuid
+import numpy as np
+from dotenv import load_dotenv
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from rag_index import build_search_params, collection_config
+
+load_dotenv()
+
+DIM = 768
+HNSW_M = 16
+
+CONFIGS = [
+    # (label, quantization, on_disk_vectors)
+    ("baseline float32", "none", False),
+    ("float32 on disk", "none", True),
+    ("int8", "int8", False),
+    ("int8 + on-disk originals", "int8", True),
+    ("binary", "binary", False),
+    ("binary + on-disk originals", "binary", True),
+]
+
+
+def synthetic_vectors(count: int, clusters: int, seed: int) -> np.ndarray:
+    """Clustered unit vectors, which quantize more like real sentence embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, DIM))
+    vectors = centers[rng.integers(0, clusters, size=count)] + rng.normal(scale=0.6, size=(count, DIM))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def estimated_ram_bytes(points: int, quantization: str, on_disk_vectors: bool) -> int:
+    """Qdrant sizing estimate: resident vectors + quantized vectors + HNSW links, with 1.5x overhead."""
+    original = 0 if on_disk_vectors else points * DIM * 4
+    quantized = {"none": 0, "int8": points * DIM, "binary": points * DIM // 8}[quantization]
+    graph = points * HNSW_M * 2 * 4
+    return int((original + quantized + graph) * 1.5)
+
+
+def wait_until_indexed(client, name: str, timeout: float = 1800):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if client.get_collection(name).status == models.CollectionStatus.GREEN:
+            return
+        time.sleep(1)
+    raise TimeoutError(f"Collection '{name}' did not finish indexing")
+
+
+def build_collection(client, name: str, vectors: np.ndarray, quantization: str, on_disk_vectors: bool):
+    client.create_collection(name, **collection_config(quantization, on_disk_vectors, False, size=DIM))
+    client.upload_collection(
+        collection_name=name,
+        vectors=vectors,
+        ids=range(len(vectors)),
+        batch_size=256,
+        parallel=4,
+        wait=True,
+    )
+    wait_until_indexed(client, name)
+
+
+def run_queries(client, name: str, queries: np.ndarray, k: int, search_params) -> tuple:
+    latencies, results = [], []
+    for query in queries:
+        started = time.perf_counter()
+        hits = client.query_points(name, query=query.tolist(), limit=k, search_params=search_params).points
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append([hit.id for hit in hits])
+    return latencies, results
+
+
+def recall_at_k(results: list, truth: list, k: int) -> float:
+    return statistics.mean(len(set(r[:k]) & set(t[:k])) / k for r, t in zip(results, truth))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark quantization and on-disk options.")
+    parser.add_argument("--url", default=os.getenv("QDRANT_URL"), help="Qdrant server URL")
+    parser.add_argument("--api-key", default=os.getenv("QDRANT_API_KEY"))
+    parser.add_argument("--points", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--oversampling", type=float, default=2.0)
+    parser.add_argument("--no-rescore", action="store_true", help="Disable rescoring with original vectors")
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark collections afterwards")
+    args = parser.parse_args()
+
+    if not args.url:
+        parser.error("a Qdrant server is required (--url or QDRANT_URL); local mode ignores quantization")
+
+    client = QdrantClient(url=args.url, api_key=args.api_key, timeout=120)
+    vectors = synthetic_vectors(args.points, clusters=max(8, args.points // 500), seed=0)
+    queries = synthetic_vectors(args.queries, clusters=max(8, args.points // 500), seed=1)
+    run_id = uuid.uuid4().hex[:8]
+    created = []
+
+    print(f"{args.points} points x {DIM} dims, {args.queries} queries, k={args.k}, "
+          f"rescore={not args.no_rescore}, oversampling={args.oversampling}\n")
+    print(f"{'configuration':<28} {'est. RAM*':>10} {'p50 ms':>8} {'p99 ms':>8} {f'recall@{args.k}':>10}")
+
+    truth = None
+    try:
+        for label, quantization, on_disk_vectors in CONFIGS:
+            name = f"bench_quant_{run_id}_{quantization}_{'disk' if on_disk_vectors else 'ram'}"
+            build_collection(client, name, vectors, quantization, on_disk_vectors)
+            created.append(name)
+
+            if truth is None:
+                # Ground truth: exact (brute-force) search on the unquantized baseline
+                _, truth = run_queries(client, name, queries, args.k, models.SearchParams(exact=True))
+
+            search_params = build_search_params(rescore=not args.no_rescore, oversampling=args.oversampling)
+            run_queries(client, name, queries[: min(20, len(queries))], args.k, search_params)  # warm-up
+            latencies, results = run_queries(client, name, queries, args.k, search_params)
+
+            ram_mb = estimated_ram_bytes(args.points, quantization, on_disk_vectors) / 1024 / 1024
+            print(f"{label:<28} {ram_mb:>8.1f}MB {statistics.median(latencies):>8.2f} "
+                  f"{np.percentile(latencies, 99):>8.2f} {recall_at_k(results, truth, args.k):>10.3f}")
+        print("\n* estimated from the sizing formula (vectors + quantized vectors + HNSW links, x1.5), not measured")
+    finally:
+        if not args.keep:
+            for name in created:
+                client.delete_collection(name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+"""
+Offline benchmarks for the trip agent.
+
+fakes.py replaces every external dependency (Groq, Hugging Face embeddings,
+Qdrant, DuckDuckGo) with deterministic local stand-ins, so the agents and the
+FastAPI endpoints can be timed reproducibly without keys or network:
+
+    python -m benchmarks.bench run --out results/main.json
+    python -m benchmarks.bench run --out results/branch.json
+    python -m benchmarks.bench compare results/main.json results/branch.json
+"""
@@ -0,0 +1,268 @@
+"""
+End-to-end benchmark of the agents and the API endpoints on local fakes.
+
+Runs OrchestrateAgent, TravelResearchAgent, AdditionalInfoAgent and the
+FastAPI endpoints over a query mix (every attraction in dataset_json plus a
+few the index does not cover, which take the web fallback) and reports
+per-stage latency percentiles. Results are written as JSON, and two result
+files (e.g. main vs. a branch) can be compared offline.
+
+    python -m benchmarks.bench run --iterations 5 --out results/main.json
+    python -m benchmarks.bench run --llm-latency const:200 --web-search-latency 0 --copies 50
+    python -m benchmarks.bench compare results/main.json results/branch.json --threshold 10
+
+compare exits with status 1 when a stage's p50 or p95 regressed by more than
+--threshold percent.
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from benchmarks import fakes
+from benchmarks.stats import StageRecorder
+
+OFF_CORPUS_QUERIES = [
+    "Eiffel Tower summit tickets",
+    "Colosseum underground tour opening hours",
+    "Sagrada Familia tower access",
+]
+
+SCENARIOS = ("agents", "endpoints")
+
+
+def default_queries(dataset: str = "dataset_json") -> list:
+    from shard_store import iter_source_records
+
+    names = []
+    for _, _, loaded_data in iter_source_records(dataset):
+        name = loaded_data.get("data", {}).get("json", {}).get("Attraction_name")
+        if name:
+            names.append(f"tell me about {name}")
+    return names + OFF_CORPUS_QUERIES
+
+
+def _timed(recorder: StageRecorder, stage: str, fn):
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            recorder.record(stage, time.perf_counter() - started)
+    return wrapper
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+@contextlib.contextmanager
+def _quiet(enabled: bool):
+    """Silences the agents' print() and INFO logging while measuring."""
+    if not enabled:
+        yield
+        return
+    logging.disable(logging.INFO)
+    try:
+        with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+            yield
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def _run_agents(queries: list, iterations: int, recorder: StageRecorder, errors: dict):
+    import llm_agent
+
+    agents = {
+        "OrchestrateAgent": llm_agent.OrchestrateAgent,
+        "TravelResearchAgent": llm_agent.TravelResearchAgent,
+        "AdditionalInfoAgent": llm_agent.AdditionalInfoAgent,
+    }
+    for _ in range(iterations):
+        for query in queries:
+            for name, agent in agents.items():
+                try:
+                    _timed(recorder, f"agent.{name}", agent)(query)
+                except Exception as e:
+                    errors[f"agent.{name}"] = errors.get(f"agent.{name}", 0) + 1
+                    print(f"❌ {name} failed for '{query}': {e}", file=sys.stderr)
+
+
+def _run_endpoints(queries: list, iterations: int, recorder: StageRecorder, errors: dict):
+    from fastapi.testclient import TestClient
+    import api
+
+    requests = [
+        ("POST", "/api/v1/final-response", lambda q: {"json": {"user_query": q}}),
+        ("POST", "/api/v1/additional-info", lambda q: {"json": {"query": q}}),
+        ("GET", "/api/v1/final-response", lambda q: {"params": {"query": q}}),
+        ("GET", "/api/health", lambda q: {}),
+    ]
+    with TestClient(api.app) as client:
+        for _ in range(iterations):
+            for query in queries:
+                for method, path, build in requests:
+                    stage = f"endpoint.{method} {path}"
+                    started = time.perf_counter()
+                    response = client.request(method, path, **build(query))
+                    recorder.record(stage, time.perf_counter() - started)
+                    if response.status_code != 200:
+                        errors[stage] = errors.get(stage, 0) + 1
+
+
+def run(iterations: int = 3, latencies: dict = None, seed: int = 0, dataset: str = "dataset_json",
+        copies: int = 1, scenarios: tuple = SCENARIOS, queries: list = None, verbose: bool = False) -> dict:
+    """
+    Installs the fakes, runs the scenarios and returns the results document.
+
+    Returns:
+        dict: {"meta": ..., "stages": {stage: percentiles}, "errors": {stage: count}}
+    """
+    recorder = StageRecorder()
+    parsed = fakes.install(latencies, recorder, seed, dataset, copies)
+
+    import llm_agent
+    # rag_search covers the query embedding plus the vector search
+    llm_agent.search_rag = _timed(recorder, "rag_search", llm_agent.search_rag)
+
+    queries = queries or default_queries(dataset)
+    errors = {}
+    runners = {"agents": _run_agents, "endpoints": _run_endpoints}
+    started = time.perf_counter()
+    with _quiet(not verbose):
+        for scenario in scenarios:
+            # One unrecorded pass first, so imports and lazy setup are not measured
+            runners[scenario](queries[:1], 1, recorder, {})
+        recorder.reset()
+        for scenario in scenarios:
+            runners[scenario](queries, iterations, recorder, errors)
+
+    return {
+        "meta": {
+            "git_revision": _git_revision(),
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": iterations,
+            "queries": len(queries),
+            "copies": copies,
+            "seed": seed,
+            "scenarios": list(scenarios),
+            "latencies": {stage: latency.spec for stage, latency in parsed.items()},
+            "wall_seconds": round(time.perf_counter() - started, 3),
+        },
+        "stages": recorder.summary(),
+        "errors": errors,
+    }
+
+
+def print_report(results: dict):
+    meta = results["meta"]
+    print(f"\nrevision {meta['git_revision']}  iterations {meta['iterations']}  queries {meta['queries']}  "
+          f"wall {meta['wall_seconds']}s")
+    print(f"latencies: {meta['latencies']}\n")
+    print(f"{'stage':<42} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}   (ms)")
+    for stage, summary in results["stages"].items():
+        print(f"{stage:<42} {summary['count']:>6} {summary.get('p50_ms', 0):>9.1f} {summary.get('p95_ms', 0):>9.1f} "
+              f"{summary.get('p99_ms', 0):>9.1f} {summary.get('max_ms', 0):>9.1f}")
+    for stage, count in results["errors"].items():
+        print(f"⚠️ {stage}: {count} errors")
+
+
+def _ms(value) -> str:
+    return f"{value:.1f}" if value is not None else "-"
+
+
+def compare(base: dict, head: dict, threshold: float = 10.0) -> list:
+    """
+    Prints p50/p95 of both runs side by side.
+
+    Returns:
+        list: (stage, metric, base_ms, head_ms, change_pct) for every regression above threshold
+    """
+    regressions = []
+    print(f"\nbase {base['meta'].get('git_revision')} vs head {head['meta'].get('git_revision')}\n")
+    print(f"{'stage':<42} {'metric':>6} {'base':>9} {'head':>9} {'change':>8}")
+    for stage in sorted(set(base["stages"]) | set(head["stages"])):
+        for metric in ("p50_ms", "p95_ms"):
+            before = base["stages"].get(stage, {}).get(metric)
+            after = head["stages"].get(stage, {}).get(metric)
+            if before is None or after is None:
+                print(f"{stage:<42} {metric[:3]:>6} {_ms(before):>9} {_ms(after):>9} {'n/a':>8}")
+                continue
+            change = (after - before) / before * 100 if before else 0.0
+            marker = ""
+            if change > threshold:
+                regressions.append((stage, metric, before, after, round(change, 1)))
+                marker = "  ⚠️"
+            print(f"{stage:<42} {metric[:3]:>6} {before:>9.1f} {after:>9.1f} {change:>+7.1f}%{marker}")
+    if base["meta"].get("latencies") != head["meta"].get("latencies"):
+        print("\n⚠️ The two runs used different fake latencies; stage timings are not comparable.")
+    return regressions
+
+
+def main():
+    from logs import setup_logging
+
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark on local fakes.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_cmd = sub.add_parser("run", help="Run the benchmark")
+    run_cmd.add_argument("--iterations", type=int, default=3, help="Passes over the query mix")
+    run_cmd.add_argument("--scenario", choices=SCENARIOS, action="append",
+                         help="Only run these scenarios (default: all)")
+    run_cmd.add_argument("--dataset", default="dataset_json")
+    run_cmd.add_argument("--copies", type=int, default=1, help="Index the dataset this many times")
+    run_cmd.add_argument("--seed", type=int, default=0)
+    for stage, spec in fakes.DEFAULT_LATENCIES.items():
+        run_cmd.add_argument(f"--{stage.replace('_', '-')}-latency", dest=stage, default=spec,
+                             help=f"Latency distribution of the fake {stage} (default: {spec})")
+    run_cmd.add_argument("--out", help="Write the results JSON here")
+    run_cmd.add_argument("--verbose", action="store_true", help="Keep the agents' own output")
+
+    compare_cmd = sub.add_parser("compare", help="Compare two result files")
+    compare_cmd.add_argument("base")
+    compare_cmd.add_argument("head")
+    compare_cmd.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent")
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        with open(args.base, "r", encoding="utf-8") as f:
+            base = json.load(f)
+        with open(args.head, "r", encoding="utf-8") as f:
+            head = json.load(f)
+        regressions = compare(base, head, args.threshold)
+        print(f"\n{len(regressions)} regression(s) above {args.threshold}%")
+        sys.exit(1 if regressions else 0)
+
+    results = run(
+        iterations=args.iterations,
+        latencies={stage: getattr(args, stage) for stage in fakes.DEFAULT_LATENCIES},
+        seed=args.seed,
+        dataset=args.dataset,
+        copies=args.copies,
+        scenarios=tuple(args.scenario or SCENARIOS),
+        verbose=args.verbose,
+    )
+    print_report(results)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+Deterministic local stand-ins for the agent's external services.
+
+  * HashEmbeddings   replaces the Hugging Face endpoint embeddings (768-d, hash based)
+  * an in-memory Qdrant collection seeded from dataset_json behind the usual alias,
+    with the full records in a temporary side store
+  * FakeSearchRun    replaces LangChain's DuckDuckGoSearchRun
+  * FakeGroq         replaces the Groq client used by llm_agent.call_llm
+
+Each fake sleeps for a latency drawn from a configurable distribution and
+records it as a stage ("embed", "vector_search", "web_search", "llm"), so a
+run shows where the time would go. Latency specs are strings:
+
+    "0"                  no delay
+    "const:50"           always 50 ms
+    "uniform:20,80"      uniform between 20 and 80 ms
+    "normal:120,30"      mean 120 ms, standard deviation 30 ms (clipped at 0)
+    "lognormal:800,0.4"  median 800 ms, sigma 0.4 (long right tail, like real APIs)
+
+install() must run before tool_calls / llm_agent / api are imported.
+"""
+
+import hashlib
+import math
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+from langchain_core.embeddings import Embeddings
+
+DIM = 768
+
+# Share of a document vector given to its first line (the attraction name or
+# section heading), so a query naming an attraction scores like it would with a
+# real embedder (well above RAG_SCORE_THRESHOLD) instead of being diluted by
+# the length of the document
+TITLE_WEIGHT = 3.0
+
+_STOPWORDS = frozenset(
+    "a an and are about at by for from how i in is it me of on or tell the to what when where with".split())
+
+DEFAULT_LATENCIES = {
+    "embed": "lognormal:40,0.3",
+    "vector_search": "0",
+    "web_search": "lognormal:350,0.5",
+    "llm": "lognormal:900,0.35",
+}
+
+
+class Latency:
+    """A latency distribution parsed from a spec string (see module docstring)."""
+
+    def __init__(self, spec: str, rng: random.Random, lock: threading.Lock):
+        self.spec = str(spec)
+        kind, _, params = self.spec.partition(":")
+        self.kind = kind if params else "const"
+        self.params = [float(v) for v in (params or kind).split(",")]
+        if self.kind not in ("const", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution '{self.spec}'")
+        self._rng = rng
+        self._lock = lock
+
+    def sample(self) -> float:
+        """One latency in seconds."""
+        with self._lock:
+            if self.kind == "const":
+                millis = self.params[0]
+            elif self.kind == "uniform":
+                millis = self._rng.uniform(self.params[0], self.params[1])
+            elif self.kind == "normal":
+                millis = self._rng.gauss(self.params[0], self.params[1])
+            else:
+                millis = self._rng.lognormvariate(math.log(self.params[0]), self.params[1])
+        return max(0.0, millis) / 1000
+
+    def sleep(self) -> float:
+        delay = self.sample()
+        if delay:
+            time.sleep(delay)
+        return delay
+
+
+class _Service:
+    """Base for the fakes: a latency per stage, recorded into an optional StageRecorder."""
+
+    def __init__(self, latencies: dict, recorder=None):
+        self.latencies = latencies
+        self.recorder = recorder
+
+    def _wait(self, stage: str):
+        started = time.perf_counter()
+        self.latencies[stage].sleep()
+        if self.recorder is not None:
+            self.recorder.record(stage, time.perf_counter() - started)
+
+
+def _normalized(vector: list) -> list:
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def hash_vector(text: str) -> list:
+    """Bag-of-words vector: each non-stopword hashed into one of DIM buckets, L2-normalized."""
+    vector = [0.0] * DIM
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        if word not in _STOPWORDS:
+            vector[int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % DIM] += 1.0
+    return _normalized(vector)
+
+
+def document_vector(text: str) -> list:
+    """hash_vector of a document whose first line (name or heading) carries TITLE_WEIGHT times the body."""
+    title, _, body = text.partition("\n")
+    if not body:
+        return hash_vector(text)
+    title = title.removeprefix("Attraction:")
+    return _normalized([TITLE_WEIGHT * t + b for t, b in zip(hash_vector(title), hash_vector(body))])
+
+
+class HashEmbeddings(_Service, Embeddings):
+    """Deterministic embeddings: similar wording gives similar vectors, no model needed."""
+
+    def embed_documents(self, texts: list) -> list:
+        self._wait("embed")
+        return [document_vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> list:
+        self._wait("embed")
+        return hash_vector(text)
+
+
+class FakeSearchRun(_Service):
+    """Drop-in for DuckDuckGoSearchRun: .invoke(query) returns a fixed text snippet."""
+
+    service = None  # set by install(); DuckDuckGoSearchRun(max_results=...) is constructed per call
+
+    def __init__(self, max_results: int = 3, **kwargs):
+        super().__init__(self.service.latencies, self.service.recorder)
+        self.max_results = max_results
+
+    def invoke(self, query: str) -> str:
+        self._wait("web_search")
+        return " ".join(
+            f"Result {i + 1} for {query}: opening hours 9am-6pm, tickets from ${20 + 5 * i}, "
+            f"rated {4.0 + i / 10:.1f}/5 by visitors."
+            for i in range(self.max_results)
+        )
+
+
+class FakeGroq(_Service):
+    """Drop-in for groq.Groq: client.chat.completions.create(...) returns a canned markdown answer."""
+
+    def __init__(self, latencies: dict, recorder=None):
+        super().__init__(latencies, recorder)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model: str = None, messages: list = None, temperature: float = 0, **kwargs):
+        self._wait("llm")
+        prompt = "\n".join(str(m.get("content", "")) for m in messages or [])
+        first_line = next((line for line in prompt.splitlines() if line.startswith(("User Query:", "Attraction Query:"))), "")
+        content = f"## Overview\n{first_line}\n\n- Deterministic benchmark answer ({len(prompt)} prompt chars)."
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(content) // 4
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                  total_tokens=prompt_tokens + completion_tokens),
+        )
+
+
+def _slow_down(obj, name: str, stage: str, latencies: dict, recorder=None):
+    """Wraps obj.name so each call waits for the stage's latency and is recorded as that stage."""
+    original = getattr(obj, name)
+
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            latencies[stage].sleep()
+            return original(*args, **kwargs)
+        finally:
+            if recorder is not None:
+                recorder.record(stage, time.perf_counter() - started)
+
+    setattr(obj, name, wrapper)
+
+
+def seed_memory_store(client, dataset: str = "dataset_json", copies: int = 1) -> int:
+    """
+    Indexes the dataset into `client` the way rag_upload.py does (versioned
+    collection behind the alias, full records in the side store).
+
+    Returns:
+        int: Number of parent documents indexed
+    """
+    from qdrant_client.http import models
+    from doc_store import put_documents
+    from rag_documents import build_documents
+    from rag_index import collection_config, new_collection_name, switch_alias
+    from shard_store import iter_source_records
+
+    collection_name = new_collection_name()
+    client.create_collection(collection_name, **collection_config())
+    parents = 0
+    for copy in range(copies):
+        for filename, file_path, loaded_data in iter_source_records(dataset):
+            if copy:
+                # Distinct ids per copy, so larger corpora can be simulated
+                file_path = f"{file_path}#copy{copy}"
+                loaded_data = {**loaded_data, "data": {**loaded_data.get("data", {}), "metadata": {}}}
+            documents, ids, store_record = build_documents(filename, file_path, loaded_data)
+            put_documents([store_record], version=collection_name)
+            vectors = [document_vector(doc.page_content) for doc in documents]
+            client.upsert(collection_name, points=[
+                models.PointStruct(id=point_id, vector=vector,
+                                   payload={"page_content": doc.page_content, "metadata": doc.metadata})
+                for point_id, vector, doc in zip(ids, vectors, documents)
+            ])
+            parents += 1
+    switch_alias(client, collection_name)
+    return parents
+
+
+def install(latencies: dict = None, recorder=None, seed: int = 0, dataset: str = "dataset_json",
+            copies: int = 1) -> dict:
+    """
+    Points the project modules at the fakes. Call once, before importing
+    tool_calls, llm_agent or api.
+
+    Returns:
+        dict: The parsed Latency objects per stage
+    """
+    if "tool_calls" in sys.modules:
+        raise RuntimeError("benchmarks.fakes.install() must run before tool_calls is imported")
+
+    rng, lock = random.Random(seed), threading.Lock()
+    parsed = {stage: Latency(spec, rng, lock) for stage, spec in {**DEFAULT_LATENCIES, **(latencies or {})}.items()}
+
+    # Local mode everywhere, and nothing written next to the real stores
+    tmp_dir = tempfile.mkdtemp(prefix="trip_bench_")
+    os.environ.update({
+        "QDRANT_URL": "", "QDRANT_API_KEY": "", "GROQ_API_KEY": "", "HUGGINGFACE_API_KEY": "",
+        "RAG_LOCAL_SNAPSHOTS": "false", "MCP_POOL_ENABLED": "false",
+        "TRIP_DOC_STORE": os.path.join(tmp_dir, "docs.sqlite"),
+        "RAG_MEMORY_STORE": os.path.join(tmp_dir, "memory"),
+    })
+
+    embeddings = HashEmbeddings(parsed, recorder)
+    import langchain_huggingface
+    langchain_huggingface.HuggingFaceEndpointEmbeddings = lambda **kwargs: embeddings
+    langchain_huggingface.HuggingFaceEmbeddings = lambda **kwargs: embeddings
+
+    import qdrant_client
+    memory_client = qdrant_client.QdrantClient(":memory:")
+    seed_memory_store(memory_client, dataset, copies)
+    _slow_down(memory_client, "query_points", "vector_search", parsed, recorder)
+
+    # tool_calls builds its client at import time; hand it the seeded in-memory one
+    real_client = qdrant_client.QdrantClient
+    qdrant_client.QdrantClient = lambda *args, **kwargs: memory_client
+    try:
+        import tool_calls
+    finally:
+        qdrant_client.QdrantClient = real_client
+
+    FakeSearchRun.service = _Service(parsed, recorder)
+    tool_calls.DuckDuckGoSearchRun = FakeSearchRun
+
+    import llm_agent
+    llm_agent.client = FakeGroq(parsed, recorder)
+    llm_agent.HAS_OLLAMA = False
+    return parsed
@@ -0,0 +1,413 @@
+"""
+HTTP load generator for the Trip Agent API.
+
+Starts api.py (or api/index.py, the Vercel entry point) in a separate process
+on the local fakes from benchmarks/fakes.py, replays a weighted query mix
+against it at an open-loop arrival rate, and reports throughput, latency
+percentiles, error and 429 rates and the server's event-loop lag, per ramp
+stage and overall.
+
+Arrivals are Poisson at the profile's rate, whether or not earlier requests
+have finished (open loop), and latency is measured from each request's
+scheduled send time, so a saturated server shows up as growing latency rather
+than as a quietly reduced request rate.
+
+    python -m benchmarks.loadtest run --profile 30@1,60@1-8,30@8 --out bench_results/load.json
+    python -m benchmarks.loadtest run --app index --mix "POST /api/v1/additional-info=1"
+    python -m benchmarks.loadtest run --url http://localhost:8000 --profile 60@2   # an already running server
+
+--profile is a list of DURATION@RATE stages (seconds, requests/second); a
+RATE of A-B ramps linearly from A to B over the stage. --mix weights
+"METHOD PATH=WEIGHT" entries.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import datetime
+import importlib.util
+import json
+import logging
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import deque
+
+import httpx
+
+from benchmarks import fakes
+from benchmarks.stats import summarize
+
+LAG_PATH = "/__loadtest/loop-lag"
+LAG_INTERVAL = 0.05
+
+DEFAULT_MIX = {
+    "api": {
+        "POST /api/v1/final-response": 4,
+        "POST /api/v1/additional-info": 3,
+        "GET /api/v1/final-response": 2,
+        "GET /api/health": 1,
+    },
+    # api/index.py has no GET agent endpoints
+    "index": {
+        "POST /api/v1/final-response": 5,
+        "POST /api/v1/additional-info": 4,
+        "GET /api/health": 1,
+    },
+}
+
+
+# --- Server side ---
+
+class LoopLagMonitor:
+    """Measures how late a periodic asyncio.sleep() wakes up: the time the loop was blocked."""
+
+    def __init__(self, interval: float = LAG_INTERVAL):
+        self.interval = interval
+        self.samples = deque(maxlen=100000)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - started - self.interval))
+
+    def drain(self) -> dict:
+        samples, self.samples = list(self.samples), deque(maxlen=self.samples.maxlen)
+        return summarize(samples)
+
+
+def load_app(name: str):
+    """The FastAPI app of api.py ("api") or api/index.py ("index")."""
+    if name == "api":
+        import api
+        return api.app
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api", "index.py")
+    spec = importlib.util.spec_from_file_location("api_index", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.app
+
+
+def serve(app_name: str, host: str, port: int, latencies: dict, seed: int, verbose: bool):
+    """Runs the app on the fakes, with an extra route that reports event-loop lag."""
+    import uvicorn
+
+    fakes.install(latencies, seed=seed)
+    app = load_app(app_name)
+    if not verbose:
+        sys.stdout = open(os.devnull, "w", encoding="utf-8")
+        logging.disable(logging.INFO)
+    monitor = LoopLagMonitor()
+    tasks = []
+
+    async def loop_lag():
+        # The load generator calls this once before it starts, which starts the monitor
+        if not tasks:
+            tasks.append(asyncio.create_task(monitor.run()))
+        return monitor.drain()
+
+    app.add_api_route(LAG_PATH, loop_lag, methods=["GET"], include_in_schema=False)
+    uvicorn.run(app, host=host, port=port, log_level="info" if verbose else "warning")
+
+
+# --- Load generation ---
+
+def parse_profile(spec: str) -> list:
+    """"30@1,60@1-8" -> [(30.0, 1.0, 1.0), (60.0, 1.0, 8.0)]"""
+    stages = []
+    for part in spec.split(","):
+        duration, _, rate = part.strip().partition("@")
+        start, _, end = rate.partition("-")
+        stages.append((float(duration), float(start), float(end or start)))
+    return stages
+
+
+def parse_mix(spec: str) -> dict:
+    """"POST /api/v1/final-response=4,GET /api/health=1" -> {"POST /api/v1/final-response": 4.0, ...}"""
+    mix = {}
+    for part in spec.split(","):
+        endpoint, _, weight = part.strip().rpartition("=")
+        mix[endpoint.strip()] = float(weight)
+    return mix
+
+
+def schedule_arrivals(stages: list, rng: random.Random) -> list:
+    """
+    Poisson arrival times (seconds from start) following the profile. Ramps
+    use thinning: candidates at the stage's peak rate, kept with probability
+    rate(t) / peak.
+
+    Returns:
+        list: (time, stage_index) tuples
+    """
+    arrivals = []
+    offset = 0.0
+    for index, (duration, start_rate, end_rate) in enumerate(stages):
+        peak = max(start_rate, end_rate)
+        t = 0.0
+        while peak > 0:
+            t += rng.expovariate(peak)
+            if t >= duration:
+                break
+            rate = start_rate + (end_rate - start_rate) * t / duration
+            if rng.random() < rate / peak:
+                arrivals.append((offset + t, index))
+        offset += duration
+    return arrivals
+
+
+def build_request(endpoint: str, query: str) -> tuple:
+    method, path = endpoint.split(" ", 1)
+    if method == "GET":
+        return method, path, ({} if path == "/api/health" else {"params": {"query": query}})
+    if path == "/api/v1/final-response":
+        return method, path, {"json": {"user_query": query}}
+    return method, path, {"json": {"query": query}}
+
+
+async def _send(client: httpx.AsyncClient, endpoint: str, request: tuple, due: float, results: list):
+    method, path, kwargs = request
+    loop = asyncio.get_running_loop()
+    entry = {"endpoint": endpoint, "due": due, "status": None, "error": None}
+    try:
+        response = await client.request(method, path, **kwargs)
+        entry["status"] = response.status_code
+    except httpx.TimeoutException:
+        entry["error"] = "timeout"
+    except httpx.HTTPError as e:
+        entry["error"] = type(e).__name__
+    # Measured from the scheduled send time, not from when the request actually went out
+    entry["latency"] = loop.time() - due
+    results.append(entry)
+
+
+async def _poll_lag(client: httpx.AsyncClient, stages: list, started: float, lag: list):
+    loop = asyncio.get_running_loop()
+    boundary = started
+    for duration, _, _ in stages:
+        boundary += duration
+        await asyncio.sleep(max(0.0, boundary - loop.time()))
+        try:
+            lag.append((await client.get(LAG_PATH, timeout=30)).json())
+        except (httpx.HTTPError, ValueError):
+            lag.append(None)
+
+
+async def generate(base_url: str, stages: list, mix: dict, queries: list, seed: int = 0,
+                   max_in_flight: int = 1000, timeout: float = 120.0, lag_available: bool = True) -> dict:
+    rng = random.Random(seed)
+    arrivals = schedule_arrivals(stages, rng)
+    endpoints, weights = list(mix), list(mix.values())
+
+    results, lag, dropped = [], [], [0] * len(stages)
+    limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client, \
+            httpx.AsyncClient(base_url=base_url) as lag_client:
+        if lag_available:
+            await lag_client.get(LAG_PATH)  # starts the server's monitor
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        lag_task = asyncio.create_task(_poll_lag(lag_client, stages, started, lag)) if lag_available else None
+        tasks = set()
+        for at, stage_index in arrivals:
+            due = started + at
+            await asyncio.sleep(max(0.0, due - loop.time()))
+            if len(tasks) >= max_in_flight:
+                dropped[stage_index] += 1
+                continue
+            endpoint = rng.choices(endpoints, weights)[0]
+            task = asyncio.create_task(_send(client, endpoint, build_request(endpoint, rng.choice(queries)), due, results))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.wait(tasks)
+        if lag_task is not None:
+            await lag_task
+        elapsed = loop.time() - started
+
+    return _report(results, arrivals, stages, started, dropped, lag, elapsed)
+
+
+def _summarize_requests(entries: list, seconds: float) -> dict:
+    ok = [e for e in entries if e["status"] is not None and e["status"] < 400]
+    rate_limited = sum(1 for e in entries if e["status"] == 429)
+    errors = sum(1 for e in entries if e["error"] or (e["status"] is not None and e["status"] >= 400 and e["status"] != 429))
+    total = len(entries)
+    return {
+        "requests": total,
+        "ok": len(ok),
+        "throughput_rps": round(len(ok) / seconds, 3) if seconds else None,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "rate_429": round(rate_limited / total, 4) if total else 0.0,
+        "latency": summarize([e["latency"] for e in ok]),
+    }
+
+
+def _report(results: list, arrivals: list, stages: list, started: float, dropped: list, lag: list,
+            elapsed: float) -> dict:
+    stage_reports = []
+    offset = 0.0
+    for index, (duration, start_rate, end_rate) in enumerate(stages):
+        window = [e for e in results if offset <= e["due"] - started < offset + duration]
+        report = _summarize_requests(window, duration)
+        report.update({
+            "stage": index,
+            "duration_s": duration,
+            "target_rps": [start_rate, end_rate],
+            "offered_rps": round(sum(1 for _, i in arrivals if i == index) / duration, 3) if duration else None,
+            "dropped": dropped[index],
+            "loop_lag": lag[index] if index < len(lag) else None,
+        })
+        stage_reports.append(report)
+        offset += duration
+
+    by_endpoint = {}
+    for entry in results:
+        by_endpoint.setdefault(entry["endpoint"], []).append(entry)
+    return {
+        "overall": {**_summarize_requests(results, elapsed), "dropped": sum(dropped), "seconds": round(elapsed, 3)},
+        "endpoints": {endpoint: _summarize_requests(entries, elapsed) for endpoint, entries in sorted(by_endpoint.items())},
+        "stages": stage_reports,
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextlib.contextmanager
+def local_server(app_name: str, latencies: dict, seed: int, verbose: bool, startup_timeout: float = 120.0):
+    """Starts `loadtest serve` in a subprocess and yields its base URL once /api/health answers."""
+    port = _free_port()
+    command = [sys.executable, "-m", "benchmarks.loadtest", "serve", "--app", app_name, "--port", str(port),
+               "--seed", str(seed)]
+    for stage, spec in latencies.items():
+        command += [f"--{stage.replace('_', '-')}-latency", spec]
+    if verbose:
+        command.append("--verbose")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen(command, cwd=root)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"Server exited with status {process.returncode} during startup")
+            try:
+                if httpx.get(f"{base_url}/api/health", timeout=2).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Server did not become healthy within {startup_timeout}s")
+            time.sleep(0.25)
+        yield base_url
+    finally:
+        process.terminate()
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def print_report(report: dict):
+    def line(label, r):
+        latency = r["latency"]
+        print(f"{label:<38} {r['requests']:>6} {r['throughput_rps'] or 0:>8.2f} {latency.get('p50_ms', 0):>9.1f} "
+              f"{latency.get('p95_ms', 0):>9.1f} {latency.get('p99_ms', 0):>9.1f} {r['error_rate']:>7.1%} {r['rate_429']:>7.1%}")
+
+    header = f"{'':<38} {'reqs':>6} {'ok rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7} {'429':>7}"
+    print("\nPer stage:")
+    print(header)
+    for stage in report["stages"]:
+        lag = stage["loop_lag"] or {}
+        start, end = stage["target_rps"]
+        target = f"{start:g}" if start == end else f"{start:g}->{end:g}"
+        line(f"#{stage['stage']} {stage['duration_s']:g}s @ {target} rps", stage)
+        print(f"{'':<38} offered {stage['offered_rps']} rps, dropped {stage['dropped']}, "
+              f"loop lag p99 {lag.get('p99_ms', '-')} ms / max {lag.get('max_ms', '-')} ms")
+    print("\nPer endpoint:")
+    print(header)
+    for endpoint, r in report["endpoints"].items():
+        line(endpoint, r)
+    print()
+    line("overall", report["overall"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-loop HTTP load test for the Trip Agent API.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_server_args(cmd):
+        cmd.add_argument("--app", choices=["api", "index"], default="api", help="api.py or api/index.py")
+        cmd.add_argument("--seed", type=int, default=0)
+        for stage, spec in fakes.DEFAULT_LATENCIES.items():
+            cmd.add_argument(f"--{stage.replace('_', '-')}-latency", dest=stage, default=spec,
+                             help=f"Latency distribution of the fake {stage} (default: {spec})")
+        cmd.add_argument("--verbose", action="store_true", help="Show the server's own output")
+
+    run_cmd = sub.add_parser("run", help="Start the app on the fakes (or use --url) and generate load")
+    add_server_args(run_cmd)
+    run_cmd.add_argument("--url", help="Load an already running server instead (no fakes, no loop lag)")
+    run_cmd.add_argument("--profile", default="20@1,40@1-5,20@5", help="DURATION@RATE[-RATE],... stages")
+    run_cmd.add_argument("--mix", help='Weighted endpoints, e.g. "POST /api/v1/final-response=3,GET /api/health=1"')
+    run_cmd.add_argument("--dataset", default="dataset_json", help="Source of the query mix")
+    run_cmd.add_argument("--max-in-flight", type=int, default=1000,
+                         help="Client-side cap on outstanding requests; arrivals beyond it are dropped and counted")
+    run_cmd.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    run_cmd.add_argument("--out", help="Write the results JSON here")
+
+    serve_cmd = sub.add_parser("serve", help="(internal) run the app on the fakes")
+    add_server_args(serve_cmd)
+    serve_cmd.add_argument("--host", default="127.0.0.1")
+    serve_cmd.add_argument("--port", type=int, default=8001)
+    args = parser.parse_args()
+
+    latencies = {stage: getattr(args, stage) for stage in fakes.DEFAULT_LATENCIES}
+    if args.command == "serve":
+        serve(args.app, args.host, args.port, latencies, args.seed, args.verbose)
+        return
+
+    from benchmarks.bench import default_queries
+
+    stages = parse_profile(args.profile)
+    mix = parse_mix(args.mix) if args.mix else DEFAULT_MIX[args.app]
+    queries = default_queries(args.dataset)
+    print(f"Profile {args.profile} ({sum(d for d, _, _ in stages):g}s), mix {mix}")
+
+    def execute(base_url: str, lag_available: bool) -> dict:
+        return asyncio.run(generate(base_url, stages, mix, queries, args.seed, args.max_in_flight,
+                                    args.timeout, lag_available))
+
+    if args.url:
+        report = execute(args.url.rstrip("/"), lag_available=False)
+    else:
+        with local_server(args.app, latencies, args.seed, args.verbose) as base_url:
+            report = execute(base_url, lag_available=True)
+
+    report["meta"] = {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "target": args.url or f"local:{args.app}",
+        "profile": args.profile,
+        "mix": mix,
+        "seed": args.seed,
+        "latencies": None if args.url else latencies,
+        "max_in_flight": args.max_in_flight,
+    }
+    print_report(report)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
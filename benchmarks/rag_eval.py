@@ -0,0 +1,280 @@
+"""
+Retrieval evaluation: recall@k, MRR, false accepts and latency per configuration.
+
+Runs a labelled query set (query -> expected Attraction_name, or none for
+queries the index should not answer) through tool_calls.search_rag and
+applies the agents' acceptance rule (score >= RAG_SCORE_THRESHOLD and
+llm_agent.is_relevant) for every threshold. Configurations are the cross
+product of:
+
+    --collection   collections to search (default: the live alias). Build
+                   quantized copies with rag_upload.py --quantization and list
+                   them here to compare quantization on the same queries.
+    --search       exact | default (rescore with RAG_SEARCH_OVERSAMPLING) | no-rescore
+    --mode         dense (search_rag as is) | hybrid (dense candidates re-ranked
+                   with keyword overlap by reciprocal rank fusion)
+    --k            result counts
+    --threshold    score thresholds (evaluated on the same results, no extra queries)
+
+The backend is whatever tool_calls connects to (QDRANT_URL, local store or
+RAG_LOCAL_SNAPSHOTS); run once per backend and compare the JSON outputs.
+--offline evaluates the plumbing on benchmarks.fakes (hash embeddings,
+in-memory index) without any service; its scores say nothing about the real
+embeddings.
+
+    python -m benchmarks.rag_eval --k 1 3 5 --threshold 0.4 0.5 0.6 --mode dense hybrid
+    python -m benchmarks.rag_eval --queries eval/queries.jsonl --collection trip_rag_v1 trip_rag_v1_int8
+    python -m benchmarks.rag_eval --offline --out bench_results/rag_eval.json
+
+A queries file has one JSON object per line: {"query": "...", "expected": "Attraction name" | null}.
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import re
+import sys
+import time
+
+from benchmarks.stats import summarize
+
+SEARCH_MODES = ("dense", "hybrid")
+SEARCH_PARAMS = ("default", "exact", "no-rescore")
+
+# Dense candidates per requested result in hybrid mode, and the usual RRF constant
+HYBRID_CANDIDATES = 4
+RRF_K = 60
+
+_STOPWORDS = {"the", "and", "for", "about", "tell", "what", "with", "from", "tickets", "ticket", "tour", "tours"}
+
+
+def default_query_set(dataset: str = "dataset_json") -> list:
+    """A few phrasings per attraction in the dataset, plus off-corpus queries that should be rejected."""
+    from benchmarks.bench import OFF_CORPUS_QUERIES
+    from shard_store import iter_source_records
+
+    labelled = []
+    for _, _, loaded_data in iter_source_records(dataset):
+        name = loaded_data.get("data", {}).get("json", {}).get("Attraction_name")
+        if not name:
+            continue
+        short_name = re.sub(r"\s*[\(\[].*?[\)\]]", "", name).strip()
+        for query in (f"tell me about {name}", f"{short_name} tickets and opening hours", short_name.lower()):
+            labelled.append({"query": query, "expected": name})
+    labelled.extend({"query": query, "expected": None} for query in OFF_CORPUS_QUERIES)
+    return labelled
+
+
+def load_query_set(path: str) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _keywords(text: str) -> set:
+    return {w for w in re.findall(r"[a-z0-9]+", text.lower()) if len(w) > 2 and w not in _STOPWORDS}
+
+
+def hybrid_rerank(query: str, results: list, k: int) -> list:
+    """
+    Re-ranks dense results by reciprocal rank fusion with a keyword-overlap
+    ranking (query words found in the attraction name and text). Scores stay
+    the dense similarities, so thresholds mean the same in both modes.
+    """
+    words = _keywords(query)
+
+    def overlap(item):
+        doc = item[1][0]
+        name = getattr(doc, "metadata", {}).get("Attraction_name", "")
+        return len(words & _keywords(f"{name} {name} {getattr(doc, 'page_content', '')}"))
+
+    by_keyword = sorted(enumerate(results), key=overlap, reverse=True)
+    fused = {}
+    for rank, (index, _) in enumerate(by_keyword):
+        fused[index] = 1 / (RRF_K + index + 1) + 1 / (RRF_K + rank + 1)
+    order = sorted(fused, key=fused.get, reverse=True)
+    return [results[i] for i in order[:k]]
+
+
+def _search_params(kind: str):
+    import tool_calls
+    from rag_index import build_search_params
+
+    if kind == "exact":
+        return build_search_params(exact=True)
+    if kind == "no-rescore":
+        return build_search_params(rescore=False)
+    return build_search_params(rescore=True, oversampling=tool_calls.RAG_SEARCH_OVERSAMPLING)
+
+
+@contextlib.contextmanager
+def configured(collection: str = None, search: str = "default"):
+    """Points tool_calls.search_rag at `collection` with the given search params for the duration."""
+    import tool_calls
+    from langchain_qdrant import QdrantVectorStore
+
+    saved = tool_calls.SEARCH_PARAMS, tool_calls._get_vector_store
+    tool_calls.SEARCH_PARAMS = _search_params(search)
+    if collection:
+        store = QdrantVectorStore(client=tool_calls.get_client(), collection_name=collection,
+                                  embedding=tool_calls.embeddings)
+        tool_calls._get_vector_store = lambda: store
+    try:
+        yield
+    finally:
+        tool_calls.SEARCH_PARAMS, tool_calls._get_vector_store = saved
+
+
+def _name(doc) -> str:
+    return getattr(doc, "metadata", {}).get("Attraction_name", "")
+
+
+def run_queries(queries: list, k: int, mode: str) -> tuple:
+    """Returns ([(labelled query, results)], [seconds per search])."""
+    import tool_calls
+
+    runs, latencies = [], []
+    for item in queries:
+        started = time.perf_counter()
+        if mode == "hybrid":
+            results = hybrid_rerank(item["query"], tool_calls.search_rag(item["query"], k=k * HYBRID_CANDIDATES), k)
+        else:
+            results = tool_calls.search_rag(item["query"], k=k)
+        latencies.append(time.perf_counter() - started)
+        runs.append((item, results))
+    return runs, latencies
+
+
+def score(runs: list, threshold: float) -> dict:
+    """
+    Retrieval and acceptance metrics of one configuration.
+
+    recall_at_k / mrr are over queries with an expected attraction. A query is
+    answered from RAG if any result is accepted; a false accept is an accepted
+    result for another attraction (or for an off-corpus query).
+    """
+    from llm_agent import is_relevant
+
+    in_corpus = [(item, results) for item, results in runs if item.get("expected")]
+    hits, reciprocal, accepted_hits, false_accepts, fallbacks = 0, 0.0, 0, 0, 0
+    for item, results in runs:
+        names = [_name(doc) for doc, _ in results]
+        expected = item.get("expected")
+        if expected and expected in names:
+            hits += 1
+            reciprocal += 1 / (names.index(expected) + 1)
+        accepted = [_name(doc) for doc, s in results if s >= threshold and is_relevant(item["query"], _name(doc))]
+        if not accepted:
+            fallbacks += 1
+        if expected and expected in accepted:
+            accepted_hits += 1
+        if any(name != expected for name in accepted):
+            false_accepts += 1
+    total = len(runs) or 1
+    return {
+        "recall_at_k": round(hits / (len(in_corpus) or 1), 4),
+        "mrr": round(reciprocal / (len(in_corpus) or 1), 4),
+        "accepted_recall": round(accepted_hits / (len(in_corpus) or 1), 4),
+        "false_accept_rate": round(false_accepts / total, 4),
+        "web_fallback_rate": round(fallbacks / total, 4),
+    }
+
+
+def evaluate(queries: list, ks: list, thresholds: list, modes: list, searches: list, collections: list,
+             verbose: bool = False) -> list:
+    """Runs every configuration; returns one row per (collection, search, mode, k, threshold)."""
+    from benchmarks.bench import _quiet
+
+    rows = []
+    for collection in collections:
+        for search in searches:
+            with configured(collection, search):
+                for mode in modes:
+                    for k in ks:
+                        # The search modules log to stderr, so quiet mode lowers logging too
+                        with _quiet(not verbose):
+                            run_queries(queries[:1], k, mode)  # warm up connections and caches
+                            runs, latencies = run_queries(queries, k, mode)
+                        latency = summarize(latencies)
+                        for threshold in thresholds:
+                            rows.append({
+                                "collection": collection or "(alias)",
+                                "search": search,
+                                "mode": mode,
+                                "k": k,
+                                "threshold": threshold,
+                                **score(runs, threshold),
+                                "p50_ms": latency.get("p50_ms"),
+                                "p95_ms": latency.get("p95_ms"),
+                            })
+    return rows
+
+
+def _backend() -> str:
+    import tool_calls
+
+    if tool_calls.QDRANT_URL and tool_calls.QDRANT_API_KEY:
+        return "cloud"
+    return "snapshots" if tool_calls.LOCAL_SNAPSHOTS else "local"
+
+
+def print_report(rows: list):
+    print(f"\n{'collection':<24} {'search':<10} {'mode':<7} {'k':>2} {'thr':>5} {'recall':>7} {'mrr':>6} "
+          f"{'accept':>7} {'false+':>7} {'web':>6} {'p50ms':>8} {'p95ms':>8}")
+    for r in rows:
+        print(f"{r['collection']:<24} {r['search']:<10} {r['mode']:<7} {r['k']:>2} {r['threshold']:>5.2f} "
+              f"{r['recall_at_k']:>7.3f} {r['mrr']:>6.3f} {r['accepted_recall']:>7.3f} {r['false_accept_rate']:>7.3f} "
+              f"{r['web_fallback_rate']:>6.3f} {r['p50_ms'] or 0:>8.1f} {r['p95_ms'] or 0:>8.1f}")
+    print("\nrecall/mrr: retrieval before filtering; accept: expected attraction accepted; "
+          "false+: accepted a wrong attraction; web: queries that would fall back to web search")
+
+
+def main():
+    from logs import setup_logging
+
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Evaluate RAG retrieval per configuration.")
+    parser.add_argument("--queries", help="Labelled queries (JSONL); default: generated from --dataset")
+    parser.add_argument("--dataset", default="dataset_json")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--threshold", type=float, nargs="+", default=[0.3, 0.4, 0.5, 0.6, 0.7])
+    parser.add_argument("--mode", choices=SEARCH_MODES, nargs="+", default=list(SEARCH_MODES))
+    parser.add_argument("--search", choices=SEARCH_PARAMS, nargs="+", default=["default"])
+    parser.add_argument("--collection", nargs="+", default=[None],
+                        help="Collections to search (default: the one behind the alias)")
+    parser.add_argument("--offline", action="store_true", help="Use benchmarks.fakes instead of real services")
+    parser.add_argument("--out", help="Write the results JSON here")
+    parser.add_argument("--verbose", action="store_true", help="Keep the search output")
+    args = parser.parse_args()
+
+    if args.offline:
+        from benchmarks import fakes
+        fakes.install({"embed": "0", "vector_search": "0"}, dataset=args.dataset)
+
+    queries = load_query_set(args.queries) if args.queries else default_query_set(args.dataset)
+    if not queries:
+        sys.exit("No labelled queries")
+    started = time.perf_counter()
+    rows = evaluate(queries, args.k, args.threshold, args.mode, args.search, args.collection, args.verbose)
+    print_report(rows)
+
+    if args.out:
+        results = {
+            "meta": {
+                "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+                "backend": "offline" if args.offline else _backend(),
+                "queries": len(queries),
+                "in_corpus": sum(1 for q in queries if q.get("expected")),
+                "wall_seconds": round(time.perf_counter() - started, 3),
+            },
+            "rows": rows,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
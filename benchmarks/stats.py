@@ -0,0 +1,48 @@
+"""Latency recording and percentile summaries shared by the benchmarks."""
+
+import math
+import threading
+from collections import defaultdict
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(ordered: list, p: float) -> float:
+    """Nearest-rank percentile of an already sorted list (None if empty)."""
+    if not ordered:
+        return None
+    rank = max(0, min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(samples: list) -> dict:
+    """count, mean, max and percentiles (ms) of a list of durations in seconds."""
+    ordered = sorted(s * 1000 for s in samples)
+    summary = {"count": len(ordered)}
+    if not ordered:
+        return summary
+    summary["mean_ms"] = round(sum(ordered) / len(ordered), 3)
+    for p in PERCENTILES:
+        summary[f"p{p}_ms"] = round(percentile(ordered, p), 3)
+    summary["max_ms"] = round(ordered[-1], 3)
+    return summary
+
+
+class StageRecorder:
+    """Thread-safe collection of durations per named stage."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(list)
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            self._samples[stage].append(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {stage: summarize(samples) for stage, samples in sorted(self._samples.items())}
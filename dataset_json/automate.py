@@ -15,13 +15,25 @@ You can also run the script directly from the command line:
     python automate.py <url>
 
 The function returns the JSON response from the API.
+
+Batch mode scrapes a list of URLs (one per line) with bounded concurrency and
+appends the results to a JSONL shard. A manifest records every successful
+fetch, so a re-run skips URLs already fetched within ``maxAge``:
+
+    python automate.py --batch urls.txt --shard ../dataset_shards/firecrawl.jsonl --concurrency 4
 """
 
 import os
 import sys
+import time
+import random
 import argparse
+import threading
 import requests
-from typing import Any, Dict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterable, List
+from urllib.parse import urlparse
 import json
 from dotenv import load_dotenv
 
@@ -31,11 +43,40 @@ load_dotenv()
 # Base endpoint for Firecrawl scrape API
 API_ENDPOINT = "https://api.firecrawl.dev/v2/scrape"
 
-def fetch_attraction_data(url: str) -> Dict[str, Any]:
+# Firecrawl serves a cached scrape if it is younger than this; the batch manifest uses the same window
+MAX_AGE_MS = 172800000
+REQUEST_TIMEOUT = float(os.getenv("FIRECRAWL_TIMEOUT", "120"))
+MAX_RETRIES = int(os.getenv("FIRECRAWL_MAX_RETRIES", "4"))
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 60.0
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+def _retry_delay(attempt: int, retry_after: str = None) -> float:
+    """Seconds to wait before retry `attempt`: Retry-After if given, else jittered exponential backoff."""
+    if retry_after:
+        try:
+            return min(BACKOFF_MAX, max(0.0, float(retry_after)))
+        except ValueError:
+            try:
+                return min(BACKOFF_MAX, max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time()))
+            except (TypeError, ValueError):
+                pass
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def fetch_attraction_data(url: str, session: requests.Session = None, timeout: float = REQUEST_TIMEOUT,
+                          max_retries: int = MAX_RETRIES) -> Dict[str, Any]:
     """Fetch attraction data from Firecrawl.
 
+    Connection errors, timeouts and 408/429/5xx responses are retried with
+    backoff; other HTTP errors are raised immediately.
+
     Args:
         url: The target webpage URL to scrape.
+        session: Optional requests session to reuse connections across calls.
+        timeout: Per-request timeout in seconds.
+        max_retries: Retries after the first attempt.
 
     Returns:
         The JSON response from the Firecrawl API as a Python dictionary.
@@ -49,7 +90,7 @@ def fetch_attraction_data(url: str) -> Dict[str, Any]:
     payload = {
         "url": url,
         "onlyMainContent": False,
-        "maxAge": 172800000,
+        "maxAge": MAX_AGE_MS,
         "parsers": ["pdf"],
         "formats": [
             "markdown",
@@ -79,15 +120,142 @@ def fetch_attraction_data(url: str) -> Dict[str, Any]:
         "Content-Type": "application/json"
     }
 
-    response = requests.post(API_ENDPOINT, json=payload, headers=headers)
-    response.raise_for_status()
-    return response.json()
+    http = session or requests
+    for attempt in range(max_retries + 1):
+        try:
+            response = http.post(API_ENDPOINT, json=payload, headers=headers, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt >= max_retries:
+                raise
+            delay = _retry_delay(attempt)
+            print(f"Request for {url} failed ({e}); retrying in {delay:.1f}s", file=sys.stderr)
+            time.sleep(delay)
+            continue
+        if response.status_code in RETRY_STATUSES and attempt < max_retries:
+            delay = _retry_delay(attempt, response.headers.get("Retry-After"))
+            print(f"Firecrawl returned {response.status_code} for {url}; retrying in {delay:.1f}s", file=sys.stderr)
+            time.sleep(delay)
+            continue
+        response.raise_for_status()
+        return response.json()
+
+
+def load_manifest(manifest_path: str) -> Dict[str, float]:
+    """Returns url -> last successful fetch time (epoch seconds) from an append-only JSONL manifest."""
+    fetched = {}
+    if not os.path.exists(manifest_path):
+        return fetched
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # a torn last line from an interrupted run
+            fetched[entry["url"]] = max(entry["fetched_at"], fetched.get(entry["url"], 0))
+    return fetched
+
+
+def _shard_filename(url: str) -> str:
+    """A dataset-style file name for a scraped URL, e.g. .../colosseum-tour -> colosseum-tour.json."""
+    parsed = urlparse(url)
+    slug = parsed.path.rstrip("/").rsplit("/", 1)[-1] or parsed.netloc
+    return f"{slug}.json"
+
+
+def batch_fetch(urls: Iterable[str], shard_path: str, manifest_path: str = None, concurrency: int = 4,
+                max_age_ms: int = MAX_AGE_MS, force: bool = False) -> Dict[str, int]:
+    """Scrape many URLs concurrently into an append-only JSONL shard.
+
+    Each shard line is {"filename", "file_path", "record"} where "record" is
+    the Firecrawl response. The shard line is written before the manifest
+    entry, so an interrupted run re-fetches at most the in-flight URLs.
+
+    Args:
+        urls: URLs to scrape; duplicates are ignored.
+        shard_path: JSONL file results are appended to.
+        manifest_path: JSONL manifest of successful fetches (default: <shard>.manifest.jsonl).
+        concurrency: Maximum simultaneous Firecrawl requests.
+        max_age_ms: URLs fetched more recently than this are skipped.
+        force: Re-fetch every URL regardless of the manifest.
+
+    Returns:
+        Counts of fetched, skipped and failed URLs.
+    """
+    manifest_path = manifest_path or f"{shard_path}.manifest.jsonl"
+    os.makedirs(os.path.dirname(os.path.abspath(shard_path)), exist_ok=True)
+    fetched = {} if force else load_manifest(manifest_path)
+    cutoff = time.time() - max_age_ms / 1000
+
+    pending: List[str] = []
+    counts = {"fetched": 0, "skipped": 0, "failed": 0}
+    for url in dict.fromkeys(u.strip() for u in urls if u and u.strip()):
+        if fetched.get(url, 0) >= cutoff:
+            counts["skipped"] += 1
+        else:
+            pending.append(url)
+
+    print(f"{len(pending)} URLs to scrape, {counts['skipped']} fetched within maxAge skipped")
+    write_lock = threading.Lock()
+    session = requests.Session()
+    session.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=concurrency))
+    started = time.perf_counter()
+
+    with open(shard_path, "a", encoding="utf-8") as shard, \
+            open(manifest_path, "a", encoding="utf-8") as manifest, \
+            ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {pool.submit(fetch_attraction_data, url, session): url for url in pending}
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                record = future.result()
+            except Exception as e:
+                counts["failed"] += 1
+                print(f"Error scraping {url}: {e}", file=sys.stderr)
+                continue
+            if not isinstance(record, dict) or record.get("success") is False or not record.get("data"):
+                # Firecrawl reports some failures in a 200 body; keep them out of the shard and manifest
+                counts["failed"] += 1
+                error = record.get("error") if isinstance(record, dict) else None
+                print(f"Error scraping {url}: {error or 'Firecrawl returned no data'}", file=sys.stderr)
+                continue
+            line = {"filename": _shard_filename(url), "file_path": url, "record": record}
+            with write_lock:
+                shard.write(json.dumps(line, ensure_ascii=False, separators=(",", ":")) + "\n")
+                shard.flush()
+                manifest.write(json.dumps({"url": url, "fetched_at": time.time()}) + "\n")
+                manifest.flush()
+            counts["fetched"] += 1
+            done = counts["fetched"] + counts["failed"]
+            if done % 25 == 0 or done == len(pending):
+                elapsed = time.perf_counter() - started
+                print(f"[{done}/{len(pending)}] {counts['fetched'] / elapsed:.2f} pages/sec, {counts['failed']} failed")
+
+    return counts
+
 
 def main():
     parser = argparse.ArgumentParser(description="Fetch attraction data via Firecrawl.")
-    parser.add_argument("url", help="The URL of the attraction page to scrape.")
+    parser.add_argument("url", nargs="?", help="The URL of the attraction page to scrape.")
     parser.add_argument("--output", help="Path to write JSON output file (optional)")
+    parser.add_argument("--batch", help="File with one URL per line; enables batch mode")
+    parser.add_argument("--shard", default="firecrawl.jsonl", help="JSONL shard batch results are appended to")
+    parser.add_argument("--manifest", help="Manifest path (default: <shard>.manifest.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent Firecrawl requests")
+    parser.add_argument("--max-age-hours", type=float, default=MAX_AGE_MS / 3600000,
+                        help="Skip URLs fetched within this many hours")
+    parser.add_argument("--force", action="store_true", help="Ignore the manifest and re-fetch everything")
     args = parser.parse_args()
+
+    if args.batch:
+        with open(args.batch, "r", encoding="utf-8") as f:
+            urls = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+        counts = batch_fetch(urls, args.shard, args.manifest, args.concurrency,
+                             int(args.max_age_hours * 3600000), args.force)
+        print(f"Done: {counts['fetched']} fetched, {counts['skipped']} skipped, {counts['failed']} failed")
+        sys.exit(1 if counts["failed"] else 0)
+
+    if not args.url:
+        parser.error("a URL or --batch file is required")
     try:
         data = fetch_attraction_data(args.url)
         print(data)
@@ -0,0 +1,116 @@
+"""
+Local side store for full dataset records.
+
+Qdrant only holds slim payloads (see rag_documents.py). The full structured
+"json" block, the Firecrawl metadata and the markdown of every page live here,
+keyed by (index version, doc_id), and are only read when an agent actually
+needs them. Keying by version means a searcher still on an older index
+version never hydrates content from a newer ingest; rag_upload.py deletes a
+version's records when it garbage-collects that version. Records stored
+without a version ("") are the fallback for every version.
+
+Records are stored as zlib-compressed JSON in a single SQLite file, which keeps
+the store small and lets many processes read it concurrently.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import zlib
+
+_local = threading.local()
+
+
+# The path is read at call time, not on import: the entry points load .env after
+# this module has been imported.
+def doc_store_path() -> str:
+    return os.getenv("TRIP_DOC_STORE", "trip_docs.sqlite")
+
+
+def _connect(path: str = None) -> sqlite3.Connection:
+    """Returns a per-thread connection (sqlite3 connections are not thread-safe)."""
+    path = path or doc_store_path()
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(path)
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents (version TEXT NOT NULL, doc_id TEXT NOT NULL, "
+                "record BLOB NOT NULL, PRIMARY KEY (version, doc_id))"
+            )
+            # Stores written before records were versioned become the unversioned fallback
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'docs'").fetchone():
+                conn.execute("INSERT OR IGNORE INTO documents (version, doc_id, record) "
+                             "SELECT '', doc_id, record FROM docs")
+                conn.execute("DROP TABLE docs")
+        connections[path] = conn
+    return conn
+
+
+def put_documents(records: list, path: str = None, version: str = "") -> int:
+    """
+    Inserts or replaces full records of an index version. Each record must have a "doc_id" key.
+
+    Returns:
+        int: Number of records written.
+    """
+    rows = [
+        (version, record["doc_id"], zlib.compress(json.dumps(record, ensure_ascii=False).encode("utf-8")))
+        for record in records
+    ]
+    conn = _connect(path)
+    with conn:
+        conn.executemany("INSERT OR REPLACE INTO documents (version, doc_id, record) VALUES (?, ?, ?)", rows)
+    return len(rows)
+
+
+def get_documents(doc_ids: list, path: str = None, version: str = "") -> dict:
+    """
+    Fetches full records of an index version by id, falling back to
+    unversioned records. Missing ids are simply absent from the result.
+
+    Returns:
+        dict: Mapping of doc_id to record.
+    """
+    doc_ids = [doc_id for doc_id in dict.fromkeys(doc_ids) if doc_id]
+    if not doc_ids:
+        return {}
+    path = path or doc_store_path()
+    if not os.path.exists(path):
+        return {}
+
+    placeholders = ",".join("?" for _ in doc_ids)
+    # Unversioned rows sort first, so the version's own record wins
+    rows = _connect(path).execute(
+        f"SELECT doc_id, record FROM documents WHERE doc_id IN ({placeholders}) AND version IN (?, '') "
+        "ORDER BY version",
+        [*doc_ids, version],
+    ).fetchall()
+    return {doc_id: json.loads(zlib.decompress(blob).decode("utf-8")) for doc_id, blob in rows}
+
+
+def get_document(doc_id: str, path: str = None, version: str = "") -> dict:
+    """Fetches one full record, or {} if it is not in the store."""
+    return get_documents([doc_id], path, version).get(doc_id, {})
+
+
+def delete_versions(versions: list, path: str = None) -> int:
+    """
+    Deletes every record of the given index versions (e.g. garbage-collected ones).
+
+    Returns:
+        int: Number of records deleted.
+    """
+    versions = [version for version in versions if version]
+    path = path or doc_store_path()
+    if not versions or not os.path.exists(path):
+        return 0
+    placeholders = ",".join("?" for _ in versions)
+    conn = _connect(path)
+    with conn:
+        return conn.execute(f"DELETE FROM documents WHERE version IN ({placeholders})", versions).rowcount
@@ -1,65 +1,472 @@
 import requests
 import json
+import logging
 import os
+import random
+import time
+import asyncio
+import contextlib
+import sqlite3
+import threading
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+from metrics import cache_lookup, provider_error
+
+try:
+    import httpx  # installed with the groq SDK; only needed for the async variants
+except ImportError:
+    httpx = None
+
+logger = logging.getLogger(__name__)
 
 # Base URL for the GetYourGuide Partner API
 # NOTE: Ensure this is the correct production endpoint version
 BASE_URL = "https://api.getyourguide.com/1"
 API_KEY = os.getenv("GYG_API_KEY", "your_api_key_here")
 
+# HTTP client settings
+REQUEST_TIMEOUT = float(os.getenv("GYG_TIMEOUT", "10"))
+POOL_SIZE = int(os.getenv("GYG_POOL_SIZE", "10"))
+MAX_RETRIES = int(os.getenv("GYG_MAX_RETRIES", "3"))
+BACKOFF_BASE = float(os.getenv("GYG_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = float(os.getenv("GYG_BACKOFF_MAX", "8"))
+# Upper bound on a server-requested Retry-After, so one call can't stall an agent request
+RETRY_AFTER_MAX = float(os.getenv("GYG_RETRY_AFTER_MAX", "30"))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Process-wide request counters (read by gyg_harvest.py for its throughput report)
+request_stats = {"requests": 0, "retries": 0, "rate_limited": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(response=None, retried=False):
+    with _stats_lock:
+        request_stats["requests"] += 1
+        if retried:
+            request_stats["retries"] += 1
+        if response is not None and response.status_code == 429:
+            request_stats["rate_limited"] += 1
+
+# Response cache (persisted across restarts). Details change far less often than search results.
+CACHE_PATH = os.getenv("GYG_CACHE_PATH", "gyg_cache.sqlite")
+SEARCH_TTL = int(os.getenv("GYG_SEARCH_TTL", str(6 * 3600)))
+DETAIL_TTL = int(os.getenv("GYG_DETAIL_TTL", str(7 * 24 * 3600)))
+# Eviction: entries not refreshed for CACHE_MAX_AGE seconds (kept past the TTLs as a
+# fallback while the API is down), then the oldest beyond CACHE_MAX_ROWS. 0 disables either.
+CACHE_MAX_AGE = int(os.getenv("GYG_CACHE_MAX_AGE", str(30 * 24 * 3600)))
+CACHE_MAX_ROWS = int(os.getenv("GYG_CACHE_MAX_ROWS", "50000"))
+CACHE_PRUNE_EVERY = int(os.getenv("GYG_CACHE_PRUNE_EVERY", "500"))
+
 def get_headers():
     return {
         "Accept": "application/json",
         "Authorization": f"Bearer {API_KEY}"
     }
 
-def search_tours(query, limit=5):
+# --- Pooled HTTP clients ---
+
+_session = None
+_session_lock = threading.Lock()
+# Event loop -> (its httpx.AsyncClient, the task that closes it at loop shutdown)
+_async_clients = {}
+_async_clients_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Shared keep-alive session, so repeat calls reuse TCP/TLS connections."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            session.headers.update(get_headers())
+            # Retries are handled in _get() so Retry-After and jitter are applied uniformly
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def _get_async_client():
+    """
+    Shared httpx.AsyncClient for the running event loop.
+
+    An httpx client can't be used from another loop, so each loop gets its own,
+    closed by _close_at_shutdown() when that loop shuts down.
+    """
+    loop = asyncio.get_running_loop()
+    with _async_clients_lock:
+        for other in [other for other in _async_clients if other.is_closed()]:
+            del _async_clients[other]
+        entry = _async_clients.get(loop)
+        if entry is None or entry[0].is_closed:
+            client = httpx.AsyncClient(
+                headers=get_headers(),
+                timeout=REQUEST_TIMEOUT,
+                limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE),
+            )
+            entry = _async_clients[loop] = (client, loop.create_task(_close_at_shutdown(client)))
+        return entry[0]
+
+
+async def _close_at_shutdown(client):
+    """
+    Waits until cancelled, then closes the client's connections on its own loop.
+
+    asyncio.run() (and uvicorn, which uses it) cancels leftover tasks before
+    closing the loop, so this runs when the loop shuts down.
+    """
+    try:
+        await asyncio.get_running_loop().create_future()
+    finally:
+        await client.aclose()
+
+
+# Called before every HTTP request actually sent (retries included); see throttle()
+_throttle = None
+
+
+@contextlib.contextmanager
+def throttle(acquire):
+    """
+    Calls `acquire` (e.g. a rate limiter's blocking acquire) before every
+    request sent to the API, including retries, while the block runs. Cache
+    hits send nothing and are not throttled.
+    """
+    global _throttle
+    previous, _throttle = _throttle, acquire
+    try:
+        yield
+    finally:
+        _throttle = previous
+
+
+def _retry_delay(attempt: int, retry_after: str = None) -> float:
+    """Seconds to wait before retry number `attempt` (0-based)."""
+    if retry_after:
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            try:
+                delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+            except (TypeError, ValueError):
+                delay = None
+        if delay is not None:
+            return min(max(0.0, delay), RETRY_AFTER_MAX)
+    # Full jitter exponential backoff
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def _get(url, params=None, headers=None):
+    """GET through the pooled session, retrying connection errors and 429/5xx responses."""
+    session = get_session()
+    for attempt in range(MAX_RETRIES + 1):
+        if _throttle is not None:
+            _throttle()
+        try:
+            response = session.get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            _count(retried=attempt < MAX_RETRIES)
+            if attempt >= MAX_RETRIES:
+                provider_error("getyourguide", e)
+                raise
+            delay = _retry_delay(attempt)
+            logger.warning("⚠️ GYG request failed (%s); retrying in %.1fs", e, delay)
+            time.sleep(delay)
+            continue
+
+        retry = response.status_code in RETRY_STATUSES and attempt < MAX_RETRIES
+        _count(response, retried=retry)
+        if retry:
+            delay = _retry_delay(attempt, response.headers.get("Retry-After"))
+            logger.warning("⚠️ GYG API returned %s; retrying in %.1fs", response.status_code, delay)
+            time.sleep(delay)
+            continue
+        return response
+
+
+async def _async_get(url, params=None, headers=None):
+    """Async counterpart of _get()."""
+    client = _get_async_client()
+    for attempt in range(MAX_RETRIES + 1):
+        if _throttle is not None:
+            await asyncio.to_thread(_throttle)
+        try:
+            response = await client.get(url, params=params, headers=headers)
+        except httpx.TransportError as e:
+            _count(retried=attempt < MAX_RETRIES)
+            if attempt >= MAX_RETRIES:
+                provider_error("getyourguide", e)
+                raise
+            delay = _retry_delay(attempt)
+            logger.warning("⚠️ GYG request failed (%s); retrying in %.1fs", e, delay)
+            await asyncio.sleep(delay)
+            continue
+
+        retry = response.status_code in RETRY_STATUSES and attempt < MAX_RETRIES
+        _count(response, retried=retry)
+        if retry:
+            delay = _retry_delay(attempt, response.headers.get("Retry-After"))
+            logger.warning("⚠️ GYG API returned %s; retrying in %.1fs", response.status_code, delay)
+            await asyncio.sleep(delay)
+            continue
+        return response
+
+
+# --- Response cache ---
+#
+# Entries are stored with the ETag the API sent. A fresh entry is served without
+# any request; a stale one is revalidated with If-None-Match, so an unchanged
+# resource costs a 304 instead of a full response. If the API is unreachable,
+# the stale entry is served rather than failing the agent request.
+
+_cache_local = threading.local()
+
+
+def _cache_conn() -> sqlite3.Connection:
+    """Per-thread connection to the response cache."""
+    conn = getattr(_cache_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(CACHE_PATH, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, body TEXT NOT NULL, etag TEXT, fetched_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS responses_fetched_at ON responses (fetched_at)")
+        _cache_local.conn = conn
+    return conn
+
+
+def _cache_get(key):
+    """Returns (data, etag, fetched_at) for a cached response, or None."""
+    try:
+        row = _cache_conn().execute(
+            "SELECT body, etag, fetched_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+    except sqlite3.Error as e:
+        logger.warning("⚠️ GYG cache read failed: %s", e)
+        return None
+    if row is None:
+        return None
+    return json.loads(row[0]), row[1], row[2]
+
+
+_cache_writes = 0
+
+
+def _cache_put(key, data, etag=None):
+    global _cache_writes
+    try:
+        conn = _cache_conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, body, etag, fetched_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(data), etag, time.time()),
+            )
+    except sqlite3.Error as e:
+        logger.warning("⚠️ GYG cache write failed: %s", e)
+        return
+    with _stats_lock:
+        _cache_writes += 1
+        due = CACHE_PRUNE_EVERY > 0 and _cache_writes % CACHE_PRUNE_EVERY == 0
+    if due:
+        prune_cache()
+
+
+def _cache_touch(key):
+    """Marks a revalidated (304) entry as fresh again."""
+    try:
+        conn = _cache_conn()
+        with conn:
+            conn.execute("UPDATE responses SET fetched_at = ? WHERE key = ?", (time.time(), key))
+    except sqlite3.Error as e:
+        logger.warning("⚠️ GYG cache write failed: %s", e)
+
+
+def prune_cache(max_age: float = None, max_rows: int = None) -> int:
+    """
+    Evicts entries older than max_age seconds, then the oldest beyond max_rows
+    (defaults: GYG_CACHE_MAX_AGE / GYG_CACHE_MAX_ROWS). Returns the rows removed.
+    """
+    max_age = CACHE_MAX_AGE if max_age is None else max_age
+    max_rows = CACHE_MAX_ROWS if max_rows is None else max_rows
+    removed = 0
+    try:
+        conn = _cache_conn()
+        with conn:
+            if max_age > 0:
+                removed += conn.execute(
+                    "DELETE FROM responses WHERE fetched_at < ?", (time.time() - max_age,)).rowcount
+            if max_rows > 0:
+                removed += conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY fetched_at DESC LIMIT -1 OFFSET ?)", (max_rows,)).rowcount
+    except sqlite3.Error as e:
+        logger.warning("⚠️ GYG cache prune failed: %s", e)
+    if removed:
+        logger.info("GYG cache pruned %d entries", removed)
+    return removed
+
+
+def clear_cache():
+    """Drops every cached GYG response."""
+    conn = _cache_conn()
+    with conn:
+        conn.execute("DELETE FROM responses")
+
+
+def _search_cache_key(query, limit, offset=0):
+    params = _search_params(" ".join(str(query).lower().split()), limit, offset)
+    return "search:" + json.dumps(params, sort_keys=True)
+
+
+def _detail_cache_key(tour_id):
+    return f"tour:{tour_id}"
+
+
+def _conditional_headers(cached):
+    if cached and cached[1]:
+        return {"If-None-Match": cached[1]}
+    return None
+
+
+def _handle_response(key, cached, response):
+    """Stores/revalidates a response. Returns the JSON body, or None on an API error."""
+    if response.status_code == 304 and cached:
+        _cache_touch(key)
+        cache_lookup("gyg", "revalidated")
+        return cached[0]
+    if response.status_code == 200:
+        data = response.json()
+        _cache_put(key, data, response.headers.get("ETag"))
+        cache_lookup("gyg", "miss")
+        return data
+    logger.error("❌ API Error %s: %s", response.status_code, response.text)
+    provider_error("getyourguide")
+    if cached:
+        logger.warning("⚠️ Serving stale cached GYG response")
+        cache_lookup("gyg", "stale")
+        return cached[0]
+    cache_lookup("gyg", "miss")
+    return None
+
+
+def _cached_get_json(key, ttl, url, params=None):
+    """GET a JSON resource through the response cache."""
+    cached = _cache_get(key)
+    if cached and time.time() - cached[2] < ttl:
+        cache_lookup("gyg", "hit")
+        return cached[0]
+    try:
+        response = _get(url, params=params, headers=_conditional_headers(cached))
+    except Exception:
+        if cached:
+            logger.warning("⚠️ GYG API unreachable; serving stale cached response")
+            cache_lookup("gyg", "stale")
+            return cached[0]
+        cache_lookup("gyg", "miss")
+        raise
+    return _handle_response(key, cached, response)
+
+
+async def _async_cached_get_json(key, ttl, url, params=None):
+    """Async counterpart of _cached_get_json(); the SQLite work runs off the event loop."""
+    cached = await asyncio.to_thread(_cache_get, key)
+    if cached and time.time() - cached[2] < ttl:
+        cache_lookup("gyg", "hit")
+        return cached[0]
+    try:
+        response = await _async_get(url, params=params, headers=_conditional_headers(cached))
+    except Exception:
+        if cached:
+            logger.warning("⚠️ GYG API unreachable; serving stale cached response")
+            cache_lookup("gyg", "stale")
+            return cached[0]
+        cache_lookup("gyg", "miss")
+        raise
+    return await asyncio.to_thread(_handle_response, key, cached, response)
+
+
+def _normalize_search_results(data):
+    """Normalizes a search response so every result carries a tour_id for tool_calls.py."""
+    # Assuming the API returns a list under a 'tours' or 'data' key, or is a list itself.
+    raw_results = data.get("tours", []) if isinstance(data, dict) else data
+
+    # Normalize results to ensure tour_id exists for tool_calls.py
+    normalized_results = []
+    if isinstance(raw_results, list):
+        for item in raw_results:
+            # Try to find ID
+            t_id = item.get("tour_id") or item.get("id") or item.get("activityId")
+            if t_id:
+                item["tour_id"] = t_id
+                normalized_results.append(item)
+
+    return normalized_results
+
+
+def _search_params(query, limit, offset=0):
+    params = {
+        "query": query,
+        "limit": limit,
+        "currency": "USD",
+        "lang": "en"
+    }
+    if offset:
+        params["offset"] = offset
+    return params
+
+def search_tours(query, limit=5, offset=0):
     """
     Searches for tours/activities using the GetYourGuide API.
     Attempts to use the live API if a key is present; otherwise falls back to mock data.
+    Use `offset` to page through more than `limit` results.
     """
-    print(f"Searching for: {query}")
+    logger.debug("Searching for: %s", query)
     
     # Check if API key is configured
     if API_KEY == "your_api_key_here" or not API_KEY:
-        print("⚠️ GYG_API_KEY not set. Using mock data.")
-        return _mock_search_tours(query)
+        logger.warning("⚠️ GYG_API_KEY not set. Using mock data.")
+        return _mock_search_tours(query) if not offset else []
 
     try:
         # Construct the API URL
         url = f"{BASE_URL}/tours"
-        params = {
-            "query": query,
-            "limit": limit,
-            "currency": "USD", 
-            "lang": "en"
-        }
-        
-        response = requests.get(url, headers=get_headers(), params=params, timeout=10)
+        data = _cached_get_json(
+            _search_cache_key(query, limit, offset), SEARCH_TTL, url, params=_search_params(query, limit, offset)
+        )
         
-        if response.status_code == 200:
-            data = response.json()
-            # Assuming the API returns a list under a 'tours' or 'data' key, or is a list itself.
-            raw_results = data.get("tours", []) if isinstance(data, dict) else data
-            
-            # Normalize results to ensure tour_id exists for tool_calls.py
-            normalized_results = []
-            if isinstance(raw_results, list):
-                for item in raw_results:
-                    # Try to find ID
-                    t_id = item.get("tour_id") or item.get("id") or item.get("activityId")
-                    if t_id:
-                        item["tour_id"] = t_id
-                        normalized_results.append(item)
-            
-            return normalized_results
+        if data is not None:
+            return _normalize_search_results(data)
         else:
-            print(f"❌ API Error {response.status_code}: {response.text}")
             # Fallback to empty or mock? Return empty to signal failure to find real data
             return []
             
     except Exception as e:
-        print(f"❌ Request failed: {e}")
+        logger.error("❌ Request failed: %s", e)
+        return []
+
+async def async_search_tours(query, limit=5, offset=0):
+    """
+    Async variant of search_tours, for fetching GYG data concurrently with other stages.
+    """
+    logger.debug("Searching for: %s", query)
+
+    if API_KEY == "your_api_key_here" or not API_KEY:
+        logger.warning("⚠️ GYG_API_KEY not set. Using mock data.")
+        return _mock_search_tours(query) if not offset else []
+    if httpx is None:
+        return await asyncio.to_thread(search_tours, query, limit, offset)
+
+    try:
+        data = await _async_cached_get_json(
+            _search_cache_key(query, limit, offset), SEARCH_TTL, f"{BASE_URL}/tours",
+            params=_search_params(query, limit, offset)
+        )
+        return _normalize_search_results(data) if data is not None else []
+    except Exception as e:
+        logger.error("❌ Request failed: %s", e)
         return []
 
 def _mock_search_tours(query):
@@ -87,7 +494,7 @@ def get_tour_details(tour_id):
     """
     Fetches detailed information for a specific tour from the API.
     """
-    print(f"Fetching details for tour ID: {tour_id}")
+    logger.debug("Fetching details for tour ID: %s", tour_id)
 
     # Check if API key is configured
     if API_KEY == "your_api_key_here" or not API_KEY:
@@ -95,17 +502,33 @@ def get_tour_details(tour_id):
         
     try:
         url = f"{BASE_URL}/tours/{tour_id}"
-        response = requests.get(url, headers=get_headers(), timeout=10)
+        gyg_raw_data = _cached_get_json(_detail_cache_key(tour_id), DETAIL_TTL, url)
         
-        if response.status_code == 200:
-            gyg_raw_data = response.json()
+        if gyg_raw_data is not None:
             return _map_to_schema(gyg_raw_data)
         else:
-            print(f"❌ API Error {response.status_code}: {response.text}")
             return {}
 
     except Exception as e:
-        print(f"❌ Request failed: {e}")
+        logger.error("❌ Request failed: %s", e)
+        return {}
+
+async def async_get_tour_details(tour_id):
+    """
+    Async variant of get_tour_details.
+    """
+    logger.debug("Fetching details for tour ID: %s", tour_id)
+
+    if API_KEY == "your_api_key_here" or not API_KEY:
+        return _mock_get_tour_details(tour_id)
+    if httpx is None:
+        return await asyncio.to_thread(get_tour_details, tour_id)
+
+    try:
+        gyg_raw_data = await _async_cached_get_json(_detail_cache_key(tour_id), DETAIL_TTL, f"{BASE_URL}/tours/{tour_id}")
+        return _map_to_schema(gyg_raw_data) if gyg_raw_data is not None else {}
+    except Exception as e:
+        logger.error("❌ Request failed: %s", e)
         return {}
 
 def _mock_get_tour_details(tour_id):
@@ -154,32 +577,38 @@ def _map_to_schema(gyg_raw_data):
         "additional Information": gyg_raw_data.get("know_before_you_go", [])
     }
 
-def save_to_dataset(data, filename="gyg_output.json"):
-    """
-    Saves the formatted data to a JSON file in the dataset_json folder.
-    """
-    output_dir = "dataset_json"
-    os.makedirs(output_dir, exist_ok=True)
-    filepath = os.path.join(output_dir, filename)
-    
-    full_structure = {
+def to_dataset_record(data, tour_id="mock_id"):
+    """Wraps mapped tour data in the same structure the Firecrawl scraper writes."""
+    return {
         "success": True,
         "data": {
             "markdown": f"# {data.get('Attraction_name', 'Unknown')}\n\n{data.get('Attraction_name', 'Unknown')}...",
             "metadata": {
                 "source": "GetYourGuide API",
-                "id": "mock_id" # Should ideally be the real ID
+                "id": str(tour_id)
             },
             "json": data
         }
     }
+
+def save_to_dataset(data, filename="gyg_output.json", tour_id="mock_id"):
+    """
+    Saves the formatted data to a JSON file in the dataset_json folder.
+    """
+    output_dir = "dataset_json"
+    os.makedirs(output_dir, exist_ok=True)
+    filepath = os.path.join(output_dir, filename)
+    
+    full_structure = to_dataset_record(data, tour_id)
     
     with open(filepath, "w", encoding="utf-8") as f:
         json.dump(full_structure, f, indent=2)
-    print(f"Saved to {filepath}")
+    logger.info("Saved to %s", filepath)
 
 # Example Usage
 if __name__ == "__main__":
+    from logs import setup_logging
+    setup_logging()
     # 1. Search for tours
     results = search_tours("Venice")
     
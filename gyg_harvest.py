@@ -0,0 +1,205 @@
+"""
+Bulk GetYourGuide harvester.
+
+Pages through tour search results for a list of destinations, fetches tour
+details concurrently under a token-bucket rate limit, maps them with
+gyg_fetcher._map_to_schema and streams the records either straight into the
+ingestion pipeline (rag_upload.ingest_records) or into a compact JSONL shard,
+instead of writing one pretty-printed file per tour.
+
+    python gyg_harvest.py Venice Rome Paris --pages 4 --page-size 50 --rate 5 --workers 8
+    python gyg_harvest.py --destinations-file cities.txt --ingest
+
+Shard lines have the form {"filename": ..., "file_path": ..., "record": ...},
+where "record" is the Firecrawl-style structure the rest of the pipeline reads.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import gyg_fetcher
+from gyg_fetcher import BASE_URL, get_tour_details, search_tours, to_dataset_record
+
+HARVEST_RATE = float(os.getenv("GYG_HARVEST_RATE", "5"))  # requests per second
+HARVEST_BURST = int(os.getenv("GYG_HARVEST_BURST", "10"))
+HARVEST_WORKERS = int(os.getenv("GYG_HARVEST_WORKERS", "8"))
+SHARD_DIR = os.getenv("TRIP_SHARD_DIR", "dataset_shards")
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, up to `capacity` banked."""
+
+    def __init__(self, rate: float, capacity: int = None):
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class HarvestStats:
+    """Throughput and rate-limit counters for one harvest run."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.tours = 0
+        self.failed = 0
+        self.pages = 0
+        self._requests_before = dict(gyg_fetcher.request_stats)
+
+    def summary(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        requests = {key: gyg_fetcher.request_stats[key] - self._requests_before.get(key, 0)
+                    for key in gyg_fetcher.request_stats}
+        rate = self.tours / elapsed if elapsed > 0 else 0.0
+        return (f"{self.tours} tours ({self.failed} failed) from {self.pages} search pages in {elapsed:.1f}s "
+                f"= {rate:.1f} tours/sec | HTTP requests: {requests['requests']}, "
+                f"429 responses: {requests['rate_limited']}, retries: {requests['retries']}")
+
+
+def iter_tour_ids(destinations, pages: int, page_size: int, stats: HarvestStats):
+    """Yields unique (destination, tour_id) pairs, paging each destination until results run out."""
+    seen = set()
+    for destination in destinations:
+        for page in range(pages):
+            results = search_tours(destination, limit=page_size, offset=page * page_size)
+            stats.pages += 1
+            new_ids = [r["tour_id"] for r in results if r.get("tour_id") not in seen]
+            for tour_id in new_ids:
+                seen.add(tour_id)
+                yield destination, tour_id
+            if len(results) < page_size or not new_ids:
+                break
+
+
+def _fetch_record(destination: str, tour_id):
+    data = get_tour_details(tour_id)
+    if not data or not data.get("Attraction_name"):
+        return None
+    data.setdefault("Destination", destination)
+    return f"gyg_{tour_id}.json", f"{BASE_URL}/tours/{tour_id}", to_dataset_record(data, tour_id)
+
+
+def harvest(destinations, pages: int = 3, page_size: int = 50, rate: float = HARVEST_RATE,
+            burst: int = HARVEST_BURST, workers: int = HARVEST_WORKERS, stats: HarvestStats = None):
+    """
+    Streams (filename, file_path, record) tuples for every tour found.
+
+    Search paging and detail fetches share one token bucket, taken by
+    gyg_fetcher before every request it actually sends (retries included, cache
+    hits excluded), so `rate` bounds the total request rate against the
+    partner API. At most 2 * workers detail
+    fetches are in flight, so records are yielded as they arrive rather than
+    after the whole harvest.
+    """
+    stats = stats or HarvestStats()
+    bucket = TokenBucket(rate, burst)
+    with gyg_fetcher.throttle(bucket.acquire), ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+
+        def drain_one():
+            record = in_flight.popleft().result()
+            if record is None:
+                stats.failed += 1
+                return None
+            stats.tours += 1
+            return record
+
+        for destination, tour_id in iter_tour_ids(destinations, pages, page_size, stats):
+            in_flight.append(pool.submit(_fetch_record, destination, tour_id))
+            if len(in_flight) >= workers * 2:
+                record = drain_one()
+                if record:
+                    yield record
+        while in_flight:
+            record = drain_one()
+            if record:
+                yield record
+
+
+def write_shard(records, path: str) -> int:
+    """Appends records to a JSONL shard, one compact line per tour. Returns the count written."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    count = 0
+    with open(path, "a", encoding="utf-8") as f:
+        for filename, file_path, record in records:
+            f.write(json.dumps({"filename": filename, "file_path": file_path, "record": record},
+                               ensure_ascii=False, separators=(",", ":")) + "\n")
+            count += 1
+    return count
+
+
+def iter_dataset_records(dataset_folder: str = "dataset_json"):
+    """Yields (filename, file_path, loaded_data) for the scraped dataset files."""
+    if not os.path.isdir(dataset_folder):
+        return
+    for filename in sorted(os.listdir(dataset_folder)):
+        if filename.endswith(".json"):
+            file_path = os.path.join(dataset_folder, filename)
+            try:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    yield filename, file_path, json.load(f)
+            except Exception as e:
+                print(f"Error loading {filename}: {e}")
+
+
+def main():
+    from logs import setup_logging
+
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Harvest GetYourGuide tours in bulk.")
+    parser.add_argument("destinations", nargs="*", help="Destinations to search for")
+    parser.add_argument("--destinations-file", help="File with one destination per line")
+    parser.add_argument("--pages", type=int, default=3, help="Max search pages per destination")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=HARVEST_RATE, help="Max API requests per second")
+    parser.add_argument("--burst", type=int, default=HARVEST_BURST)
+    parser.add_argument("--workers", type=int, default=HARVEST_WORKERS, help="Concurrent detail fetches")
+    parser.add_argument("--shard", help="JSONL shard to append to (default: dataset_shards/gyg-<time>.jsonl)")
+    parser.add_argument("--ingest", action="store_true",
+                        help="Re-index dataset_json plus the harvested tours instead of writing a shard")
+    args = parser.parse_args()
+
+    destinations = list(args.destinations)
+    if args.destinations_file:
+        with open(args.destinations_file, "r", encoding="utf-8") as f:
+            destinations.extend(line.strip() for line in f if line.strip())
+    if not destinations:
+        parser.error("no destinations given")
+
+    stats = HarvestStats()
+    records = harvest(destinations, args.pages, args.page_size, args.rate, args.burst, args.workers, stats)
+
+    if args.ingest:
+        from rag_upload import ingest_records
+        # Ingestion builds a complete new index version, so the scraped dataset goes in alongside the tours
+        print(ingest_records(itertools.chain(iter_dataset_records(), records)))
+    else:
+        path = args.shard or os.path.join(SHARD_DIR, f"gyg-{int(time.time())}.jsonl")
+        write_shard(records, path)
+        print(f"Wrote shard {path}")
+
+    print(stats.summary())
+
+
+if __name__ == "__main__":
+    main()
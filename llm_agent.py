@@ -1,15 +1,24 @@
 import json
+import logging
 import os
 import re
 from dotenv import load_dotenv
 from groq import Groq
-from tool_calls import search_rag, duckduckgo_search
+from tool_calls import search_rag, duckduckgo_search, hydrate_document
+from timing import span, timed
+from metrics import llm_tokens, provider_error, rag_lookup
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 client = Groq(api_key=GROQ_API_KEY) if GROQ_API_KEY else None
 
+# Minimum similarity for a RAG hit to be used; below it the agents fall back to the web.
+# Tune with `python -m benchmarks.rag_eval`.
+RAG_SCORE_THRESHOLD = float(os.getenv("RAG_SCORE_THRESHOLD", "0.5"))
+
 # Optional Ollama for local testing
 try:
     import ollama
@@ -21,33 +30,42 @@ def call_llm(system_prompt: str, user_content: str, temperature: float = 0) -> s
     """Helper to call either Groq or Ollama."""
     if client:
         try:
-            completion = client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_content}
-                ],
-                temperature=temperature
-            )
+            with span("llm.groq"):
+                completion = client.chat.completions.create(
+                    model="llama-3.3-70b-versatile",
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_content}
+                    ],
+                    temperature=temperature
+                )
+            usage = getattr(completion, "usage", None)
+            if usage is not None:
+                llm_tokens("groq", getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None))
             return completion.choices[0].message.content
         except Exception as e:
-            print(f"❌ Groq Error: {e}")
+            provider_error("groq", e)
+            logger.warning("❌ Groq Error: %s", e)
     
     if HAS_OLLAMA:
         try:
-            response = ollama.chat(
-                model="qwen3:0.6b",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_content}
-                ]
-            )
+            with span("llm.ollama"):
+                response = ollama.chat(
+                    model="qwen3:0.6b",
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_content}
+                    ]
+                )
             # Handle both object and dict response types
             if hasattr(response, 'message'):
+                llm_tokens("ollama", getattr(response, "prompt_eval_count", None), getattr(response, "eval_count", None))
                 return response.message.content
+            llm_tokens("ollama", response.get("prompt_eval_count"), response.get("eval_count"))
             return response['message']['content']
         except Exception as e:
-            print(f"❌ Ollama Error: {e}")
+            provider_error("ollama", e)
+            logger.error("❌ Ollama Error: %s", e)
             
     return "No LLM provider (Groq/Ollama) available."
 
@@ -76,32 +94,33 @@ def is_relevant(query: str, attraction_name: str) -> bool:
         
     return False
 
+@timed("agent.TravelResearchAgent")
 def TravelResearchAgent(query: str, additional_info: str = None) -> str:
     """
     Research agent that gathers information from RAG and Web to answer travel queries.
     It can also take optional pre-gathered additional information to synthesize into the final response.
     """
 
-    print(f"🔍 [TravelResearchAgent] Processing query: {query}")
+    logger.info("🔍 [TravelResearchAgent] Processing query: %s", query)
     
     # 1. Search RAG
     rag_info = ""
     try:
-        print("🔍 Searching RAG...")
+        logger.debug("🔍 Searching RAG...")
         rag_results = search_rag(query, k=3)
         
         # Filter results by score AND relevance
-        RAG_SCORE_THRESHOLD = 0.5
         valid_rag_results = []
         
-        for doc, score in rag_results:
-            meta = getattr(doc, 'metadata', {})
-            attraction_name = meta.get("Attraction_name", "")
-            
-            if score >= RAG_SCORE_THRESHOLD and is_relevant(query, attraction_name):
-                valid_rag_results.append((doc, score))
-            elif score >= RAG_SCORE_THRESHOLD:
-                print(f"⏩ Rejecting '{attraction_name}' - Score OK ({score:.2f}) but not relevant to query.")
+        with span("relevance_filter"):
+            for doc, score in rag_results:
+                meta = getattr(doc, 'metadata', {})
+                attraction_name = meta.get("Attraction_name", "")
+                
+                if score >= RAG_SCORE_THRESHOLD and is_relevant(query, attraction_name):
+                    valid_rag_results.append((doc, score))
+                elif score >= RAG_SCORE_THRESHOLD:
+                    logger.debug("⏩ Rejecting '%s' - Score OK (%.2f) but not relevant to query.", attraction_name, score)
         
         if valid_rag_results:
             rag_texts = []
@@ -110,24 +129,25 @@ def TravelResearchAgent(query: str, additional_info: str = None) -> str:
                 rag_texts.append(f"--- RAG Result (Score: {score:.2f}) ---\n{content}")
             
             rag_info = "\n\n".join(rag_texts)
-            print("RAG info:", rag_info)
-            print(f"✅ Found {len(valid_rag_results)} relevant RAG results (Score >= {RAG_SCORE_THRESHOLD}).")
+            logger.debug("RAG info: %s", rag_info)
+            logger.info("✅ Found %d relevant RAG results (Score >= %s).", len(valid_rag_results), RAG_SCORE_THRESHOLD)
         else:
             if rag_results:
-                print(f"⚠️ RAG results found but all below threshold {RAG_SCORE_THRESHOLD} (Max score: {max(r[1] for r in rag_results):.2f}).")
+                logger.info("⚠️ RAG results found but all below threshold %s (Max score: %.2f).", RAG_SCORE_THRESHOLD, max(r[1] for r in rag_results))
             else:
-                print("⚠️ No RAG results found.")
+                logger.info("⚠️ No RAG results found.")
     except Exception as e:
-        print(f"❌ RAG Search failed: {e}")
+        logger.error("❌ RAG Search failed: %s", e)
 
     # 3. Gather Additional Information
     # additional_data = gather_additional_information(query, valid_rag_results if 'valid_rag_results' in locals() else [])
 
     # 3. Search Web (Fallback if RAG is empty)
     web_info = ""
+    rag_lookup("TravelResearchAgent", used_web=not rag_info)
     if not rag_info:
         try:
-            print("🔍 RAG results missing. Searching Web...")
+            logger.info("🔍 RAG results missing. Searching Web...")
             web_results = duckduckgo_search(query, max_results=3)
             if web_results and web_results.get("status") == "success":
                 results = web_results.get("results", [])
@@ -142,16 +162,16 @@ def TravelResearchAgent(query: str, additional_info: str = None) -> str:
                     web_texts.append(results)
                 
                 web_info = "\n\n".join(web_texts)
-                print("✅ Web search completed.")
+                logger.debug("✅ Web search completed.")
             else:
-                print("⚠️ Web search returned no results.")
+                logger.warning("⚠️ Web search returned no results.")
         except Exception as e:
-            print(f"❌ Web Search failed: {e}")
+            logger.error("❌ Web Search failed: %s", e)
     else:
-        print("ℹ️ RAG results found. Skipping Web Search.")
+        logger.debug("ℹ️ RAG results found. Skipping Web Search.")
 
     # 3. Synthesize
-    print("📝 Synthesizing response...")
+    logger.debug("📝 Synthesizing response...")
     
     system_prompt = (
         "You are an expert travel assistant agent whose job is to provide accurate, comprehensive answers "
@@ -210,23 +230,23 @@ def gather_additional_information(query: str, rag_results: list) -> str:
     # 1. Try to get from RAG metadata
     if rag_results:
         # Filter RAG results by score and relevance BEFORE processing
-        RAG_SCORE_THRESHOLD = 0.5
         filtered_results = []
-        for doc, score in rag_results:
-            meta = getattr(doc, 'metadata', {})
-            attr_name = meta.get("Attraction_name", "")
-            if score >= RAG_SCORE_THRESHOLD and is_relevant(query, attr_name):
-                filtered_results.append((doc, score))
-            elif score >= RAG_SCORE_THRESHOLD:
-                print(f"⏩ [GatherInfo] Skipping '{attr_name}' as it doesn't match query.")
+        with span("relevance_filter"):
+            for doc, score in rag_results:
+                meta = getattr(doc, 'metadata', {})
+                attr_name = meta.get("Attraction_name", "")
+                if score >= RAG_SCORE_THRESHOLD and is_relevant(query, attr_name):
+                    filtered_results.append((doc, score))
+                elif score >= RAG_SCORE_THRESHOLD:
+                    logger.debug("⏩ [GatherInfo] Skipping '%s' as it doesn't match query.", attr_name)
 
         if filtered_results:
-            print("🔍 Checking RAG for 'additional Information'...")
+            logger.debug("🔍 Checking RAG for 'additional Information'...")
             # Use the most relevant (top) attraction as the anchor
             first_doc, _ = filtered_results[0]
             primary_attraction = getattr(first_doc, 'metadata', {}).get("Attraction_name")
             if primary_attraction:
-                print(f"🎯 Target Attraction: {primary_attraction}")
+                logger.debug("🎯 Target Attraction: %s", primary_attraction)
 
             for doc, score in filtered_results:
                 # Check metadata
@@ -237,8 +257,12 @@ def gather_additional_information(query: str, rag_results: list) -> str:
                 if primary_attraction and current_attraction and current_attraction != primary_attraction:
                     continue
 
-                # In rag_upload.py, it's stored as "additional Information"
-            info_data = meta.get("additional Information")
+                # In rag_upload.py, it's stored as "additional Information" in the full record
+            info_data = hydrate_document(doc).get("json", {}).get("additional Information")
+            if not info_data:
+                # No side store available: the field is also part of the embedded summary text
+                match = re.search(r"^additional Information: (.+)$", getattr(doc, 'page_content', ''), re.MULTILINE)
+                info_data = match.group(1) if match else None
             
             if info_data:
                 # It might be in JSON format or raw string
@@ -261,10 +285,11 @@ def gather_additional_information(query: str, rag_results: list) -> str:
                     additional_info.add(str(info_data))
 
     # 2. If no additional info found in RAG, search specifically for it (Fallback)
+    rag_lookup("AdditionalInfoAgent", used_web=not additional_info)
     if not additional_info:
         # Only search if we haven't found it in RAG
         try:
-            print("🔍 'additional Information' specific field not found in RAG. Searching Web specifically for it...")
+            logger.info("🔍 'additional Information' specific field not found in RAG. Searching Web specifically for it...")
             web_res = duckduckgo_search(f"{query} additional tourist information details", max_results=2)
             if web_res and web_res.get("status") == "success":
                  results = web_res.get("results", [])
@@ -277,20 +302,22 @@ def gather_additional_information(query: str, rag_results: list) -> str:
                  elif isinstance(results, str):
                      additional_info.add(f"Web: {results}")
             else:
-                print("⚠️ Additional Info Web search returned no results.")
+                logger.warning("⚠️ Additional Info Web search returned no results.")
         except Exception as e:
-            print(f"❌ Additional Info Web Search failed: {e}")
+            logger.error("❌ Additional Info Web Search failed: %s", e)
     else:
-        print(f"✅ Found {len(additional_info)} unique 'additional Information' items in RAG.")
-        print(list(additional_info))
+        logger.info("✅ Found %d unique 'additional Information' items in RAG.", len(additional_info))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("additional Information items: %s", sorted(additional_info))
 
     return "\n".join([f"- {item}" for item in sorted(list(additional_info))])
 
+@timed("agent.AdditionalInfoAgent")
 def AdditionalInfoAgent(query: str) -> str:
     """
     Standalone agent that gathers and synthesizes additional info using RAG/Web and LLM.
     """
-    print(f"🔍 [AdditionalInfoAgent] Processing query: {query}")
+    logger.info("🔍 [AdditionalInfoAgent] Processing query: %s", query)
     try:
         # 1. Gather raw data from RAG/Web
         rag_results = search_rag(query, k=3)
@@ -300,7 +327,7 @@ def AdditionalInfoAgent(query: str) -> str:
             return "No specific additional information found."
 
         # 2. Synthesize using LLM
-        print("📝 [AdditionalInfoAgent] Synthesizing metadata...")
+        logger.debug("📝 [AdditionalInfoAgent] Synthesizing metadata...")
         system_prompt = (
             "You are a 'Travel Metadata Expert'. Your job is to take raw, technical, or fragmented "
             "information about a tourist attraction and turn it into a concise, professional, and "
@@ -325,7 +352,7 @@ def OrchestrateAgent(query: str) -> str:
     """
     Orchestrator agent that combines TravelResearchAgent and AdditionalInfoAgent.
     """
-    print(f"🤖 [OrchestrateAgent] Coordinating agents for query: {query}")
+    logger.info("🤖 [OrchestrateAgent] Coordinating agents for query: %s", query)
     
     # 1. Get specific additional details first (The Specialist)
     supplementary_info = AdditionalInfoAgent(query)
@@ -341,6 +368,8 @@ def OrchestrateAgent(query: str) -> str:
     return final_response
 
 if __name__ == "__main__":
+    from logs import setup_logging
+    setup_logging()
     # Simple test
     q = "tell me about madame tussauds"
     print(OrchestrateAgent(q))
@@ -1,14 +1,21 @@
+import contextvars
 import json
+import logging
 import re
+import httpx
 import ollama
 import importlib.util
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
 
 # Handle imports - works whether running from cookd_agent/ or parent directory
 try:
-    from tool_calls import search_rag, duckduckgo_search
+    from tool_calls import search_rag, search_sections, duckduckgo_search, hydrate_document
 except ImportError:
-    from tool_calls import search_rag, duckduckgo_search
+    from tool_calls import search_rag, search_sections, duckduckgo_search, hydrate_document
+from metrics import cache_lookup, llm_tokens
+import profiling
 
 
 # --- Tool mapping for function calls ---
@@ -19,6 +26,235 @@ available_tools = {
 
 import traceback
 
+logger = logging.getLogger(__name__)
+
+# Tool calls from one model turn run concurrently, up to this many at a time
+TOOL_WORKERS = int(os.getenv("AGENT_TOOL_WORKERS", "4"))
+
+# Budgets for the AdditionalInfoAgent tool loop. When one runs out, the agent
+# stops calling tools and synthesizes an answer from what it has gathered.
+MAX_TURNS = int(os.getenv("AGENT_MAX_TURNS", "5"))
+MAX_TOOL_CALLS = int(os.getenv("AGENT_MAX_TOOL_CALLS", "8"))
+MAX_PROMPT_TOKENS = int(os.getenv("AGENT_MAX_PROMPT_TOKENS", "32000"))
+DEADLINE_SECONDS = float(os.getenv("AGENT_DEADLINE_SECONDS", "90"))
+# Time allowed for the final tool-less answer once a budget has run out
+SYNTHESIS_SECONDS = float(os.getenv("AGENT_SYNTHESIS_SECONDS", "30"))
+
+# Once the conversation is estimated above this many tokens, tool outputs the
+# model has already read are replaced by the facts extracted from them
+COMPACT_THRESHOLD_TOKENS = int(os.getenv("AGENT_COMPACT_TOKENS", "4000"))
+COMPACT_FACTS = 5
+COMPACT_FACT_CHARS = 240
+
+
+def _format_tool_result(result) -> str:
+    """Serializes a tool result for a "tool" message."""
+    if isinstance(result, dict):
+        return json.dumps(result, indent=2)
+    if isinstance(result, list):
+        # Handle list of tuples (doc, score) from search_rag
+        if len(result) > 0 and isinstance(result[0], tuple):
+            formatted_results = []
+            for doc, score in result:
+                formatted_results.append({
+                    "content": doc.page_content if hasattr(doc, 'page_content') else str(doc),
+                    "score": float(score) if score else 0.0,
+                    "metadata": doc.metadata if hasattr(doc, 'metadata') else {}
+                })
+            return json.dumps(formatted_results, indent=2)
+        return json.dumps(result, indent=2, default=str)
+    return str(result)
+
+
+def _execute_tool(fn_name: str, fn_args: dict) -> tuple:
+    """
+    Runs one tool call.
+
+    Returns:
+        tuple: (result_str, ok, seconds)
+    """
+    started = time.perf_counter()
+    if fn_name not in available_tools:
+        error_msg = f"Unknown tool: {fn_name}"
+        print(f"❌ [AdditionalInfoAgent] {error_msg}")
+        return error_msg, False, 0.0
+    try:
+        result = available_tools[fn_name](**fn_args)
+        print(f"📦 [AdditionalInfoAgent] {fn_name} returned results")
+        return _format_tool_result(result), True, time.perf_counter() - started
+    except Exception as e:
+        error_msg = f"Error calling {fn_name}: {str(e)}"
+        print(f"❌ [AdditionalInfoAgent] {error_msg}")
+        return error_msg, False, time.perf_counter() - started
+
+
+def _run_tool_calls(calls: list, tool_cache: dict, trace: dict = None, deadline: float = None) -> list:
+    """
+    Runs one turn's tool calls concurrently and returns their results in call order.
+
+    Successful results are memoized in tool_cache by (tool, args), so a call the
+    model repeats later in the conversation is answered without re-running it.
+    A call still running at `deadline` (time.monotonic()) is reported as timed out.
+
+    Each turn gets its own short-lived pool that is shut down without waiting,
+    so a timed-out call keeps only its own thread busy until it returns; it
+    never holds a worker that a later turn or another request needs.
+    """
+    keys = [(fn_name, json.dumps(fn_args, sort_keys=True, default=str)) for fn_name, fn_args in calls]
+    futures = {}
+    pool = ThreadPoolExecutor(max_workers=TOOL_WORKERS, thread_name_prefix="agent-tool")
+    try:
+        for key, (fn_name, fn_args) in zip(keys, calls):
+            if key not in tool_cache and key not in futures:
+                # The request's context, so the call's timing spans and profile count for the request
+                futures[key] = pool.submit(contextvars.copy_context().run, profiling.call_in_worker,
+                                           _execute_tool, fn_name, fn_args)
+        return _collect_tool_results(keys, calls, futures, tool_cache, trace, deadline)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _collect_tool_results(keys: list, calls: list, futures: dict, tool_cache: dict, trace: dict,
+                          deadline: float) -> list:
+    results = []
+    for key, (fn_name, fn_args) in zip(keys, calls):
+        cached = key in tool_cache
+        cache_lookup("agent_tools", "hit" if cached else "miss")
+        if cached:
+            result_str, ok, seconds = tool_cache[key], True, 0.0
+        else:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                result_str, ok, seconds = futures[key].result(timeout=timeout)
+            except FuturesTimeout:
+                logger.warning("⏱️ [AdditionalInfoAgent] %s did not finish before the deadline", fn_name)
+                result_str, ok, seconds = f"Error calling {fn_name}: timed out", False, timeout
+            if ok:
+                tool_cache[key] = result_str
+        if trace is not None:
+            trace.setdefault("tool_calls", []).append(
+                {"tool": fn_name, "args": fn_args, "seconds": round(seconds, 4), "cached": cached, "ok": ok}
+            )
+            trace.setdefault("tool_seconds", {})
+            trace["tool_seconds"][fn_name] = round(trace["tool_seconds"].get(fn_name, 0.0) + seconds, 4)
+        results.append(result_str)
+    return results
+
+
+def _estimate_tokens(messages: list) -> int:
+    """Rough token count of a message list (~4 chars per token)."""
+    return sum(len(str(m.get("content") or "")) for m in messages) // 4
+
+
+def _prompt_tokens(response, messages: list) -> int:
+    """Prompt tokens of one chat call, as reported by Ollama or estimated."""
+    count = getattr(response, "prompt_eval_count", None)
+    if count:
+        return count
+    return _estimate_tokens(messages)
+
+
+def _first_sentences(text: str, limit: int = COMPACT_FACT_CHARS) -> str:
+    text = re.sub(r'\s+', ' ', str(text)).strip()
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    end = max(cut.rfind(". "), cut.rfind("! "), cut.rfind("? "))
+    return cut[:end + 1] if end > limit // 3 else cut.rstrip() + "…"
+
+
+def _extract_facts(content: str) -> list:
+    """Pulls a few short facts out of a serialized search_rag / duckduckgo_search result."""
+    try:
+        data = json.loads(content)
+    except (TypeError, ValueError):
+        return [_first_sentences(content)] if content else []
+
+    facts = []
+    if isinstance(data, list):
+        # search_rag: [{"content", "score", "metadata"}, ...]
+        for item in data[:COMPACT_FACTS]:
+            if not isinstance(item, dict):
+                facts.append(_first_sentences(item))
+                continue
+            metadata = item.get("metadata") or {}
+            name = metadata.get("Attraction_name") or metadata.get("source") or ""
+            prefix = f"{name} (score {item.get('score', 0):.2f}): " if name else ""
+            facts.append(prefix + _first_sentences(item.get("content", "")))
+    elif isinstance(data, dict):
+        # duckduckgo_search: {"status", "query", "results": str | list}
+        if data.get("status") == "error":
+            return [f"error: {data.get('error', '')}"]
+        results = data.get("results", data)
+        if isinstance(results, list):
+            for item in results[:COMPACT_FACTS]:
+                if isinstance(item, dict):
+                    title = item.get("title", "")
+                    snippet = item.get("snippet") or item.get("body") or ""
+                    link = item.get("link") or item.get("href") or ""
+                    facts.append(" - ".join(part for part in (title, _first_sentences(snippet), link) if part))
+                else:
+                    facts.append(_first_sentences(item))
+        elif isinstance(results, str):
+            sentences = re.split(r'(?<=[.!?])\s+', results.strip())
+            facts.extend(_first_sentences(sentence) for sentence in sentences[:COMPACT_FACTS] if sentence)
+        else:
+            facts.append(_first_sentences(json.dumps(results, default=str)))
+    # Search snippets repeat a lot; keep each fact once
+    return list(dict.fromkeys(fact for fact in facts if fact))
+
+
+def _compact_messages(messages: list, consumed: int, compacted: set,
+                      threshold: int = COMPACT_THRESHOLD_TOKENS) -> int:
+    """
+    Replaces tool outputs the model has already read with compact facts, oldest
+    first, until the conversation fits under `threshold` estimated tokens.
+
+    Only tool messages before index `consumed` (i.e. present in an earlier chat
+    call) are touched. The full output stays in the conversation's tool memo, so
+    the model can get it back by repeating the call with the same arguments.
+
+    Returns:
+        int: Estimated tokens saved
+    """
+    before = _estimate_tokens(messages)
+    if before <= threshold:
+        return 0
+    total = before
+    for i in range(min(consumed, len(messages))):
+        if total <= threshold:
+            break
+        message = messages[i]
+        if message.get("role") != "tool" or i in compacted:
+            continue
+        call = {}
+        if i > 0 and messages[i - 1].get("tool_calls"):
+            call = messages[i - 1]["tool_calls"][0]["function"]
+        reference = f"{call.get('name', 'tool')}({json.dumps(call.get('arguments', {}), sort_keys=True, default=str)})"
+        facts = _extract_facts(message["content"])
+        summary = "\n".join(f"- {fact}" for fact in facts) or "- (no usable results)"
+        compact = (f"[Compacted output of {reference}; call it again with the same arguments for the full result]\n"
+                   f"{summary}")
+        if len(compact) < len(message["content"]):
+            total -= (len(message["content"]) - len(compact)) // 4
+            messages[i] = {**message, "content": compact}
+        compacted.add(i)
+    return before - _estimate_tokens(messages)
+
+
+def _clean_gathered_info(text: str) -> str:
+    """Strips tool call syntax the model sometimes echoes into its answer."""
+    gathered_info = text.strip()
+    # Remove tool call tags like <search_rag>...</search_rag> or <duckduckgo_search>...</duckduckgo_search>
+    gathered_info = re.sub(r'<search_rag>.*?</search_rag>', '', gathered_info, flags=re.DOTALL)
+    gathered_info = re.sub(r'<duckduckgo_search>.*?</duckduckgo_search>', '', gathered_info, flags=re.DOTALL)
+    # Remove standalone tool call tags
+    gathered_info = re.sub(r'</?(search_rag|duckduckgo_search)[^>]*>', '', gathered_info)
+    # Clean up extra whitespace
+    gathered_info = re.sub(r'\n\s*\n\s*\n', '\n\n', gathered_info)
+    return gathered_info.strip()
+
+
 def extract_additional_info_section(text: str) -> str:
     """
     Extracts the 'Additional information' section.
@@ -108,42 +344,23 @@ def FinalResponseAgent(content: str, user_query: str = "") -> str:
     # Always check RAG to ensure we have the most specific local data
     print(f"🔍 [FinalResponseAgent] Searching RAG for: '{user_query}'")
     try:
-        rag_results = search_rag(query=user_query, k=5)
+        # Only the matching markdown sections are pulled in, not whole scraped pages
+        rag_results = search_sections(query=user_query, k=5)
         
         if rag_results:
-            print(f"✅ [FinalResponseAgent] RAG found {len(rag_results)} documents")
+            print(f"✅ [FinalResponseAgent] RAG found {len(rag_results)} sections")
             rag_content_parts = []
             for doc, score in rag_results:
-                # Extract content - Prioritize 'data' -> 'markdown' from metadata
-                doc_text = ""
-                
-                # 1. Try metadata['data'] (Rich content)
-                if hasattr(doc, 'metadata') and doc.metadata and 'data' in doc.metadata:
-                    try:
-                        data_content = doc.metadata['data']
-                        # Handle double serialization if needed
-                        if isinstance(data_content, str):
-                            data_obj = json.loads(data_content)
-                        else:
-                            data_obj = data_content
-                            
-                        # Try to get markdown
-                        if isinstance(data_obj, dict) and 'markdown' in data_obj:
-                             doc_text = data_obj['markdown']
-                             print(f"✅ [FinalResponseAgent] Using 'markdown' from metadata['data'] ({len(doc_text)} chars)")
-                        elif isinstance(data_obj, dict):
-                             # Fallback to dumping the whole data object if no markdown
-                             doc_text = json.dumps(data_obj, default=str)
-                        else:
-                             doc_text = str(data_obj)
-                    except Exception as e:
-                        print(f"⚠️ [FinalResponseAgent] Error parsing metadata['data']: {e}")
-                
-                # 2. Fallback to page_content
-                if not doc_text:
-                    doc_text = getattr(doc, 'page_content', str(doc))
+                meta = getattr(doc, 'metadata', {}) or {}
+                parent = meta.get('parent') or {}
+                attraction = parent.get('Attraction_name') or meta.get('Attraction_name', '')
+                source_url = parent.get('sourceURL') or parent.get('source') or meta.get('source', '')
+                doc_text = getattr(doc, 'page_content', str(doc))
 
-                rag_content_parts.append(f"Source (RAG, Score: {score}):\n{doc_text}\n---")
+                rag_content_parts.append(
+                    f"Source (RAG, Attraction: {attraction}, Section: {meta.get('section', '')}, "
+                    f"URL: {source_url}, Score: {score}):\n{doc_text}\n---"
+                )
             
             rag_full_text = "\n".join(rag_content_parts)
             
@@ -226,7 +443,7 @@ def FinalResponseAgent(content: str, user_query: str = "") -> str:
 
 
 # --- Additional Info Agent ---
-def AdditionalInfoAgent(query: str) -> str:
+def AdditionalInfoAgent(query: str, trace: dict = None) -> str:
     """
     Agent that gathers additional information using RAG and web search tools.
     Uses both local knowledge base (RAG) and DuckDuckGo web search to find relevant information.
@@ -234,6 +451,13 @@ def AdditionalInfoAgent(query: str) -> str:
     
     Args:
         query: The query to gather information about (e.g., "Las Vegas attractions", "San Diego Zoo guide")
+        trace: Optional dict filled with per-call tool timings ("tool_calls"), total
+               seconds per tool ("tool_seconds"), prompt tokens of each chat call
+               ("turn_prompt_tokens"), tokens saved by compaction ("compacted_tokens"),
+               and the loop's "turns", "prompt_tokens", "seconds" and "stop_reason"
+               ("complete" or the budget that ran out: "max_turns", "max_tool_calls",
+               "max_prompt_tokens", "deadline"); the stop reason is also logged, at
+               WARNING when a budget ran out
     
     Returns:
         str: Comprehensive information gathered from RAG and web search
@@ -253,17 +477,13 @@ def AdditionalInfoAgent(query: str) -> str:
              found_section = False
              
              for doc, score in rag_results:
-                 # Try to extract from Metadata JSON first (Most Reliable)
+                 # Try to extract from the full record JSON first (Most Reliable)
                  extracted_from_json = False
-                 if hasattr(doc, 'metadata') and doc.metadata and 'json' in doc.metadata:
-                     print(f"DEBUG: doc.metadata keys: {list(doc.metadata.keys())}") # Debug keys
+                 # Payloads are slim; the structured record is hydrated from the side store
+                 record = hydrate_document(doc)
+                 if record.get('json'):
                      try:
-                         json_str = doc.metadata['json']
-                         # Handle case where it might be double-serialized or just a dict
-                         if isinstance(json_str, str):
-                             data = json.loads(json_str)
-                         else:
-                             data = json_str
+                         data = record['json']
                          
                          # Check for specific keys
                          possible_keys = ["additional Information", "Additional information", "Additional Information", "additional information"]
@@ -346,19 +566,76 @@ def AdditionalInfoAgent(query: str) -> str:
     
     # Tool list for Ollama
     tools_list = [search_rag, duckduckgo_search]
-    
-    while True:
-        response = ollama.chat(
+    # (tool, args) -> result, for the rest of this conversation
+    tool_cache = {}
+
+    started = time.monotonic()
+    deadline = started + DEADLINE_SECONDS
+    turns = tool_calls_used = prompt_tokens = compacted_tokens = 0
+    turn_prompt_tokens = []
+    stop_reason = None
+    # Messages before index `consumed` have been sent to the model at least once
+    consumed = 0
+    compacted = set()
+
+    def chat(tools: list, timeout: float):
+        nonlocal turns, prompt_tokens, compacted_tokens, consumed
+        compacted_tokens += _compact_messages(messages, consumed, compacted)
+        # A client per call, so the HTTP timeout is the time this call may still take
+        response = ollama.Client(timeout=max(timeout, 1.0)).chat(
             model="qwen3:0.6b",
             messages=messages,
-            tools=tools_list,
+            tools=tools,
         )
+        consumed = len(messages)
+        turns += 1
+        tokens = _prompt_tokens(response, messages)
+        llm_tokens("ollama", tokens, getattr(response, "eval_count", None))
+        prompt_tokens += tokens
+        turn_prompt_tokens.append(tokens)
+        print(f"📏 [AdditionalInfoAgent] Turn {turns}: {tokens} prompt tokens")
+        return response
+
+    def finish(reason: str, content: str) -> str:
+        if trace is not None:
+            trace.update({
+                "stop_reason": reason,
+                "turns": turns,
+                "prompt_tokens": prompt_tokens,
+                "turn_prompt_tokens": turn_prompt_tokens,
+                "compacted_tokens": compacted_tokens,
+                "seconds": round(time.monotonic() - started, 3),
+            })
+        log = logger.info if reason == "complete" else logger.warning
+        log("[AdditionalInfoAgent] Stopped (%s) after %d turns, %d tool calls, %.1fs",
+            reason, turns, tool_calls_used, time.monotonic() - started)
+        if not content:
+            return "Unable to gather additional information."
+        gathered_info = _clean_gathered_info(content)
+        print(f"✅ [AdditionalInfoAgent] Information gathered: {gathered_info[:150]}...")
+        return gathered_info
+
+    while True:
+        if turns >= MAX_TURNS:
+            stop_reason = "max_turns"
+        elif prompt_tokens >= MAX_PROMPT_TOKENS:
+            stop_reason = "max_prompt_tokens"
+        elif time.monotonic() >= deadline:
+            stop_reason = "deadline"
+        if stop_reason:
+            break
+
+        try:
+            response = chat(tools_list, deadline - time.monotonic())
+        except httpx.TimeoutException:
+            stop_reason = "deadline"
+            break
         
         msg = response.message
         
         # Handle tool calls
         if msg.tool_calls:
-            all_results = []
+            calls = []
             for tool in msg.tool_calls:
                 fn_name = tool.function.name
                 fn_args = tool.function.arguments
@@ -372,67 +649,28 @@ def AdditionalInfoAgent(query: str) -> str:
                     fn_args = {}
                 
                 print(f"\n🔧 [AdditionalInfoAgent] Calling tool: {fn_name} with {fn_args}")
-                
-                if fn_name in available_tools:
-                    try:
-                        result = available_tools[fn_name](**fn_args)
-                        print(f"📦 [AdditionalInfoAgent] {fn_name} returned results")
-                        
-                        # Format result for message
-                        if isinstance(result, dict):
-                            result_str = json.dumps(result, indent=2)
-                        elif isinstance(result, list):
-                            # Handle list of tuples (doc, score) from search_rag
-                            if len(result) > 0 and isinstance(result[0], tuple):
-                                formatted_results = []
-                                for doc, score in result:
-                                    formatted_results.append({
-                                        "content": doc.page_content if hasattr(doc, 'page_content') else str(doc),
-                                        "score": float(score) if score else 0.0,
-                                        "metadata": doc.metadata if hasattr(doc, 'metadata') else {}
-                                    })
-                                result_str = json.dumps(formatted_results, indent=2)
-                            else:
-                                result_str = json.dumps(result, indent=2, default=str)
-                        else:
-                            result_str = str(result)
-                        
-                        all_results.append(result_str)
-                        
-                        # Add tool call and result to messages
-                        messages.append({
-                            "role": "assistant",
-                            "content": msg.content or "",
-                            "tool_calls": [{"function": {"name": fn_name, "arguments": fn_args}}]
-                        })
-                        messages.append({
-                            "role": "tool",
-                            "content": result_str
-                        })
-                    except Exception as e:
-                        error_msg = f"Error calling {fn_name}: {str(e)}"
-                        print(f"❌ [AdditionalInfoAgent] {error_msg}")
-                        messages.append({
-                            "role": "assistant",
-                            "content": msg.content or "",
-                            "tool_calls": [{"function": {"name": fn_name, "arguments": fn_args}}]
-                        })
-                        messages.append({
-                            "role": "tool",
-                            "content": error_msg
-                        })
-                else:
-                    error_msg = f"Unknown tool: {fn_name}"
-                    print(f"❌ [AdditionalInfoAgent] {error_msg}")
-                    messages.append({
-                        "role": "assistant",
-                        "content": msg.content or "",
-                        "tool_calls": [{"function": {"name": fn_name, "arguments": fn_args}}]
-                    })
-                    messages.append({
-                        "role": "tool",
-                        "content": error_msg
-                    })
+                calls.append((fn_name, fn_args))
+
+            remaining = MAX_TOOL_CALLS - tool_calls_used
+            if len(calls) > remaining:
+                calls = calls[:remaining]
+                stop_reason = "max_tool_calls"
+            tool_calls_used += len(calls)
+
+            # Independent calls run in parallel; results are appended in the order the model asked for them
+            for (fn_name, fn_args), result_str in zip(calls, _run_tool_calls(calls, tool_cache, trace, deadline)):
+                # Add tool call and result to messages
+                messages.append({
+                    "role": "assistant",
+                    "content": msg.content or "",
+                    "tool_calls": [{"function": {"name": fn_name, "arguments": fn_args}}]
+                })
+                messages.append({
+                    "role": "tool",
+                    "content": result_str
+                })
+            if stop_reason:
+                break
             
             # Add a reminder message to synthesize the results into markdown
             messages.append({
@@ -444,28 +682,27 @@ def AdditionalInfoAgent(query: str) -> str:
             continue
         
         # If no tool calls, return the final response
-        if msg.content:
-            gathered_info = msg.content.strip()
-            
-            # Clean up any tool call syntax that might have been included in the response
-            # Remove tool call tags like <search_rag>...</search_rag> or <duckduckgo_search>...</duckduckgo_search>
-            gathered_info = re.sub(r'<search_rag>.*?</search_rag>', '', gathered_info, flags=re.DOTALL)
-            gathered_info = re.sub(r'<duckduckgo_search>.*?</duckduckgo_search>', '', gathered_info, flags=re.DOTALL)
-            # Remove standalone tool call tags
-            gathered_info = re.sub(r'</?(search_rag|duckduckgo_search)[^>]*>', '', gathered_info)
-            # Clean up extra whitespace
-            gathered_info = re.sub(r'\n\s*\n\s*\n', '\n\n', gathered_info)
-            gathered_info = gathered_info.strip()
-            
-            print(f"✅ [AdditionalInfoAgent] Information gathered: {gathered_info[:150]}...")
-            return gathered_info
-        
-        # Fallback if no content
-        return "Unable to gather additional information."
+        return finish("complete", msg.content)
+
+    # A budget ran out: one last call without tools, using whatever has been gathered
+    logger.warning("⏱️ [AdditionalInfoAgent] Budget reached (%s) after %d turns and %d tool calls; synthesizing",
+                   stop_reason, turns, tool_calls_used)
+    messages.append({
+        "role": "user",
+        "content": "No more tool calls are available. Using only the information gathered above, write the final comprehensive markdown-formatted response now. Do NOT include any tool call syntax in your response."
+    })
+    try:
+        response = chat([], max(deadline - time.monotonic(), SYNTHESIS_SECONDS))
+    except httpx.TimeoutException:
+        logger.error("❌ [AdditionalInfoAgent] Final synthesis timed out")
+        return finish(stop_reason, None)
+    return finish(stop_reason, response.message.content)
 
 
 # Example usage:
 if __name__ == "__main__":
+    from logs import setup_logging
+    setup_logging()
     test_query = "Admission to Madame Tussauds London?"
     
     print("=" * 50)
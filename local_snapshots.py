@@ -0,0 +1,228 @@
+"""
+Immutable snapshots of the embedded (local) Qdrant store.
+
+QdrantClient(path=...) takes an exclusive lock on its folder, so only one
+process can use the local store at a time: the API cannot run several workers,
+and rag_upload.py cannot ingest while the API is serving. With
+RAG_LOCAL_SNAPSHOTS=true the local store is split into one writer and any
+number of readers:
+
+    trip_rag_snapshots/
+        CURRENT        name of the live snapshot, swapped atomically with os.replace
+        writer.lock    held by the (single) writer process
+        <version>/     a complete copy of the writer's store, never modified again
+
+The writer (rag_upload.py) keeps building into its private working store
+(trip_rag_name) and, once a new index version is live there, publishes a copy
+of it as a snapshot and repoints CURRENT. Readers (tool_calls.py) copy the
+current snapshot into a private temporary folder, open that, and re-check
+CURRENT every few seconds; when it changes they open the new snapshot and
+retire the old client. Readers never touch the writer's store or each other's
+copies, so there is no lock contention.
+"""
+
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+import time
+from qdrant_client import QdrantClient
+
+WORKING_STORE = "trip_rag_name"
+
+# Snapshots kept on disk besides the current one. Readers work on private
+# copies, so deleting an old snapshot never affects a running reader.
+KEEP_SNAPSHOTS = 1
+
+_CURRENT = "CURRENT"
+_WRITER_LOCK = "writer.lock"
+
+# The embedded client's own lock file must not be copied into a snapshot
+_IGNORE = shutil.ignore_patterns(".lock")
+
+
+# Settings are read at call time, not on import: the entry points load .env
+# after this module has been imported
+
+def snapshots_enabled() -> bool:
+    """Whether RAG_LOCAL_SNAPSHOTS is on."""
+    return os.getenv("RAG_LOCAL_SNAPSHOTS", "false").lower() == "true"
+
+
+def snapshot_root() -> str:
+    return os.getenv("RAG_SNAPSHOT_DIR", "trip_rag_snapshots")
+
+
+class WriterLockError(RuntimeError):
+    """Raised when another process already holds the local writer lock."""
+
+
+_writer_lock = None
+
+
+def acquire_writer_lock(root: str = None):
+    """
+    Makes this process the single local writer. The lock is held until exit.
+
+    Raises:
+        WriterLockError: If another process is already writing.
+    """
+    global _writer_lock
+    root = root or snapshot_root()
+    if _writer_lock is not None:
+        return _writer_lock
+    # Imported lazily, like qdrant_client does: portalocker checks for writeable directories on import
+    import portalocker
+
+    os.makedirs(root, exist_ok=True)
+    lock = portalocker.Lock(os.path.join(root, _WRITER_LOCK), mode="a", timeout=0, fail_when_locked=True,
+                            flags=portalocker.LockFlags.EXCLUSIVE | portalocker.LockFlags.NON_BLOCKING)
+    try:
+        lock.acquire()
+    except portalocker.exceptions.LockException as e:
+        raise WriterLockError(
+            f"Another process is already writing to the local RAG store ({root}/{_WRITER_LOCK})."
+        ) from e
+    atexit.register(lock.release)
+    _writer_lock = lock
+    return lock
+
+
+def read_current(root: str = None) -> str:
+    """Name of the live snapshot, or "" if none has been published yet."""
+    root = root or snapshot_root()
+    try:
+        with open(os.path.join(root, _CURRENT), "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return ""
+
+
+def _write_current(root: str, name: str):
+    tmp_path = os.path.join(root, f".{_CURRENT}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(name)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(root, _CURRENT))
+
+
+def list_snapshots(root: str = None) -> list:
+    """Published snapshot names, oldest first."""
+    root = root or snapshot_root()
+    if not os.path.isdir(root):
+        return []
+    names = [name for name in os.listdir(root)
+             if not name.startswith(".") and os.path.isdir(os.path.join(root, name))]
+    return sorted(names, key=lambda name: os.path.getmtime(os.path.join(root, name)))
+
+
+def publish_snapshot(version: str, store_path: str = WORKING_STORE, root: str = None,
+                     keep: int = KEEP_SNAPSHOTS) -> str:
+    """
+    Copies the writer's store into a new immutable snapshot and makes it current.
+
+    The copy is built under a hidden temporary name and renamed into place, so
+    CURRENT only ever names a complete snapshot.
+
+    Returns:
+        str: The published snapshot name
+    """
+    root = root or snapshot_root()
+    acquire_writer_lock(root)
+    name = version
+    if os.path.exists(os.path.join(root, name)):
+        name = f"{version}_{int(time.time() * 1000)}"
+
+    tmp_path = os.path.join(root, f".{name}.tmp")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    shutil.copytree(store_path, tmp_path, ignore=_IGNORE)
+    os.replace(tmp_path, os.path.join(root, name))
+    _write_current(root, name)
+    print(f"📸 Published local snapshot '{name}'")
+
+    gc_snapshots(root, keep)
+    return name
+
+
+def gc_snapshots(root: str = None, keep: int = KEEP_SNAPSHOTS) -> list:
+    """Deletes all but the current snapshot and the `keep` newest others. Returns the deleted names."""
+    root = root or snapshot_root()
+    current = read_current(root)
+    others = [name for name in list_snapshots(root) if name != current]
+    stale = others[:-keep] if keep > 0 else others
+    for name in stale:
+        shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+    return stale
+
+
+class SnapshotReader:
+    """
+    Read-only access to the current local snapshot.
+
+    client() returns a QdrantClient on a private copy of the snapshot CURRENT
+    names, switching to a new copy when CURRENT changes. The previous client is
+    closed one switch later, so searches still running on it can finish.
+    """
+
+    def __init__(self, root: str = None, check_interval: float = 5.0):
+        self.root = root or snapshot_root()
+        self.check_interval = check_interval
+        self.name = None
+        self._client = None
+        self._dir = None
+        self._retired = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def client(self, force_refresh: bool = False) -> QdrantClient:
+        with self._lock:
+            now = time.monotonic()
+            if force_refresh or self._client is None or now - self._checked_at > self.check_interval:
+                self._checked_at = now
+                current = read_current(self.root)
+                if current and current != self.name:
+                    self._open(current)
+            if self._client is None:
+                raise RuntimeError(
+                    f"No local RAG snapshot in '{self.root}' yet. "
+                    "Run rag_upload.py with RAG_LOCAL_SNAPSHOTS=true to publish one."
+                )
+            return self._client
+
+    def _open(self, name: str):
+        private_dir = tempfile.mkdtemp(prefix="trip_rag_reader_")
+        try:
+            shutil.copytree(os.path.join(self.root, name), private_dir, ignore=_IGNORE, dirs_exist_ok=True)
+            client = QdrantClient(path=private_dir)
+        except Exception as e:
+            # e.g. the snapshot was garbage-collected mid-copy; keep serving the current one
+            print(f"Warning: could not open local snapshot '{name}': {e}")
+            shutil.rmtree(private_dir, ignore_errors=True)
+            return
+
+        self._release(self._retired)
+        self._retired = (self._client, self._dir)
+        self._client, self._dir, self.name = client, private_dir, name
+        print(f"🏠 Serving local snapshot '{name}'")
+
+    @staticmethod
+    def _release(entry):
+        if not entry:
+            return
+        client, private_dir = entry
+        if client is not None:
+            try:
+                client.close()
+            except Exception:
+                pass
+        if private_dir:
+            shutil.rmtree(private_dir, ignore_errors=True)
+
+    def close(self):
+        with self._lock:
+            self._release(self._retired)
+            self._release((self._client, self._dir))
+            self._retired = self._client = self._dir = self.name = None
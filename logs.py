@@ -0,0 +1,83 @@
+"""
+Leveled, asynchronous logging for the agents and tools.
+
+Modules only create loggers (logger = logging.getLogger(__name__)); the
+entry points (api.py, api/index.py and the scripts' __main__ blocks) call
+setup_logging() once. It routes the root logger through a QueueHandler: the
+calling thread only builds the record and puts it on an in-memory queue;
+formatting and the write to stderr happen on a QueueListener thread.
+Messages use %-style arguments (logger.debug("RAG info: %s", text)), so
+nothing is formatted for records below the level, and large payloads are
+only logged at DEBUG.
+
+    TRIP_LOG_LEVEL   DEBUG | INFO (default) | WARNING | ERROR
+
+At WARNING the per-request progress messages are not even created. Because
+formatting is deferred, pass immutable arguments (str, numbers), not objects
+that are modified after the call.
+
+If the host application configured the root logger itself, setup_logging()
+leaves it alone.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+
+import timing
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s"
+
+_lock = threading.Lock()
+_queue_handler = None
+_listener = None
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues the record as is; the listener thread does the formatting."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging(level: str = None, fmt: str = LOG_FORMAT, force: bool = False):
+    """
+    Routes the root logger through the queue. Call it once from the entry
+    point; force=True replaces an earlier setup (e.g. to change the level or
+    format). Without `level`, TRIP_LOG_LEVEL is read now, not on import, so a
+    value the entry point loaded from .env is used.
+    """
+    global _queue_handler, _listener
+    with _lock:
+        root = logging.getLogger()
+        if _listener is not None and not force:
+            return
+        if _listener is None and root.handlers and not force:
+            return
+        if _listener is not None:
+            _listener.stop()
+            root.removeHandler(_queue_handler)
+
+        output = logging.StreamHandler(sys.stderr)
+        output.setFormatter(logging.Formatter(fmt))
+        records = queue.SimpleQueue()
+        _queue_handler = _DeferredQueueHandler(records)
+        # Filters run in the calling thread, where the request id context is set
+        _queue_handler.addFilter(timing.RequestIdFilter())
+        _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+        _listener.start()
+        root.addHandler(_queue_handler)
+        root.setLevel(level or os.getenv("TRIP_LOG_LEVEL", "INFO").upper())
+
+
+def _stop():
+    # Flushes the queued records at exit
+    if _listener is not None:
+        _listener.stop()
+
+
+atexit.register(_stop)
@@ -0,0 +1,195 @@
+"""
+MCP server hosting the trip tools in one warm process.
+
+Importing tool_calls.py sets up the embeddings client, the Qdrant client and
+the caches, which every agent process would otherwise pay for itself. This
+server imports it once and exposes the tools over MCP:
+
+  * search_rag           whole-document search of the attraction index
+  * search_sections      section-level search with parent metadata
+  * duckduckgo_search    web search
+  * search_gyg_activity  GetYourGuide tours (cached, pooled HTTP)
+  * tool_stats           per-tool call counts, errors and latency percentiles
+
+Tool functions are blocking, so each call runs in a worker thread; concurrent
+calls from one or many clients are served in parallel, bounded by
+MCP_TOOL_CONCURRENCY.
+
+    python mcp_server.py --transport sse --port 8765       # one shared warm instance
+    python mcp_server.py                                   # stdio (spawned per client)
+
+MCP/mcp_config.json registers the shared instance (trip-tools-shared). The
+stdio entry (trip-tools) is disabled: with the local Qdrant store only one
+process can open trip_rag_name, so a per-client child would fail next to the
+API; enable it only with a Qdrant server or RAG_LOCAL_SNAPSHOTS=true.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+try:
+    from mcp.server.fastmcp import FastMCP
+except ImportError:  # mcp >= 2 renamed FastMCP to MCPServer
+    from mcp.server.mcpserver import MCPServer as FastMCP
+
+TOOL_CONCURRENCY = int(os.getenv("MCP_TOOL_CONCURRENCY", "16"))
+LATENCY_WINDOW = 1000
+
+
+class _StderrWriter:
+    """
+    sys.stdout stand-in for stdio mode: print() output from the tool modules
+    goes to stderr, while the MCP transport keeps the real binary stdout.
+    """
+
+    def __init__(self, stdout):
+        self.buffer = stdout.buffer
+
+    def write(self, text):
+        return sys.stderr.write(text)
+
+    def flush(self):
+        sys.stderr.flush()
+
+    def fileno(self):
+        return self.buffer.fileno()
+
+    def __getattr__(self, name):
+        return getattr(sys.stderr, name)
+
+
+class ToolStats:
+    """Per-tool call counters and a sliding window of latencies (ms)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tools = {}
+
+    def record(self, tool: str, millis: float, ok: bool):
+        with self._lock:
+            entry = self._tools.setdefault(tool, {"calls": 0, "errors": 0, "latencies": deque(maxlen=LATENCY_WINDOW)})
+            entry["calls"] += 1
+            entry["errors"] += 0 if ok else 1
+            entry["latencies"].append(millis)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            report = {}
+            for tool, entry in self._tools.items():
+                ordered = sorted(entry["latencies"])
+
+                def pct(p):
+                    return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))], 2) if ordered else None
+
+                report[tool] = {
+                    "calls": entry["calls"],
+                    "errors": entry["errors"],
+                    "p50_ms": pct(50),
+                    "p95_ms": pct(95),
+                    "max_ms": round(ordered[-1], 2) if ordered else None,
+                }
+            return report
+
+
+stats = ToolStats()
+mcp = FastMCP("trip-tools")
+_tool_calls = None
+_slots = None
+
+
+def _load_tools():
+    """Imports tool_calls once (the expensive, warm part of the server)."""
+    global _tool_calls
+    if _tool_calls is None:
+        import tool_calls
+        _tool_calls = tool_calls
+    return _tool_calls
+
+
+async def _run(tool: str, fn, *args):
+    """Runs a blocking tool function in a worker thread and records its latency."""
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(TOOL_CONCURRENCY)
+    async with _slots:
+        started = time.perf_counter()
+        ok = False
+        try:
+            result = await asyncio.to_thread(fn, *args)
+            ok = True
+            return result
+        finally:
+            stats.record(tool, (time.perf_counter() - started) * 1000, ok)
+
+
+def _serialize_results(results) -> list:
+    return [
+        {"page_content": doc.page_content, "metadata": doc.metadata, "score": float(score)}
+        for doc, score in results
+    ]
+
+
+@mcp.tool()
+async def search_rag(query: str, k: int = 3) -> list:
+    """Search the trip attraction knowledge base. Returns documents with similarity scores."""
+    return _serialize_results(await _run("search_rag", _load_tools().search_rag, query, k))
+
+
+@mcp.tool()
+async def search_sections(query: str, k: int = 3) -> list:
+    """Search individual sections of attraction pages. Each result carries its parent document's metadata."""
+    return _serialize_results(await _run("search_sections", _load_tools().search_sections, query, k))
+
+
+@mcp.tool()
+async def duckduckgo_search(query: str, max_results: int = 3) -> dict:
+    """Search the web with DuckDuckGo for current travel information."""
+    return await _run("duckduckgo_search", _load_tools().duckduckgo_search, query, max_results)
+
+
+@mcp.tool()
+async def search_gyg_activity(query: str) -> str:
+    """Search GetYourGuide for bookable tours and activities and return the top result's details."""
+    return await _run("search_gyg_activity", _load_tools().search_gyg_activity, query)
+
+
+@mcp.tool()
+async def tool_stats() -> dict:
+    """Per-tool call counts, error counts and p50/p95/max latency (ms) since the server started."""
+    return stats.snapshot()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the trip tools over MCP.")
+    parser.add_argument("--transport", choices=["stdio", "sse", "streamable-http"], default="stdio")
+    parser.add_argument("--host", default=os.getenv("MCP_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("MCP_PORT", "8765")))
+    args = parser.parse_args()
+
+    if args.transport == "stdio":
+        # stdout carries the protocol; the tool modules' print() calls must not corrupt it
+        sys.stdout = _StderrWriter(sys.stdout)
+    # Logs go to stderr in every transport
+    from logs import setup_logging
+    setup_logging()
+
+    # Pay the import/setup cost before the first request arrives
+    _load_tools()
+
+    if args.transport == "stdio":
+        mcp.run()
+    elif hasattr(mcp.settings, "host"):
+        # mcp 1.x FastMCP: the address is a server setting
+        mcp.settings.host, mcp.settings.port = args.host, args.port
+        mcp.run(args.transport)
+    else:
+        mcp.run(args.transport, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
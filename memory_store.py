@@ -0,0 +1,58 @@
+"""
+Qdrant client for the conversational memory collection.
+
+Memory is written (rag_upload.upload_memory_rag) and searched
+(tool_calls.search_memory) by the serving process, so it never goes through
+the ingest store: with a Qdrant server it is a collection on that server; in
+local mode it lives in its own folder (RAG_MEMORY_STORE), separate from the
+attraction index and from RAG_LOCAL_SNAPSHOTS. Either way one client per
+process is shared by the writer and the reader, so entries are searchable as
+soon as the memory writer has flushed them.
+
+The local folder can only be opened by one process; run a Qdrant server when
+several API workers need shared memory.
+"""
+
+import os
+import threading
+
+from qdrant_client import QdrantClient
+
+_client = None
+_lock = threading.Lock()
+
+
+# The settings are read when the client is created, not on import, so values the
+# entry points load from .env (after importing this module) are seen
+
+def is_remote() -> bool:
+    return bool(os.getenv("QDRANT_URL") and os.getenv("QDRANT_API_KEY"))
+
+
+def memory_store_path() -> str:
+    return os.getenv("RAG_MEMORY_STORE", "trip_memory_store")
+
+
+def get_memory_client() -> QdrantClient:
+    """The process-wide client holding the memory collection."""
+    global _client
+    with _lock:
+        if _client is None:
+            if is_remote():
+                _client = QdrantClient(url=os.getenv("QDRANT_URL"), api_key=os.getenv("QDRANT_API_KEY"))
+            else:
+                _client = QdrantClient(path=memory_store_path())
+        return _client
+
+
+def require_user_id(user_id: str) -> str:
+    """
+    Validates the memory namespace.
+
+    Raises:
+        ValueError: If user_id is empty, so anonymous callers never share one namespace
+    """
+    user_id = str(user_id or "").strip()
+    if not user_id:
+        raise ValueError("A user_id is required to read or write conversational memory")
+    return user_id
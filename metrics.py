@@ -0,0 +1,220 @@
+"""
+Prometheus metrics for the agent service.
+
+A small in-process registry (no prometheus_client dependency) that the
+agents, tools and the API update, and that api.py exports at GET /metrics
+in the Prometheus text format. Updates are a dict lookup and an addition
+under a lock, and a scrape only formats the current values, so it is cheap
+enough to scrape every few seconds.
+
+Exported series:
+
+    trip_http_request_duration_seconds{method,route,status}   histogram, per endpoint
+    trip_stage_duration_seconds{stage}                         histogram, per timing span (see timing.py)
+    trip_provider_duration_seconds{provider}                   histogram, per external provider
+    trip_provider_errors_total{provider,kind}                  counter, kind = error | timeout
+    trip_llm_tokens_total{provider,kind}                       counter, kind = prompt | completion
+    trip_cache_lookups_total{cache,result}                     counter, per cache layer
+    trip_rag_lookups_total{agent,result}                       counter, result = rag | web_fallback
+    trip_agent_executor_queue_depth / _active                  gauges of the API's agent executor
+    trip_agent_executor_rejected_total                         counter, requests refused with 429
+
+The RAG fallback-to-web rate is
+rate(trip_rag_lookups_total{result="web_fallback"}[5m]) / rate(trip_rag_lookups_total[5m]).
+"""
+
+import bisect
+import math
+import threading
+
+import timing
+
+# Seconds; covers a cached lookup (ms) up to a slow multi-call LLM request
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_registry = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Value that goes up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Distribution of durations (seconds) over fixed cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [count per bucket (+Inf last), sum]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted((key, (list(state[0]), state[1])) for key, state in self._values.items())
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(round(total, 6))}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# --- Metrics of the agent service ---
+
+REQUEST_LATENCY = Histogram(
+    "trip_http_request_duration_seconds", "HTTP request latency by endpoint.", ("method", "route", "status"))
+STAGE_LATENCY = Histogram(
+    "trip_stage_duration_seconds", "Latency of each timed stage (timing.py span).", ("stage",))
+PROVIDER_LATENCY = Histogram(
+    "trip_provider_duration_seconds", "Latency of calls to external providers.", ("provider",))
+PROVIDER_ERRORS = Counter(
+    "trip_provider_errors_total", "Failed calls to external providers.", ("provider", "kind"))
+LLM_TOKENS = Counter(
+    "trip_llm_tokens_total", "LLM tokens used.", ("provider", "kind"))
+CACHE_LOOKUPS = Counter(
+    "trip_cache_lookups_total", "Cache lookups by cache layer and result.", ("cache", "result"))
+RAG_LOOKUPS = Counter(
+    "trip_rag_lookups_total", "RAG lookups answered from the index or by the web fallback.", ("agent", "result"))
+EXECUTOR_QUEUE_DEPTH = Gauge(
+    "trip_agent_executor_queue_depth", "Agent calls waiting for a worker thread.")
+EXECUTOR_ACTIVE = Gauge(
+    "trip_agent_executor_active", "Agent calls running on a worker thread.")
+EXECUTOR_REJECTED = Counter(
+    "trip_agent_executor_rejected_total", "Agent requests rejected because the executor queue was full.")
+
+# Which provider a timing span talks to
+STAGE_PROVIDERS = {
+    "embed": "huggingface",
+    "vector_search": "qdrant",
+    "web_search": "duckduckgo",
+    "gyg": "getyourguide",
+    "llm.groq": "groq",
+    "llm.ollama": "ollama",
+}
+
+
+def observe_span(name: str, millis: float):
+    """timing.py observer: feeds every finished span into the stage/provider histograms."""
+    seconds = millis / 1000
+    STAGE_LATENCY.observe(seconds, stage=name)
+    provider = STAGE_PROVIDERS.get(name)
+    if provider:
+        PROVIDER_LATENCY.observe(seconds, provider=provider)
+
+
+timing.add_observer(observe_span)
+
+
+def provider_error(provider: str, error=None):
+    """Counts a failed provider call; exceptions whose type mentions a timeout count as timeouts."""
+    is_timeout = isinstance(error, TimeoutError) or "timeout" in type(error).__name__.lower()
+    PROVIDER_ERRORS.inc(provider=provider, kind="timeout" if is_timeout else "error")
+
+
+def llm_tokens(provider: str, prompt: int = None, completion: int = None):
+    """Counts the tokens of one LLM call (either count may be unknown)."""
+    if prompt:
+        LLM_TOKENS.inc(prompt, provider=provider, kind="prompt")
+    if completion:
+        LLM_TOKENS.inc(completion, provider=provider, kind="completion")
+
+
+def cache_lookup(cache: str, result: str):
+    """Counts one lookup in a cache layer, e.g. cache_lookup("gyg", "hit")."""
+    CACHE_LOOKUPS.inc(cache=cache, result=result)
+
+
+def rag_lookup(agent: str, used_web: bool):
+    """Counts whether an agent answered from RAG or fell back to the web."""
+    RAG_LOOKUPS.inc(agent=agent, result="web_fallback" if used_web else "rag")
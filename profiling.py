@@ -0,0 +1,189 @@
+"""
+Opt-in profiling of single API requests.
+
+With TRIP_ADMIN_TOKEN set, a request to an agent endpoint that carries
+`X-Profile: true` (or `?profile=true`) and `X-Admin-Token: <token>` runs its
+agent under cProfile and tracemalloc. The profile is written to
+TRIP_PROFILE_DIR as <time>-<request id>.prof (open with pstats or snakeviz)
+plus a .json summary, and the summary (top functions by cumulative time, top
+allocation sites, peak traced memory) is returned in the response's
+"profile" field.
+
+Without TRIP_ADMIN_TOKEN nothing is installed, and for requests that don't
+ask for a profile the only cost is one context variable lookup per agent call.
+
+cProfile only sees the thread it was enabled on. Work the agent hands to
+worker threads is covered when the worker runs it through call_in_worker()
+(the agent-tool pool in llm_agent1 does) with the request's context; those
+profiles are merged into the request's .prof, and the summary's
+"worker_threads" says how many were. Other threads (e.g. asyncio.to_thread
+helpers) are not in the profile.
+
+tracemalloc traces the whole process while it runs, so one request is
+profiled at a time; a second profiled request meanwhile runs unprofiled.
+"""
+
+import contextvars
+import cProfile
+import hmac
+import json
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+import uuid
+
+ADMIN_TOKEN = os.getenv("TRIP_ADMIN_TOKEN", "")
+ENABLED = bool(ADMIN_TOKEN)
+PROFILE_DIR = os.getenv("TRIP_PROFILE_DIR", "profiles")
+TOP_N = int(os.getenv("TRIP_PROFILE_TOP", "20"))
+# Stack depth recorded per allocation; 1 groups allocations by the line that made them
+TRACEMALLOC_FRAMES = int(os.getenv("TRIP_PROFILE_TRACEMALLOC_FRAMES", "1"))
+
+_session = contextvars.ContextVar("trip_profile_session", default=None)
+_busy = threading.Lock()
+
+
+def requested(headers, query_params) -> bool:
+    """Whether the request asks to be profiled (regardless of the token)."""
+    flag = headers.get("X-Profile") or query_params.get("profile") or ""
+    return flag.lower() in ("1", "true", "yes")
+
+
+def authorized(headers) -> bool:
+    """Whether the request carries the admin token."""
+    return ENABLED and hmac.compare_digest(headers.get("X-Admin-Token", "").encode(), ADMIN_TOKEN.encode())
+
+
+def start(request_id: str):
+    """Marks the current request for profiling. Returns a token for finish()."""
+    return _session.set({"request_id": request_id, "summary": None})
+
+
+def finish(token) -> dict:
+    """Ends the request's profiling session and returns its summary (None if nothing ran)."""
+    session = _session.get()
+    _session.reset(token)
+    return session["summary"] if session else None
+
+
+def summary() -> dict:
+    """Profile summary of the current request, or None if it was not profiled."""
+    session = _session.get()
+    return session["summary"] if session else None
+
+
+def call(fn, *args, **kwargs):
+    """Calls fn, under the profilers if the current request is being profiled."""
+    session = _session.get()
+    if session is None:
+        return fn(*args, **kwargs)
+    if not _busy.acquire(blocking=False):
+        session["summary"] = {"skipped": "another request is being profiled"}
+        return fn(*args, **kwargs)
+    try:
+        return _profiled(session, fn, args, kwargs)
+    finally:
+        _busy.release()
+
+
+def call_in_worker(fn, *args, **kwargs):
+    """
+    Calls fn on a worker thread of a profiled call(), under its own profiler.
+
+    The thread must run with the request's context (contextvars.copy_context).
+    Outside a profiled call this is just fn(*args, **kwargs).
+    """
+    session = _session.get()
+    workers = session.get("workers") if session else None
+    if workers is None:
+        return fn(*args, **kwargs)
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Python 3.12+ allows one active profiler per process, and it already sees every thread
+        return fn(*args, **kwargs)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        profiler.disable()
+        # list.append is atomic; a worker that outlives the call is left out of the profile
+        workers.append(profiler)
+
+
+def _profiled(session: dict, fn, args, kwargs):
+    profiler = cProfile.Profile()
+    session["workers"] = []
+    tracemalloc.start(TRACEMALLOC_FRAMES)
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        profiler.disable()
+        workers = session.pop("workers")
+        wall_ms = (time.perf_counter() - started) * 1000
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        try:
+            session["summary"] = _write(session["request_id"], pstats.Stats(profiler, *workers), len(workers),
+                                        snapshot, peak, wall_ms)
+        except Exception as e:
+            session["summary"] = {"error": f"could not write profile: {e}"}
+
+
+def _top_functions(stats: pstats.Stats, limit: int) -> list:
+    ranked = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [
+        {
+            "function": f"{os.path.basename(filename)}:{line}({name})",
+            "calls": calls,
+            "own_ms": round(own * 1000, 2),
+            "cumulative_ms": round(cumulative * 1000, 2),
+        }
+        for (filename, line, name), (_, calls, own, cumulative, _) in ranked
+    ]
+
+
+def _top_allocations(snapshot: tracemalloc.Snapshot, limit: int) -> list:
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ])
+    return [
+        {
+            "site": f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+            "size_kb": round(stat.size / 1024, 1),
+            "blocks": stat.count,
+        }
+        for stat in snapshot.statistics("lineno")[:limit]
+    ]
+
+
+def _file_id(request_id: str) -> str:
+    """The request id as a file name part. It can come from the client's X-Request-ID, so only [A-Za-z0-9_-] is kept."""
+    return re.sub(r"[^A-Za-z0-9_-]", "", str(request_id or ""))[:64] or uuid.uuid4().hex[:16]
+
+
+def _write(request_id: str, stats: pstats.Stats, worker_threads: int, snapshot: tracemalloc.Snapshot,
+           peak: int, wall_ms: float) -> dict:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    base = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{_file_id(request_id)}")
+    stats.dump_stats(base + ".prof")
+    summary = {
+        "file": base + ".prof",
+        "wall_ms": round(wall_ms, 2),
+        "peak_traced_kb": round(peak / 1024, 1),
+        "worker_threads": worker_threads,
+        "top_functions": _top_functions(stats, TOP_N),
+        "top_allocations": _top_allocations(snapshot, TOP_N),
+    }
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        # The file keeps longer lists than the response
+        json.dump({**summary, "top_functions": _top_functions(stats, TOP_N * 5),
+                   "top_allocations": _top_allocations(snapshot, TOP_N * 5)}, f, indent=2)
+    return summary
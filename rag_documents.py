@@ -0,0 +1,268 @@
+"""
+Turns raw dataset records (Firecrawl / GetYourGuide JSON) into index documents.
+
+Kept free of embedding and Qdrant imports so it is cheap to import from worker
+processes and benchmarks.
+
+Each record produces:
+  * a parent document whose page_content is the formatted summary of the
+    structured "json" block,
+  * one section document per markdown section (see chunk_markdown),
+  * a full record for the side store (doc_store.py).
+
+Qdrant payloads are deliberately slim: only the fields retrieval filters or ranks
+on plus the document id. Everything else is hydrated from the side store.
+"""
+
+import json
+import os
+import re
+import uuid
+from langchain_core.documents import Document
+
+# Section chunks larger than this are split further on paragraph boundaries.
+MAX_CHUNK_CHARS = 1500
+# Sections with less cleaned text than this (nav bars, empty headings) are skipped.
+MIN_CHUNK_CHARS = 80
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_IMAGE_RE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+_LINK_RE = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+
+
+def _clean_markdown(text: str) -> str:
+    """Strips images and link targets so chunks embed on their visible text only."""
+    text = _IMAGE_RE.sub("", text)
+    text = _LINK_RE.sub(r"\1", text)
+    text = re.sub(r"[ \t]+", " ", text)
+    text = re.sub(r"\n\s*\n\s*\n+", "\n\n", text)
+    return text.strip()
+
+
+def chunk_markdown(markdown: str, max_chars: int = MAX_CHUNK_CHARS, min_chars: int = MIN_CHUNK_CHARS) -> list:
+    """
+    Splits scraped markdown into section chunks.
+
+    Each heading starts a new section; the section title is the full heading path
+    (e.g. "SUMMIT One Vanderbilt Tickets > Frequently asked questions > When do I pay?").
+    Oversized sections are split on paragraph boundaries.
+
+    Returns:
+        list: Dicts with "section" and "text" keys, in document order.
+    """
+    sections = []
+    heading_stack = []
+    current_lines = []
+
+    def flush():
+        text = _clean_markdown("\n".join(current_lines))
+        if len(text) >= min_chars:
+            sections.append({"section": " > ".join(title for _, title in heading_stack), "text": text})
+
+    for line in (markdown or "").splitlines():
+        match = _HEADING_RE.match(line)
+        if match:
+            flush()
+            current_lines = []
+            level, title = len(match.group(1)), _clean_markdown(match.group(2))
+            while heading_stack and heading_stack[-1][0] >= level:
+                heading_stack.pop()
+            heading_stack.append((level, title))
+        else:
+            current_lines.append(line)
+    flush()
+
+    chunks = []
+    for section in sections:
+        if len(section["text"]) <= max_chars:
+            chunks.append(section)
+            continue
+        buffer = ""
+        for paragraph in section["text"].split("\n\n"):
+            if buffer and len(buffer) + len(paragraph) + 2 > max_chars:
+                chunks.append({"section": section["section"], "text": buffer})
+                buffer = ""
+            buffer = f"{buffer}\n\n{paragraph}" if buffer else paragraph
+            # A single paragraph can still exceed the limit; hard-wrap it
+            while len(buffer) > max_chars:
+                chunks.append({"section": section["section"], "text": buffer[:max_chars]})
+                buffer = buffer[max_chars:]
+        if buffer:
+            chunks.append({"section": section["section"], "text": buffer})
+    return chunks
+
+
+def _document_id(key: str) -> str:
+    """Stable point id, so re-uploading the same page yields the same ids."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, key))
+
+
+
+def split_record(loaded_data: dict) -> tuple:
+    """
+    Extracts (json_data, full_metadata, markdown) from a loaded dataset record.
+    """
+    # Handle nested structure: check if data is under "data" -> "json" key (as seen in output3.json)
+    if "data" in loaded_data and isinstance(loaded_data["data"], dict) and "json" in loaded_data["data"]:
+        json_data = loaded_data["data"]["json"]
+        full_metadata = loaded_data["data"].get("metadata", {})
+    # Fallback for other structures (if any)
+    elif "json" in loaded_data and isinstance(loaded_data["json"], dict):
+        json_data = loaded_data["json"]
+        full_metadata = loaded_data.get("metadata", {})
+    else:
+        json_data = loaded_data
+        full_metadata = {}
+
+    markdown = ""
+    if isinstance(loaded_data.get("data"), dict):
+        markdown = loaded_data["data"].get("markdown", "")
+    elif isinstance(loaded_data.get("markdown"), str):
+        markdown = loaded_data["markdown"]
+
+    return json_data or {}, full_metadata or {}, markdown or ""
+
+
+def format_page_content(json_data: dict) -> str:
+    """Formats the structured attraction fields as the text that gets embedded."""
+    # Format the dictionary as a readable string
+    content_parts = []
+
+    if "Attraction_name" in json_data:
+        content_parts.append(f"Attraction: {json_data['Attraction_name']}")
+
+    if "Why visit" in json_data:
+        why_visit = json_data["Why visit"]
+        if isinstance(why_visit, list):
+            why_visit_strs = [str(v) for v in why_visit]
+            content_parts.append(f"Why visit: {', '.join(why_visit_strs)}")
+        else:
+            content_parts.append(f"Why visit: {str(why_visit)}")
+
+    if "What included" in json_data:
+        included = json_data["What included"]
+        if isinstance(included, list):
+            included_strs = [str(v) for v in included]
+            content_parts.append(f"What's included: {', '.join(included_strs)}")
+        else:
+            content_parts.append(f"What's included: {str(included)}")
+
+    if "What not included" in json_data:
+        not_included = json_data["What not included"]
+        if isinstance(not_included, list):
+            not_included_strs = [str(v) for v in not_included]
+            content_parts.append(f"What's not included: {', '.join(not_included_strs)}")
+        else:
+            content_parts.append(f"What's not included: {str(not_included)}")
+
+    if "Restrictions" in json_data:
+        restrictions = json_data["Restrictions"]
+        if isinstance(restrictions, list):
+            # Handle list of strings or other types
+            restriction_strs = [str(r) for r in restrictions]
+            content_parts.append(f"Restrictions: {', '.join(restriction_strs)}")
+        else:
+            content_parts.append(f"Restrictions: {str(restrictions)}")
+
+    if "Location" in json_data:
+        location = json_data["Location"]
+        if isinstance(location, list):
+            location_str = " ".join(str(loc) for loc in location)
+            content_parts.append(f"Location: {location_str}")
+        else:
+            content_parts.append(f"Location: {str(location)}")
+
+    if "User Rating" in json_data:
+        content_parts.append(f"User Rating: {str(json_data['User Rating'])}")
+
+    if "Duration" in json_data:
+        content_parts.append(f"Duration: {str(json_data['Duration'])}")
+
+    if "additional Information" in json_data:
+        additional_Information = json_data["additional Information"]
+        if isinstance(additional_Information, list):
+            additional_Information_str = " ".join(str(info) for info in additional_Information)
+            content_parts.append(f"additional Information: {additional_Information_str}")
+        else:
+            content_parts.append(f"additional Information: {str(additional_Information)}")
+
+    return "\n".join(content_parts)
+
+
+def build_documents(filename: str, file_path: str, loaded_data: dict) -> tuple:
+    """
+    Builds the index documents and side-store record for one dataset record.
+
+    Returns:
+        tuple: (documents, ids, store_record) where documents/ids are ready for
+               QdrantVectorStore.add_documents and store_record is the full record
+               keyed by its doc_id for doc_store.put_documents.
+    """
+    json_data, full_metadata, markdown = split_record(loaded_data)
+
+    parent_id = _document_id(full_metadata.get("sourceURL") or file_path)
+    attraction_name = str(json_data.get("Attraction_name", "") or "")
+
+    documents = [Document(
+        page_content=format_page_content(json_data),
+        metadata={
+            "doc_id": parent_id,
+            "doc_type": "parent",
+            "source": filename,
+            "Attraction_name": attraction_name,
+        },
+    )]
+    ids = [parent_id]
+
+    # Section chunks carry only what retrieval filters on; everything else
+    # is hydrated from the parent record at search time.
+    for index, chunk in enumerate(chunk_markdown(markdown)):
+        heading = f"{attraction_name} - {chunk['section']}" if chunk["section"] else attraction_name
+        documents.append(Document(
+            page_content=f"{heading}\n{chunk['text']}" if heading else chunk["text"],
+            metadata={
+                "doc_type": "section",
+                "parent_id": parent_id,
+                "section": chunk["section"],
+                "chunk_index": index,
+                "source": filename,
+                "Attraction_name": attraction_name,
+            },
+        ))
+        ids.append(_document_id(f"{parent_id}#{index}"))
+
+    store_record = {
+        "doc_id": parent_id,
+        "source": filename,
+        "file_path": file_path,
+        "json": json_data,
+        "metadata": full_metadata,
+        "markdown": markdown,
+    }
+    return documents, ids, store_record
+
+
+def load_and_build(file_path: str) -> tuple:
+    """
+    Loads one dataset JSON file and builds its documents.
+
+    Module-level so it can run in a worker process.
+
+    Returns:
+        tuple: build_documents() output, or None if the file could not be parsed.
+    """
+    filename = os.path.basename(file_path)
+    # Load JSON file directly without jq dependency
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            loaded_data = json.load(f)
+    except Exception as e:
+        print(f"Error loading {filename}: {e}")
+        return None
+    return build_documents(filename, file_path, loaded_data)
+
+
+def build_from_record(item: tuple) -> tuple:
+    """Worker-process wrapper around build_documents for (filename, file_path, loaded_data) tuples."""
+    filename, file_path, loaded_data = item
+    return build_documents(filename, file_path, loaded_data)
@@ -0,0 +1,196 @@
+"""
+Versioned collection helpers for the trip RAG index.
+
+Ingestion never writes into the live collection. Each run builds a fresh
+``trip_rag_name_v<timestamp>`` collection and, once it is fully populated,
+atomically repoints the ``trip_rag_name`` alias at it. Searchers always query
+through the alias (or the collection it resolves to), so they never see a
+half-built index.
+"""
+
+import time
+from qdrant_client.http import models
+
+COLLECTION_ALIAS = "trip_rag_name"
+VERSION_PREFIX = f"{COLLECTION_ALIAS}_v"
+
+# Number of versioned collections kept around (including the live one) so a bad
+# upload can be rolled back by repointing the alias.
+KEEP_VERSIONS = 2
+
+
+def new_collection_name() -> str:
+    """Returns a fresh, sortable versioned collection name."""
+    return f"{VERSION_PREFIX}{int(time.time() * 1000)}"
+
+
+def list_versions(client) -> list:
+    """Returns all versioned collection names, oldest first."""
+    names = [col.name for col in client.get_collections().collections]
+    return sorted(name for name in names if name.startswith(VERSION_PREFIX))
+
+
+def resolve_index_version(client, alias: str = COLLECTION_ALIAS) -> str:
+    """
+    Resolves the alias to the collection it currently points at.
+
+    Returns:
+        str: The versioned collection name, the alias itself for a legacy
+             (unversioned) collection, or "" if no index exists yet.
+    """
+    for description in client.get_aliases().aliases:
+        if description.alias_name == alias:
+            return description.collection_name
+
+    names = [col.name for col in client.get_collections().collections]
+    return alias if alias in names else ""
+
+
+def switch_alias(client, collection_name: str, alias: str = COLLECTION_ALIAS) -> None:
+    """
+    Atomically points the alias at collection_name.
+
+    A legacy collection that still carries the alias name is dropped first,
+    since Qdrant does not allow an alias and a collection to share a name.
+    This is the only (one-off) moment the index is briefly unavailable.
+    """
+    names = [col.name for col in client.get_collections().collections]
+    if alias in names:
+        print(f"Dropping legacy collection '{alias}' so it can become an alias...")
+        client.delete_collection(alias)
+
+    operations = []
+    if any(description.alias_name == alias for description in client.get_aliases().aliases):
+        operations.append(models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=alias)))
+    operations.append(
+        models.CreateAliasOperation(
+            create_alias=models.CreateAlias(collection_name=collection_name, alias_name=alias)
+        )
+    )
+    # Both operations are applied in a single request, so searchers switch atomically.
+    client.update_collection_aliases(change_aliases_operations=operations)
+
+
+def garbage_collect_versions(client, keep: int = KEEP_VERSIONS, alias: str = COLLECTION_ALIAS) -> list:
+    """
+    Deletes old versioned collections, keeping the newest `keep` and the live one.
+
+    Returns:
+        list: Names of the deleted collections.
+    """
+    live = resolve_index_version(client, alias)
+    versions = list_versions(client)
+    stale = [name for name in versions[:-keep] if name != live] if keep > 0 else []
+
+    deleted = []
+    for name in stale:
+        try:
+            client.delete_collection(name)
+            deleted.append(name)
+        except Exception as e:
+            print(f"Could not delete old index version '{name}': {e}")
+    return deleted
+
+
+QUANTIZATION_MODES = ("none", "int8", "binary")
+
+
+def build_quantization_config(mode: str = "none"):
+    """
+    Returns the Qdrant quantization config for an ingestion mode.
+
+    "int8" is scalar quantization (4x smaller vectors, ~99% recall with
+    rescoring); "binary" keeps 1 bit per dimension (32x smaller, needs
+    oversampling + rescoring against the original vectors). Quantized vectors
+    stay in RAM so the originals can live on disk.
+    """
+    if mode == "int8":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    if mode == "binary":
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+    if mode in (None, "", "none"):
+        return None
+    raise ValueError(f"Unknown quantization mode '{mode}'. Expected one of {QUANTIZATION_MODES}.")
+
+
+def collection_config(quantization: str = "none", on_disk_vectors: bool = False, on_disk_payload: bool = False,
+                      size: int = 768) -> dict:
+    """Keyword arguments for client.create_collection for the given storage options."""
+    return {
+        "vectors_config": models.VectorParams(
+            size=size,
+            distance=models.Distance.COSINE,
+            on_disk=on_disk_vectors or None,
+        ),
+        "quantization_config": build_quantization_config(quantization),
+        "on_disk_payload": on_disk_payload or None,
+    }
+
+
+def build_search_params(rescore: bool = True, oversampling: float = None, exact: bool = False):
+    """
+    Search params for quantized collections.
+
+    With rescore, the top `limit * oversampling` candidates found on the
+    quantized vectors are re-ranked with the original vectors. Collections
+    without quantization ignore these settings.
+    """
+    return models.SearchParams(
+        exact=exact,
+        quantization=models.QuantizationSearchParams(rescore=rescore, oversampling=oversampling),
+    )
+
+
+# --- Conversational memory collection ---
+#
+# Memory lives in its own collection so user chatter never competes with the
+# curated attraction corpus. Every point carries user_id / session_id /
+# created_at in its metadata; user_id is a tenant index, so a lookup only
+# touches one user's points.
+
+MEMORY_COLLECTION = "trip_memory"
+
+
+def ensure_memory_collection(client, collection_name: str = MEMORY_COLLECTION, size: int = 768,
+                             create_indexes: bool = True) -> None:
+    """Creates the memory collection and its payload indexes if they do not exist yet."""
+    if client.collection_exists(collection_name):
+        return
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=models.VectorParams(size=size, distance=models.Distance.COSINE),
+    )
+    if not create_indexes:
+        # Local mode has no payload indexes
+        return
+    client.create_payload_index(
+        collection_name,
+        "metadata.user_id",
+        field_schema=models.KeywordIndexParams(type=models.KeywordIndexType.KEYWORD, is_tenant=True),
+    )
+    client.create_payload_index(collection_name, "metadata.session_id", field_schema=models.PayloadSchemaType.KEYWORD)
+    client.create_payload_index(collection_name, "metadata.created_at", field_schema=models.PayloadSchemaType.INTEGER)
+
+
+def memory_filter(user_id: str, session_id: str = None, min_created_at: int = None):
+    """Filter restricting a memory search to one user (and optionally one session)."""
+    must = [models.FieldCondition(key="metadata.user_id", match=models.MatchValue(value=user_id))]
+    if session_id:
+        must.append(models.FieldCondition(key="metadata.session_id", match=models.MatchValue(value=session_id)))
+    if min_created_at is not None:
+        must.append(models.FieldCondition(key="metadata.created_at", range=models.Range(gte=min_created_at)))
+    return models.Filter(must=must)
+
+
+def evict_expired_memory(client, ttl_seconds: int, collection_name: str = MEMORY_COLLECTION) -> None:
+    """Deletes memory entries older than ttl_seconds."""
+    cutoff = int(time.time()) - ttl_seconds
+    client.delete(
+        collection_name=collection_name,
+        points_selector=models.FilterSelector(filter=models.Filter(must=[
+            models.FieldCondition(key="metadata.created_at", range=models.Range(lt=cutoff))
+        ])),
+        wait=False,
+    )
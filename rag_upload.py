@@ -1,12 +1,26 @@
-import json
+import argparse
+import atexit
 import os
+import queue
 import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
 from dotenv import load_dotenv
 from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_qdrant import QdrantVectorStore
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams
-from langchain_core.documents import Document
+from qdrant_client.http import models
+from rag_documents import build_from_record, load_and_build
+from doc_store import delete_versions, doc_store_path, put_documents
+from shard_store import build_from_shard, iter_shard_items
+from memory_store import get_memory_client, require_user_id
+from local_snapshots import WORKING_STORE, acquire_writer_lock, publish_snapshot, snapshots_enabled
+from rag_index import (
+    COLLECTION_ALIAS, MEMORY_COLLECTION, QUANTIZATION_MODES, collection_config, new_collection_name,
+    switch_alias, garbage_collect_versions, ensure_memory_collection, evict_expired_memory,
+)
 
 load_dotenv()
 
@@ -15,191 +29,556 @@ load_dotenv()
 QDRANT_URL = os.getenv("QDRANT_URL")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 
-embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-mpnet-base-v2")
+# Pipeline defaults (overridable from the command line)
+PARSE_WORKERS = int(os.getenv("RAG_PARSE_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+EMBED_BATCH_SIZE = int(os.getenv("RAG_EMBED_BATCH_SIZE", "64"))
+UPSERT_WORKERS = int(os.getenv("RAG_UPSERT_WORKERS", "4"))
+QUEUE_SIZE = int(os.getenv("RAG_QUEUE_SIZE", "8"))
 
-# Initialize client with cloud support and error handling for corrupted local metadata
-if QDRANT_URL and QDRANT_API_KEY:
-    print("🚀 Connecting to Qdrant Cloud for Upload")
-    client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
-else:
-    print("🏠 Using Local Qdrant Store for Upload")
-    if os.path.exists("trip_rag_name"):
+# Collection storage defaults (overridable from the command line)
+QUANTIZATION = os.getenv("RAG_QUANTIZATION", "none")
+ON_DISK_VECTORS = os.getenv("RAG_ON_DISK_VECTORS", "false").lower() == "true"
+ON_DISK_PAYLOAD = os.getenv("RAG_ON_DISK_PAYLOAD", "false").lower() == "true"
+
+# The embedding model and the client are created on first use rather than at
+# import time, so parser worker processes (which re-import this module on
+# spawn-based platforms) never load the model or open the local store.
+_embeddings = None
+_client = None
+
+
+def get_embeddings():
+    global _embeddings
+    if _embeddings is None:
+        _embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-mpnet-base-v2")
+    return _embeddings
+
+
+def get_client() -> QdrantClient:
+    global _client
+    if _client is not None:
+        return _client
+
+    # Initialize client with cloud support and error handling for corrupted local metadata
+    if QDRANT_URL and QDRANT_API_KEY:
+        print("🚀 Connecting to Qdrant Cloud for Upload")
+        _client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+    else:
+        print("🏠 Using Local Qdrant Store for Upload")
+        if snapshots_enabled():
+            # Only one process may write; searchers read published snapshots instead of this store
+            acquire_writer_lock()
+        if os.path.exists(WORKING_STORE):
+            try:
+                # Try to initialize client - if it fails, the metadata is corrupted
+                test_client = QdrantClient(path=WORKING_STORE)
+                test_client.get_collections()  # Try to access collections
+                _client = test_client
+            except RuntimeError as e:
+                if "already accessed" in str(e):
+                    # Another process (e.g. the API without RAG_LOCAL_SNAPSHOTS) has the store open;
+                    # the folder is fine, so never delete it here.
+                    raise
+                _client = _recreate_local_store(e)
+            except Exception as e:
+                _client = _recreate_local_store(e)
+        else:
+            _client = QdrantClient(path=WORKING_STORE)
+    return _client
+
+
+def _recreate_local_store(error) -> QdrantClient:
+    # Metadata is corrupted, delete and recreate
+    print(f"Warning: Corrupted collection detected ({error}). Removing and recreating...")
+    try:
+        shutil.rmtree(WORKING_STORE)
+        print("Removed corrupted collection folder.")
+    except Exception as cleanup_error:
+        print(f"Could not remove corrupted folder: {cleanup_error}")
+        raise
+    return QdrantClient(path=WORKING_STORE)
+
+
+# Sentinel closing a queue consumer (memory writer, pipeline stages)
+_DONE = object()
+
+
+# --- Write-behind memory writer ---
+#
+# upload_memory_rag() only enqueues; a background thread embeds and upserts the
+# buffered entries in one batch whenever MEMORY_FLUSH_SIZE entries are waiting or
+# MEMORY_FLUSH_INTERVAL seconds have passed, whichever comes first.
+
+MEMORY_FLUSH_SIZE = int(os.getenv("MEMORY_FLUSH_SIZE", "32"))
+MEMORY_FLUSH_INTERVAL = float(os.getenv("MEMORY_FLUSH_INTERVAL", "2.0"))
+MEMORY_MAX_PENDING = int(os.getenv("MEMORY_MAX_PENDING", "10000"))
+# Entries older than this are evicted from the memory collection
+MEMORY_TTL_SECONDS = int(os.getenv("MEMORY_TTL_SECONDS", str(30 * 24 * 3600)))
+MEMORY_EVICT_INTERVAL = float(os.getenv("MEMORY_EVICT_INTERVAL", "600"))
+
+
+class MemoryWriter:
+    """Buffers memory entries and writes them as batched embed + upsert calls."""
+
+    def __init__(self, collection_name: str = MEMORY_COLLECTION, flush_size: int = MEMORY_FLUSH_SIZE,
+                 flush_interval: float = MEMORY_FLUSH_INTERVAL, max_pending: int = MEMORY_MAX_PENDING,
+                 ttl_seconds: int = MEMORY_TTL_SECONDS, evict_interval: float = MEMORY_EVICT_INTERVAL):
+        self.collection_name = collection_name
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.ttl_seconds = ttl_seconds
+        self.evict_interval = evict_interval
+        self._collection_ready = False
+        self._last_eviction = 0.0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+        self.written = 0
+        self.failed = 0
+
+    def submit(self, text: str, metadata: dict = None) -> str:
+        """
+        Queues one entry and returns its point id immediately.
+
+        Raises:
+            RuntimeError: If the writer has been closed
+            queue.Full: If MEMORY_MAX_PENDING entries are already waiting
+        """
+        if self._closed:
+            raise RuntimeError("Memory writer is closed")
+        self._ensure_started()
+        entry_id = str(uuid.uuid4())
+        self._queue.put_nowait((entry_id, text, metadata or {}))
+        return entry_id
+
+    def flush(self, timeout: float = None) -> bool:
+        """Blocks until everything submitted so far has been written (or failed)."""
+        if self._thread is None:
+            return True
+        if self._closed or not self._thread.is_alive():
+            # The thread has stopped (or stops after draining for close()), so an
+            # Event queued now would never be set; report instead of waiting
+            return not self._thread.is_alive()
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 30):
+        """Flushes pending entries and stops the background thread."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(_DONE)
+            self._thread.join(timeout)
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="memory-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, tuple):
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                if len(batch) < self.flush_size:
+                    continue
+
+            # Size reached, interval elapsed, explicit flush or shutdown
+            if batch:
+                self._write(batch)
+                batch = []
+            deadline = None
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is _DONE:
+                return
+
+    def _write(self, batch: list):
         try:
-            # Try to initialize client - if it fails, the metadata is corrupted
-            test_client = QdrantClient(path="trip_rag_name")
-            test_client.get_collections()  # Try to access collections
-            client = test_client
+            # Not get_client(): memory has its own store, shared with tool_calls.search_memory
+            client = get_memory_client()
+            if not self._collection_ready:
+                ensure_memory_collection(client, self.collection_name,
+                                         create_indexes=bool(QDRANT_URL and QDRANT_API_KEY))
+                self._collection_ready = True
+            vectors = get_embeddings().embed_documents([text for _, text, _ in batch])
+            points = [
+                models.PointStruct(id=entry_id, vector=vector,
+                                   payload={"page_content": text, "metadata": metadata})
+                for (entry_id, text, metadata), vector in zip(batch, vectors)
+            ]
+            client.upsert(collection_name=self.collection_name, points=points, wait=False)
+            self.written += len(points)
         except Exception as e:
-            # Metadata is corrupted, delete and recreate
-            print(f"Warning: Corrupted collection detected ({e}). Removing and recreating...")
+            self.failed += len(batch)
+            print(f"❌ Memory write of {len(batch)} entries failed: {e}")
+            return
+
+        # Piggy-back TTL eviction on the writer thread, at most once per interval
+        if self.ttl_seconds > 0 and time.monotonic() - self._last_eviction >= self.evict_interval:
+            self._last_eviction = time.monotonic()
             try:
-                shutil.rmtree("trip_rag_name")
-                print("Removed corrupted collection folder.")
-            except Exception as cleanup_error:
-                print(f"Could not remove corrupted folder: {cleanup_error}")
-                raise
-            client = QdrantClient(path="trip_rag_name")
-    else:
-        client = QdrantClient(path="trip_rag_name")
-
-def upload_memory_rag(text: str):
-    # client = QdrantClient(path="memory_rag")
-    vector_store = QdrantVectorStore(
-        client=client,
-        collection_name="trip_rag_name",
-        embedding=embeddings,
+                evict_expired_memory(client, self.ttl_seconds, self.collection_name)
+            except Exception as e:
+                print(f"⚠️ Memory eviction failed: {e}")
+
+
+_memory_writer = None
+_memory_writer_lock = threading.Lock()
+
+
+def get_memory_writer() -> MemoryWriter:
+    global _memory_writer
+    with _memory_writer_lock:
+        if _memory_writer is None:
+            _memory_writer = MemoryWriter()
+            # Flush whatever is still buffered when the process exits
+            atexit.register(_memory_writer.close)
+        return _memory_writer
+
+
+def upload_memory_rag(text: str, user_id: str, session_id: str = None):
+    """
+    Queues a memory entry for a batched background write.
+
+    Entries go to the dedicated memory collection in the memory store (see
+    memory_store.py, not the attraction corpus), namespaced by user_id and
+    session_id, and expire after MEMORY_TTL_SECONDS. Returns as soon as the
+    entry is buffered; the embedding and upsert happen on the memory writer
+    thread. Call get_memory_writer().flush() to wait for it.
+
+    Raises:
+        ValueError: If user_id is empty
+    """
+    user_id = require_user_id(user_id)
+    metadata = {"user_id": user_id, "session_id": session_id or "", "created_at": int(time.time())}
+    entry_id = get_memory_writer().submit(text, metadata)
+    return f"Memory RAG queued for upload (id {entry_id})"
+
+
+# --- Streaming ingestion pipeline ---
+#
+#   files/records -> [parse: process pool] -> parsed_q -> [embed: batches] -> upsert_q -> [upsert: N threads]
+#
+# Every queue is bounded, so at most a few batches are held in memory no matter
+# how large the corpus is, and parsing, embedding and upserting overlap.
+
+
+class StageStats:
+    """Throughput counters for one pipeline stage (busy = working, wait = queued before work started)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.busy = 0.0
+        self.wait = 0.0
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def record(self, items: int, seconds: float, wait: float = 0.0):
+        with self._lock:
+            self.items += items
+            self.busy += seconds
+            self.wait += wait
+
+    def start(self):
+        if self.started is None:
+            self.started = time.perf_counter()
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    def summary(self) -> str:
+        wall = (self.finished or time.perf_counter()) - (self.started or time.perf_counter())
+        rate = self.items / wall if wall > 0 else 0.0
+        return (f"{self.name:<7} {self.items:>7} docs  {wall:8.2f}s wall  {self.busy:8.2f}s busy  "
+                f"{self.wait:8.2f}s queued  {rate:9.1f} docs/sec")
+
+
+def iter_dataset_files(dataset_folder: str = "dataset_json"):
+    """Yields the dataset JSON file paths one at a time."""
+    with os.scandir(dataset_folder) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith(".json"):
+                yield entry.path
+
+
+def _timed_call(worker, item) -> tuple:
+    """Runs worker(item) in a parse process and returns (result, seconds spent in the worker)."""
+    started = time.perf_counter()
+    return worker(item), time.perf_counter() - started
+
+
+def _parse_stage(items, worker, parsed_q: queue.Queue, workers: int, max_in_flight: int, stats: StageStats):
+    """Parses/format items in a process pool, keeping at most max_in_flight outstanding."""
+    stats.start()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+
+        def drain_one():
+            submitted_at, future = in_flight.popleft()
+            result, seconds = future.result()
+            if result is not None:
+                documents, ids, store_record = result
+                # Time in the worker is busy; the rest of the round trip waited for a process
+                stats.record(len(documents), seconds, max(0.0, time.perf_counter() - submitted_at - seconds))
+                parsed_q.put(result)
+
+        for item in items:
+            in_flight.append((time.perf_counter(), pool.submit(_timed_call, worker, item)))
+            if len(in_flight) >= max_in_flight:
+                drain_one()
+        while in_flight:
+            drain_one()
+    stats.stop()
+
+
+def _embed_stage(parsed_q: queue.Queue, upsert_q: queue.Queue, batch_size: int, stats: StageStats, totals: dict,
+                 version: str):
+    """Embeds documents in fixed-size batches and writes full records to the side store under `version`."""
+    embeddings = get_embeddings()
+    pending_docs, pending_ids = [], []
+
+    def flush(docs, ids):
+        started = time.perf_counter()
+        vectors = embeddings.embed_documents([doc.page_content for doc in docs])
+        points = [
+            models.PointStruct(
+                id=point_id,
+                vector=vector,
+                payload={"page_content": doc.page_content, "metadata": doc.metadata},
+            )
+            for point_id, vector, doc in zip(ids, vectors, docs)
+        ]
+        stats.record(len(points), time.perf_counter() - started)
+        upsert_q.put(points)
+
+    while True:
+        item = parsed_q.get()
+        if item is _DONE:
+            break
+        stats.start()
+        documents, ids, store_record = item
+        put_documents([store_record], version=version)
+        totals["parents"] += 1
+        totals["chunks"] += len(documents) - 1
+        totals["point_ids"].update(ids)
+        pending_docs.extend(documents)
+        pending_ids.extend(ids)
+        while len(pending_docs) >= batch_size:
+            flush(pending_docs[:batch_size], pending_ids[:batch_size])
+            del pending_docs[:batch_size], pending_ids[:batch_size]
+    if pending_docs:
+        flush(pending_docs, pending_ids)
+    stats.stop()
+
+
+def _upsert_worker(client, collection_name: str, upsert_q: queue.Queue, stats: StageStats, wait: bool, errors: list):
+    while True:
+        points = upsert_q.get()
+        if points is _DONE:
+            upsert_q.put(_DONE)  # let the sibling workers see it too
+            return
+        if errors:
+            continue  # drain so upstream stages never block on a failed run
+        stats.start()
+        started = time.perf_counter()
+        try:
+            client.upsert(collection_name=collection_name, points=points, wait=wait)
+            stats.record(len(points), time.perf_counter() - started)
+        except Exception as e:
+            errors.append(e)
+
+
+def _wait_for_points(client, collection_name: str, expected: int, timeout: float = 600):
+    """
+    Blocks until all asynchronously upserted points are visible (wait=False upserts).
+
+    `expected` must count unique point ids: documents that map to the same
+    uuid5 id (e.g. two files with the same sourceURL) are a single point.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if client.count(collection_name=collection_name, exact=True).count >= expected:
+            return
+        time.sleep(0.5)
+    raise TimeoutError(f"Only part of the {expected} points became visible in '{collection_name}'")
+
+
+def ingest(items=None, worker=load_and_build, parse_workers: int = PARSE_WORKERS,
+           embed_batch_size: int = EMBED_BATCH_SIZE, upsert_workers: int = UPSERT_WORKERS,
+           queue_size: int = QUEUE_SIZE, quantization: str = QUANTIZATION,
+           on_disk_vectors: bool = ON_DISK_VECTORS, on_disk_payload: bool = ON_DISK_PAYLOAD) -> str:
+    """
+    Streams items through parse -> embed -> upsert into a new index version.
+
+    Args:
+        items: Iterable of work items for `worker`; defaults to the dataset_json file paths
+        worker: Module-level function turning one item into build_documents() output
+        parse_workers: Processes used for JSON parsing and formatting
+        embed_batch_size: Documents per embedding call and per upsert request
+        upsert_workers: Concurrent upsert threads (forced to 1 for the local store)
+        queue_size: Bound of every inter-stage queue, in batches
+        quantization: "none", "int8" (scalar) or "binary" vector quantization
+        on_disk_vectors: Keep the original float32 vectors on disk (quantized ones stay in RAM)
+        on_disk_payload: Keep payloads on disk instead of in RAM
+
+    Returns:
+        str: Summary message
+    """
+    client = get_client()
+    is_remote = bool(QDRANT_URL and QDRANT_API_KEY)
+    if not is_remote:
+        # The embedded local store is not safe for concurrent writers
+        upsert_workers = 1
+    items = iter_dataset_files() if items is None else items
+
+    # Build into a fresh versioned collection; the live index stays searchable
+    # until the alias is switched over below.
+    collection_name = new_collection_name()
+    print(f"Building new index version '{collection_name}'...")
+    client.create_collection(
+        collection_name=collection_name,
+        **collection_config(quantization, on_disk_vectors, on_disk_payload),
     )
-    vector_store.add_texts(texts=[text])
-    return "Memory RAG uploaded successfully"
 
+    parsed_q = queue.Queue(maxsize=queue_size)
+    upsert_q = queue.Queue(maxsize=queue_size)
+    stats = {name: StageStats(name) for name in ("parse", "embed", "upsert")}
+    totals = {"parents": 0, "chunks": 0, "point_ids": set()}
+    errors = []
+
+    def run_guarded(target, *args):
+        try:
+            target(*args)
+        except Exception as e:
+            errors.append(e)
 
+    upserters = [
+        threading.Thread(target=_upsert_worker, args=(client, collection_name, upsert_q, stats["upsert"],
+                                                      not is_remote, errors), daemon=True)
+        for _ in range(upsert_workers)
+    ]
+    for thread in upserters:
+        thread.start()
 
-def upload_rag():
-    dataset_folder = "dataset_json"
-    all_documents = []
+    def embed_then_finish():
+        try:
+            _embed_stage(parsed_q, upsert_q, embed_batch_size, stats["embed"], totals, collection_name)
+        except Exception as e:
+            errors.append(e)
+            # Keep draining so the parse stage never blocks on a full queue
+            while parsed_q.get() is not _DONE:
+                pass
+        finally:
+            upsert_q.put(_DONE)
+
+    embedder = threading.Thread(target=embed_then_finish, daemon=True)
+    embedder.start()
+
+    run_guarded(_parse_stage, items, worker, parsed_q, parse_workers, queue_size, stats["parse"])
+    parsed_q.put(_DONE)
+    embedder.join()
+    for thread in upserters:
+        thread.join()
+    stats["upsert"].stop()
 
-    # Iterate over all JSON files in the dataset folder
-    for filename in os.listdir(dataset_folder):
-        if filename.endswith(".json"):
-            file_path = os.path.join(dataset_folder, filename)
-            
-            # Load JSON file directly without jq dependency
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    loaded_data = json.load(f)
-            except Exception as e:
-                print(f"Error loading {filename}: {e}")
-                continue
-            
-            # Handle nested structure: check if data is under "data" -> "json" key (as seen in output3.json)
-            if "data" in loaded_data and isinstance(loaded_data["data"], dict) and "json" in loaded_data["data"]:
-                 json_data = loaded_data["data"]["json"]
-                 full_metadata = loaded_data["data"].get("metadata", {})
-            # Fallback for other structures (if any)
-            elif "json" in loaded_data and isinstance(loaded_data["json"], dict):
-                json_data = loaded_data["json"]
-                full_metadata = loaded_data.get("metadata", {})
-            else:
-                json_data = loaded_data
-                full_metadata = {}
-            
-            # Format the dictionary as a readable string
-            content_parts = []
-            
-            if "Attraction_name" in json_data:
-                content_parts.append(f"Attraction: {json_data['Attraction_name']}")
-            
-            if "Why visit" in json_data:
-                why_visit = json_data["Why visit"]
-                if isinstance(why_visit, list):
-                    why_visit_strs = [str(v) for v in why_visit]
-                    content_parts.append(f"Why visit: {', '.join(why_visit_strs)}")
-                else:
-                    content_parts.append(f"Why visit: {str(why_visit)}")
-            
-            if "What included" in json_data:
-                included = json_data["What included"]
-                if isinstance(included, list):
-                    included_strs = [str(v) for v in included]
-                    content_parts.append(f"What's included: {', '.join(included_strs)}")
-                else:
-                    content_parts.append(f"What's included: {str(included)}")
-            
-            if "What not included" in json_data:
-                not_included = json_data["What not included"]
-                if isinstance(not_included, list):
-                    not_included_strs = [str(v) for v in not_included]
-                    content_parts.append(f"What's not included: {', '.join(not_included_strs)}")
-                else:
-                    content_parts.append(f"What's not included: {str(not_included)}")
-            
-            if "Restrictions" in json_data:
-                restrictions = json_data["Restrictions"]
-                if isinstance(restrictions, list):
-                    # Handle list of strings or other types
-                    restriction_strs = [str(r) for r in restrictions]
-                    content_parts.append(f"Restrictions: {', '.join(restriction_strs)}")
-                else:
-                    content_parts.append(f"Restrictions: {str(restrictions)}")
-            
-            if "Location" in json_data:
-                location = json_data["Location"]
-                if isinstance(location, list):
-                    location_str = " ".join(str(loc) for loc in location)
-                    content_parts.append(f"Location: {location_str}")
-                else:
-                    content_parts.append(f"Location: {str(location)}")
-            
-            if "User Rating" in json_data:
-                content_parts.append(f"User Rating: {str(json_data['User Rating'])}")
-            
-            if "Duration" in json_data:
-                content_parts.append(f"Duration: {str(json_data['Duration'])}")
-            
-            if "additional Information" in json_data:
-                additional_Information = json_data["additional Information"]
-                if isinstance(additional_Information, list):
-                    additional_Information_str = " ".join(str(info) for info in additional_Information)
-                    content_parts.append(f"additional Information: {additional_Information_str}")
-                else:
-                    content_parts.append(f"additional Information: {str(additional_Information)}")
-
-            # Create a Document with string content and metadata
-            page_content = "\n".join(content_parts)
-            metadata = {"source": filename, "file_path": file_path}
-            
-            # Store the full json_data in metadata for easy access
-            metadata["json"] = json.dumps(json_data) if json_data else ""
-            
-            # Add any additional fields from JSON as metadata (for backward compatibility)
-            for key, value in json_data.items():
-                if key not in ["Why visit", "What included", "What not included", 
-                              "Restrictions", "Location", "User Rating", "Duration"]:
-                    metadata[key] = str(value) if not isinstance(value, (dict, list)) else json.dumps(value)
-            
-            # Merge in full_metadata if it exists
-            if full_metadata:
-                for key, value in full_metadata.items():
-                    if key not in metadata:  # Don't overwrite existing keys
-                        metadata[key] = str(value) if not isinstance(value, (dict, list)) else json.dumps(value)
-            
-            doc = Document(page_content=page_content, metadata=metadata)
-            all_documents.append(doc)
-
-    # Check if collection exists and delete it if it does (to recreate with clean metadata)
-    try:
-        collections = client.get_collections()
-        collection_names = [col.name for col in collections.collections]
-        if "trip_rag_name" in collection_names:
-            print("Collection 'trip_rag_name' already exists. Deleting to recreate...")
-            client.delete_collection("trip_rag_name")
-    except Exception as e:
-        print(f"Error checking/deleting collection: {e}")
-        # Continue anyway - might be a new collection
-
-    # Create the collection
     try:
-        client.create_collection(
-            collection_name="trip_rag_name",
-            vectors_config=VectorParams(size=768, distance=Distance.COSINE),
-        )
-    except Exception as e:
-        # If collection already exists, that's okay
-        if "already exists" in str(e).lower() or "duplicate" in str(e).lower():
-            print("Collection already exists, using existing collection.")
-        else:
-            raise
+        if errors:
+            raise errors[0]
+        if not totals["parents"]:
+            client.delete_collection(collection_name)
+            delete_versions([collection_name])
+            return "No documents found in the dataset_json folder."
+        if is_remote:
+            _wait_for_points(client, collection_name, len(totals["point_ids"]))
+    except Exception:
+        # Leave the live index untouched and drop the half-built version
+        client.delete_collection(collection_name)
+        delete_versions([collection_name])
+        raise
+
+    for stage in stats.values():
+        print(stage.summary())
+
+    # Full records were written to the side store during the embed stage, so every
+    # searchable doc_id can be hydrated as soon as the alias switches.
+    print(f"Stored {totals['parents']} full records in '{doc_store_path()}'.")
+
+    switch_alias(client, collection_name)
+    print(f"Alias '{COLLECTION_ALIAS}' now points to '{collection_name}'.")
 
-    vector_store = QdrantVectorStore(
-        client=client,
-        collection_name="trip_rag_name",
-        embedding=embeddings,
+    deleted = garbage_collect_versions(client)
+    if deleted:
+        delete_versions(deleted)
+        print(f"Removed old index versions: {', '.join(deleted)}")
+
+    if snapshots_enabled() and not is_remote:
+        publish_snapshot(collection_name)
+
+    return (
+        f"RAG uploaded successfully. Uploaded {totals['parents']} documents "
+        f"({totals['chunks']} section chunks) to index version '{collection_name}'."
     )
 
-    if all_documents:
-        vector_store.add_documents(documents=all_documents)
-        return f"RAG uploaded successfully. Uploaded {len(all_documents)} documents."
-    else:
-        return "No documents found in the dataset_json folder."
 
-print(upload_rag())
\ No newline at end of file
+def upload_rag(dataset_folder: str = "dataset_json", **pipeline_options) -> str:
+    """Re-indexes every JSON file in dataset_folder."""
+    return ingest(iter_dataset_files(dataset_folder), load_and_build, **pipeline_options)
+
+
+def ingest_records(records, **pipeline_options) -> str:
+    """
+    Re-indexes from already-loaded records instead of files.
+
+    Args:
+        records: Iterable of (filename, file_path, loaded_data) tuples, consumed lazily
+    """
+    return ingest(records, build_from_record, **pipeline_options)
+
+
+def upload_shards(shard_folder: str, **pipeline_options) -> str:
+    """Re-indexes from compact shards (see shard_store.py); records are read inside the parse workers."""
+    return ingest(iter_shard_items(shard_folder), build_from_shard, **pipeline_options)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a new RAG index version from dataset_json.")
+    parser.add_argument("--folder", default="dataset_json", help="Folder of dataset JSON files")
+    parser.add_argument("--shards", help="Folder of compact shards to index instead of --folder")
+    parser.add_argument("--parse-workers", type=int, default=PARSE_WORKERS, help="Parser processes")
+    parser.add_argument("--embed-batch-size", type=int, default=EMBED_BATCH_SIZE, help="Documents per embedding batch")
+    parser.add_argument("--upsert-workers", type=int, default=UPSERT_WORKERS, help="Concurrent upsert threads")
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE, help="Max batches buffered between stages")
+    parser.add_argument("--quantization", choices=QUANTIZATION_MODES, default=QUANTIZATION,
+                        help="Vector quantization for the new collection")
+    parser.add_argument("--on-disk-vectors", action=argparse.BooleanOptionalAction, default=ON_DISK_VECTORS,
+                        help="Store original vectors on disk (default: RAG_ON_DISK_VECTORS)")
+    parser.add_argument("--on-disk-payload", action=argparse.BooleanOptionalAction, default=ON_DISK_PAYLOAD,
+                        help="Store payloads on disk (default: RAG_ON_DISK_PAYLOAD)")
+    args = parser.parse_args()
+
+    options = dict(
+        parse_workers=args.parse_workers,
+        embed_batch_size=args.embed_batch_size,
+        upsert_workers=args.upsert_workers,
+        queue_size=args.queue_size,
+        quantization=args.quantization,
+        on_disk_vectors=args.on_disk_vectors,
+        on_disk_payload=args.on_disk_payload,
+    )
+    print(upload_shards(args.shards, **options) if args.shards else upload_rag(args.folder, **options))
@@ -0,0 +1,351 @@
+"""
+Compact sharded dataset format.
+
+dataset_json holds one indented JSON file per attraction, with the full
+Firecrawl markdown next to the structured "json" block, so reading a few
+fields means parsing every byte of every file. A shard splits each record in
+two and adds a fixed-width offset index:
+
+    part-00000.jsonl   one compact line per record: filename, file_path,
+                       Firecrawl metadata and the structured "json" block
+    part-00000.md      the markdown of every record, concatenated (UTF-8)
+    part-00000.idx     header + one (line offset, line length, markdown
+                       offset, markdown length) entry per record
+
+All three files are memory-mapped by ShardReader, so opening a shard costs
+nothing, record i is located in O(1), structured fields are decoded without
+touching the markdown, and markdown is only read when asked for.
+
+    python shard_store.py convert dataset_json --out dataset_shards/compact
+    python shard_store.py convert dataset_shards/gyg-1712345678.jsonl --out dataset_shards/compact
+    python shard_store.py bench --copies 500
+    python rag_upload.py --shards dataset_shards/compact
+"""
+
+import argparse
+import glob
+import json
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import time
+import tracemalloc
+
+from rag_documents import build_documents, split_record
+
+INDEX_MAGIC = b"TRIPIDX1"
+INDEX_ENTRY = struct.Struct("<QIQI")  # line offset, line length, markdown offset, markdown length
+SHARD_SIZE = int(os.getenv("TRIP_SHARD_SIZE", "1000"))
+
+
+def _map(path: str):
+    """Read-only mmap of a file, or None for an empty file (which cannot be mapped)."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class ShardReader:
+    """Random access to one compact shard. `path` is the shard's base path or any of its files."""
+
+    def __init__(self, path: str):
+        self.base = os.path.splitext(path)[0] if path.endswith((".jsonl", ".md", ".idx")) else path
+        self._index = _map(f"{self.base}.idx")
+        if self._index is None or self._index[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+            raise ValueError(f"'{self.base}.idx' is not a shard index")
+        self._lines = _map(f"{self.base}.jsonl")
+        self._markdown = _map(f"{self.base}.md")
+        self._count = (len(self._index) - len(INDEX_MAGIC)) // INDEX_ENTRY.size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _entry(self, i: int) -> tuple:
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        return INDEX_ENTRY.unpack_from(self._index, len(INDEX_MAGIC) + i * INDEX_ENTRY.size)
+
+    def structured(self, i: int) -> dict:
+        """Decodes record i without its markdown: filename, file_path, metadata, json."""
+        offset, length, _, _ = self._entry(i)
+        return json.loads(self._lines[offset:offset + length])
+
+    def markdown(self, i: int) -> str:
+        """Reads record i's markdown on demand."""
+        _, _, offset, length = self._entry(i)
+        if not length:
+            return ""
+        return self._markdown[offset:offset + length].decode("utf-8")
+
+    def record(self, i: int) -> tuple:
+        """Returns (filename, file_path, loaded_data) in the Firecrawl layout rag_documents expects."""
+        head = self.structured(i)
+        loaded_data = {
+            "success": True,
+            "data": {"markdown": self.markdown(i), "metadata": head.get("metadata", {}), "json": head.get("json", {})},
+        }
+        return head["filename"], head["file_path"], loaded_data
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self.structured(i)
+
+    def close(self):
+        for mapped in (self._index, self._lines, self._markdown):
+            if mapped is not None:
+                mapped.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ShardWriter:
+    """Writes records into a sequence of shards of at most `shard_size` records each."""
+
+    def __init__(self, out_dir: str, shard_size: int = SHARD_SIZE, prefix: str = "part"):
+        self.out_dir = out_dir
+        self.shard_size = shard_size
+        self.prefix = prefix
+        self.paths = []
+        self._files = None
+        self._in_shard = 0
+        os.makedirs(out_dir, exist_ok=True)
+        self._next_number = len(glob.glob(os.path.join(out_dir, f"{prefix}-*.idx")))
+
+    def _open_next(self):
+        self._close_current()
+        base = os.path.join(self.out_dir, f"{self.prefix}-{self._next_number:05d}")
+        self._next_number += 1
+        # Written under temporary names and renamed on close, so a reader never sees a partial shard
+        self._files = [open(f"{base}{ext}.tmp", "wb") for ext in (".jsonl", ".md", ".idx")]
+        self._files[2].write(INDEX_MAGIC)
+        self._base = base
+        self._in_shard = 0
+
+    def _close_current(self):
+        if self._files is None:
+            return
+        for f in self._files:
+            f.close()
+        for ext in (".jsonl", ".md", ".idx"):
+            os.replace(f"{self._base}{ext}.tmp", f"{self._base}{ext}")
+        self.paths.append(self._base)
+        self._files = None
+
+    def write(self, filename: str, file_path: str, loaded_data: dict):
+        if self._files is None or self._in_shard >= self.shard_size:
+            self._open_next()
+        lines, markdown_file, index = self._files
+        json_data, metadata, markdown = split_record(loaded_data)
+        line = json.dumps(
+            {"filename": filename, "file_path": file_path, "metadata": metadata, "json": json_data},
+            ensure_ascii=False, separators=(",", ":"),
+        ).encode("utf-8")
+        markdown_bytes = markdown.encode("utf-8")
+        index.write(INDEX_ENTRY.pack(lines.tell(), len(line), markdown_file.tell(), len(markdown_bytes)))
+        lines.write(line + b"\n")
+        markdown_file.write(markdown_bytes)
+        self._in_shard += 1
+
+    def close(self) -> list:
+        self._close_current()
+        return self.paths
+
+
+def list_shards(folder: str) -> list:
+    """Base paths of every shard in a folder, in write order."""
+    return [path[:-len(".idx")] for path in sorted(glob.glob(os.path.join(folder, "*.idx")))]
+
+
+def iter_shard_records(folder: str):
+    """Yields (filename, file_path, loaded_data) for every record in a shard folder, for rag_upload.ingest_records."""
+    for base in list_shards(folder):
+        with ShardReader(base) as reader:
+            for i in range(len(reader)):
+                yield reader.record(i)
+
+
+def iter_shard_items(folder: str):
+    """Yields (shard_base, index) work items, so ingestion workers read records straight from the shards."""
+    for base in list_shards(folder):
+        with ShardReader(base) as reader:
+            count = len(reader)
+        for i in range(count):
+            yield base, i
+
+
+_worker_readers = {}
+
+
+def build_from_shard(item: tuple) -> tuple:
+    """Worker-process function: build_documents() for one (shard_base, index) item."""
+    base, i = item
+    reader = _worker_readers.get(base)
+    if reader is None:
+        reader = _worker_readers[base] = ShardReader(base)
+    return build_documents(*reader.record(i))
+
+
+def iter_source_records(source: str):
+    """
+    Yields (filename, file_path, loaded_data) from a legacy source: a folder of
+    per-attraction JSON files, or a raw JSONL shard written by gyg_harvest.py /
+    automate.py --batch ({"filename", "file_path", "record"} per line).
+    """
+    if os.path.isdir(source):
+        for filename in sorted(os.listdir(source)):
+            if filename.endswith(".json"):
+                file_path = os.path.join(source, filename)
+                try:
+                    with open(file_path, "r", encoding="utf-8") as f:
+                        yield filename, file_path, json.load(f)
+                except Exception as e:
+                    print(f"Error loading {filename}: {e}")
+        return
+
+    with open(source, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                print(f"Skipping malformed line {line_number} in {source}")
+                continue
+            yield entry["filename"], entry["file_path"], entry["record"]
+
+
+def convert(sources: list, out_dir: str, shard_size: int = SHARD_SIZE) -> list:
+    """Converts dataset folders and raw JSONL shards into compact shards. Returns the new shard paths."""
+    writer = ShardWriter(out_dir, shard_size)
+    count = 0
+    for source in sources:
+        for filename, file_path, loaded_data in iter_source_records(source):
+            writer.write(filename, file_path, loaded_data)
+            count += 1
+    paths = writer.close()
+    print(f"Converted {count} records into {len(paths)} shard(s) in {out_dir}")
+    return paths
+
+
+# --- Benchmark ---
+
+def _proc_status_kb(field: str):
+    """A memory field of /proc/self/status in kB, or None where it doesn't exist."""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss() -> bool:
+    """Resets the process's RSS high-water mark (Linux); False if unsupported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _measure(label: str, fn):
+    """
+    Prints wall time, peak Python heap (tracemalloc) and peak RSS growth.
+
+    tracemalloc only sees Python allocations, not the mmapped shard pages, so
+    the RSS column is the one that shows the whole cost; it is "n/a" where the
+    peak can't be reset (non-Linux).
+    """
+    rss_before = _proc_status_kb("VmRSS") if _reset_peak_rss() else None
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_peak = _proc_status_kb("VmHWM") if rss_before is not None else None
+    rss = f"{(rss_peak - rss_before) / 1024:8.2f} MB" if rss_peak is not None else f"{'n/a':>11}"
+    print(f"  {label:<38} {elapsed * 1000:9.1f} ms   py heap {peak / 1024 / 1024:8.2f} MB   "
+          f"peak RSS +{rss}   ({result} records)")
+
+
+def bench(dataset_folder: str = "dataset_json", copies: int = 200):
+    """Compares reading the per-file JSON dataset with reading compact shards."""
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_dir = os.path.join(tmp, "legacy")
+        os.makedirs(legacy_dir)
+        sources = [name for name in sorted(os.listdir(dataset_folder)) if name.endswith(".json")]
+        for n in range(copies):
+            for name in sources:
+                shutil.copyfile(os.path.join(dataset_folder, name), os.path.join(legacy_dir, f"{n:05d}_{name}"))
+        shard_dir = os.path.join(tmp, "shards")
+        convert([legacy_dir], shard_dir)
+
+        legacy_bytes = sum(os.path.getsize(os.path.join(legacy_dir, f)) for f in os.listdir(legacy_dir))
+        shard_bytes = sum(os.path.getsize(os.path.join(shard_dir, f)) for f in os.listdir(shard_dir))
+        print(f"\n{len(sources) * copies} records: per-file JSON {legacy_bytes / 1024 / 1024:.1f} MB, "
+              f"shards {shard_bytes / 1024 / 1024:.1f} MB\n")
+
+        def legacy_structured():
+            names = []
+            for _, _, loaded_data in iter_source_records(legacy_dir):
+                names.append(split_record(loaded_data)[0].get("Attraction_name"))
+            return len(names)
+
+        def shard_structured():
+            names = []
+            for base in list_shards(shard_dir):
+                with ShardReader(base) as reader:
+                    names.extend(head["json"].get("Attraction_name") for head in reader)
+            return len(names)
+
+        def shard_full():
+            return sum(len(record[2]["data"]["markdown"]) >= 0 for record in iter_shard_records(shard_dir))
+
+        def shard_random_access():
+            readers = [ShardReader(base) for base in list_shards(shard_dir)]
+            total = sum(len(r) for r in readers)
+            for k in range(0, total, max(1, total // 100)):
+                for reader in readers:
+                    if k < len(reader):
+                        reader.structured(k)
+                        break
+                    k -= len(reader)
+            for reader in readers:
+                reader.close()
+            return min(100, total)
+
+        _measure("per-file JSON, structured fields", legacy_structured)
+        _measure("shards, structured fields only", shard_structured)
+        _measure("shards, full records incl. markdown", shard_full)
+        _measure("shards, 100 random lookups", shard_random_access)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact sharded dataset tools.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    convert_cmd = sub.add_parser("convert", help="Convert dataset folders / raw JSONL shards to compact shards")
+    convert_cmd.add_argument("sources", nargs="+", help="Dataset folders or raw JSONL shard files")
+    convert_cmd.add_argument("--out", default=os.path.join("dataset_shards", "compact"))
+    convert_cmd.add_argument("--shard-size", type=int, default=SHARD_SIZE)
+    bench_cmd = sub.add_parser("bench", help="Benchmark load time and peak memory against per-file JSON")
+    bench_cmd.add_argument("--dataset", default="dataset_json")
+    bench_cmd.add_argument("--copies", type=int, default=200, help="How many times to replicate the dataset")
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        convert(args.sources, args.out, args.shard_size)
+    else:
+        bench(args.dataset, args.copies)
+
+
+if __name__ == "__main__":
+    main()
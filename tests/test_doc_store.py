@@ -0,0 +1,15 @@
+import doc_store
+
+
+def test_path_is_read_at_call_time(monkeypatch, tmp_path):
+    # e.g. loaded from .env by an entry point after doc_store was imported
+    monkeypatch.setenv("TRIP_DOC_STORE", str(tmp_path / "docs.sqlite"))
+    assert doc_store.put_documents([{"doc_id": "a", "markdown": "old"}]) == 1
+    assert doc_store.put_documents([{"doc_id": "a", "markdown": "new"}], version="v2") == 1
+
+    assert (tmp_path / "docs.sqlite").exists()
+    assert doc_store.get_document("a")["markdown"] == "old"
+    assert doc_store.get_document("a", version="v2")["markdown"] == "new"
+    assert doc_store.get_document("a", version="v3")["markdown"] == "old"
+    assert doc_store.delete_versions(["v2"]) == 1
+    assert doc_store.get_document("a", version="v2")["markdown"] == "old"
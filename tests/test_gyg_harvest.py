@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+import gyg_fetcher
+import gyg_harvest
+
+
+class FakeClock:
+    """Stands in for the time module: sleep() advances monotonic()."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def test_token_bucket_allows_a_burst_then_paces(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(gyg_harvest, "time", clock)
+    bucket = gyg_harvest.TokenBucket(rate=2, capacity=3)
+
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.slept == []
+
+    bucket.acquire()
+    assert clock.slept == [0.5]
+    bucket.acquire()
+    assert clock.now == 1.0
+
+
+def test_token_bucket_banks_at_most_capacity(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(gyg_harvest, "time", clock)
+    bucket = gyg_harvest.TokenBucket(rate=10, capacity=2)
+    clock.now = 60.0
+
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.slept == [0.1]
+
+
+def test_throttle_is_called_for_every_request_sent(monkeypatch):
+    statuses = [429, 503, 200]
+    session = SimpleNamespace(get=lambda *args, **kwargs: SimpleNamespace(
+        status_code=statuses.pop(0), headers={}))
+    monkeypatch.setattr(gyg_fetcher, "get_session", lambda: session)
+    monkeypatch.setattr(gyg_fetcher.time, "sleep", lambda seconds: None)
+    acquired = []
+
+    with gyg_fetcher.throttle(lambda: acquired.append(1)):
+        response = gyg_fetcher._get("https://example.invalid/tours")
+
+    assert response.status_code == 200
+    assert len(acquired) == 3
+    assert gyg_fetcher._throttle is None
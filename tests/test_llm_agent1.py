@@ -0,0 +1,57 @@
+import importlib
+import json
+import sys
+import types
+from unittest import mock
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def agent():
+    """llm_agent1 imported without Ollama or the search services."""
+    tool_calls = types.ModuleType("tool_calls")
+    for name in ("search_rag", "search_sections", "duckduckgo_search", "hydrate_document"):
+        setattr(tool_calls, name, lambda *args, **kwargs: [])
+    with mock.patch.dict(sys.modules, {"ollama": types.ModuleType("ollama"), "tool_calls": tool_calls}):
+        sys.modules.pop("llm_agent1", None)
+        yield importlib.import_module("llm_agent1")
+
+
+def _conversation(tool_output: str) -> list:
+    return [
+        {"role": "system", "content": "system"},
+        {"role": "user", "content": "Tell me about the zoo"},
+        {"role": "assistant", "content": "", "tool_calls": [
+            {"function": {"name": "duckduckgo_search", "arguments": {"query": "zoo"}}}]},
+        {"role": "tool", "content": tool_output},
+    ]
+
+
+def test_under_threshold_is_untouched(agent):
+    messages = _conversation("short")
+    assert agent._compact_messages(messages, len(messages), set(), threshold=1000) == 0
+    assert messages[3]["content"] == "short"
+
+
+def test_consumed_tool_output_is_replaced_by_facts(agent):
+    results = " ".join(f"Sentence number {i} about the zoo." for i in range(200))
+    messages = _conversation(json.dumps({"status": "success", "query": "zoo", "results": results}))
+    compacted = set()
+
+    saved = agent._compact_messages(messages, len(messages), compacted, threshold=100)
+
+    content = messages[3]["content"]
+    assert saved > 0
+    assert content.startswith('[Compacted output of duckduckgo_search({"query": "zoo"})')
+    assert "- Sentence number 0 about the zoo." in content
+    assert content.count("\n- ") == agent.COMPACT_FACTS
+    assert compacted == {3}
+    # Already compacted messages are not processed again
+    assert agent._compact_messages(messages, len(messages), compacted, threshold=100) == 0
+
+
+def test_messages_not_yet_sent_are_kept(agent):
+    messages = _conversation("x" * 4000)
+    assert agent._compact_messages(messages, 3, set(), threshold=100) == 0
+    assert messages[3]["content"] == "x" * 4000
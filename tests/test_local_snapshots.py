@@ -0,0 +1,16 @@
+import local_snapshots
+
+
+def test_settings_are_read_at_call_time(monkeypatch, tmp_path):
+    # e.g. loaded from .env by an entry point after local_snapshots was imported
+    monkeypatch.setenv("RAG_LOCAL_SNAPSHOTS", "true")
+    monkeypatch.setenv("RAG_SNAPSHOT_DIR", str(tmp_path))
+    assert local_snapshots.snapshots_enabled()
+    assert local_snapshots.read_current() == ""
+
+    (tmp_path / "CURRENT").write_text("trip_rag_v2", encoding="utf-8")
+    assert local_snapshots.read_current() == "trip_rag_v2"
+    assert local_snapshots.SnapshotReader().root == str(tmp_path)
+
+    monkeypatch.setenv("RAG_LOCAL_SNAPSHOTS", "false")
+    assert not local_snapshots.snapshots_enabled()
@@ -0,0 +1,18 @@
+import logging
+
+import logs
+
+
+def test_level_is_read_when_logging_is_set_up(monkeypatch):
+    root = logging.getLogger()
+    level = root.level
+    # e.g. loaded from .env by the entry point after logs was imported
+    monkeypatch.setenv("TRIP_LOG_LEVEL", "warning")
+    logs.setup_logging(force=True)
+    try:
+        assert root.level == logging.WARNING
+    finally:
+        logs._listener.stop()
+        root.removeHandler(logs._queue_handler)
+        logs._listener = logs._queue_handler = None
+        root.setLevel(level)
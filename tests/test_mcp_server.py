@@ -0,0 +1,64 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+pytest.importorskip("mcp")
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# mcp_server on the benchmark fakes, so no embedding service or Qdrant is needed
+SERVER = """
+import sys
+from benchmarks import fakes
+fakes.install({"embed": "0", "vector_search": "0"})
+import mcp_server
+sys.argv = ["mcp_server.py", "--transport", "sse", "--port", sys.argv[1]]
+mcp_server.main()
+"""
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(port: int, process: subprocess.Popen, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            pytest.fail(f"mcp_server exited with {process.returncode}:\n{process.stderr.read()}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    pytest.fail("mcp_server did not start listening")
+
+
+async def _list_tools(url: str) -> list:
+    async with sse_client(url) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            return [tool.name for tool in (await session.list_tools()).tools]
+
+
+def test_sse_transport_serves_the_tools():
+    port = _free_port()
+    env = {**os.environ, "PYTHONPATH": ROOT}
+    process = subprocess.Popen([sys.executable, "-c", SERVER, str(port)], cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    try:
+        _wait_for_port(port, process)
+        tools = asyncio.run(asyncio.wait_for(_list_tools(f"http://127.0.0.1:{port}/sse"), 30))
+    finally:
+        process.terminate()
+        process.wait(10)
+    assert {"search_rag", "search_sections", "duckduckgo_search", "search_gyg_activity", "tool_stats"} <= set(tools)
@@ -0,0 +1,30 @@
+import pytest
+
+import memory_store
+
+
+def test_settings_are_read_when_the_client_is_created(monkeypatch, tmp_path):
+    # e.g. loaded from .env by an entry point after memory_store was imported
+    monkeypatch.setenv("QDRANT_URL", "https://cluster.example")
+    monkeypatch.setenv("QDRANT_API_KEY", "key")
+    assert memory_store.is_remote()
+
+    monkeypatch.delenv("QDRANT_URL")
+    monkeypatch.setenv("RAG_MEMORY_STORE", str(tmp_path / "memory"))
+    monkeypatch.setattr(memory_store, "_client", None)
+    assert not memory_store.is_remote()
+    client = memory_store.get_memory_client()
+    try:
+        assert memory_store.get_memory_client() is client
+        assert (tmp_path / "memory").is_dir()
+    finally:
+        client.close()
+        monkeypatch.setattr(memory_store, "_client", None)
+
+
+def test_user_id_is_required():
+    assert memory_store.require_user_id(" u1 ") == "u1"
+    with pytest.raises(ValueError):
+        memory_store.require_user_id("")
+    with pytest.raises(ValueError):
+        memory_store.require_user_id(None)
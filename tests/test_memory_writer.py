@@ -0,0 +1,23 @@
+import threading
+
+from rag_upload import MemoryWriter
+
+
+class _RecordingWriter(MemoryWriter):
+    def _write(self, batch):
+        self.written += len(batch)
+
+
+def test_flush_after_close_returns_immediately():
+    writer = _RecordingWriter(flush_size=100, flush_interval=60)
+    writer.submit("a")
+    assert writer.flush(timeout=5)
+    writer.submit("b")
+    writer.close()
+    assert writer.written == 2
+
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(writer.flush()), daemon=True)
+    waiter.start()
+    waiter.join(5)
+    assert result == [True]
@@ -0,0 +1,60 @@
+import metrics
+
+
+def test_counter_and_gauge_render():
+    counter = metrics.Counter("test_lookups_total", "Lookups.", ("cache", "result"))
+    counter.inc(cache="gyg", result="hit")
+    counter.inc(2, cache="gyg", result="hit")
+    counter.inc(cache='we"ird\n', result="miss")
+    gauge = metrics.Gauge("test_queue_depth", "Depth.")
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+
+    assert counter.render() == [
+        "# HELP test_lookups_total Lookups.",
+        "# TYPE test_lookups_total counter",
+        'test_lookups_total{cache="gyg",result="hit"} 3',
+        'test_lookups_total{cache="we\\"ird\\n",result="miss"} 1',
+    ]
+    assert gauge.render()[-1] == "test_queue_depth 1"
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("test_latency_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, stage="embed")
+
+    assert histogram.render()[2:] == [
+        'test_latency_seconds_bucket{stage="embed",le="0.1"} 1',
+        'test_latency_seconds_bucket{stage="embed",le="1"} 3',
+        'test_latency_seconds_bucket{stage="embed",le="+Inf"} 4',
+        'test_latency_seconds_sum{stage="embed"} 4.05',
+        'test_latency_seconds_count{stage="embed"} 4',
+    ]
+
+
+def test_render_includes_every_registered_metric():
+    metrics.Counter("test_render_total", "Rendered.").inc()
+    text = metrics.render()
+    assert text.endswith("\n")
+    assert "# TYPE trip_http_request_duration_seconds histogram" in text
+    assert "test_render_total 1" in text
+
+
+def test_observe_span_feeds_stage_and_provider_histograms():
+    metrics.observe_span("web_search", 250.0)
+    text = metrics.render()
+    assert 'trip_stage_duration_seconds_count{stage="web_search"}' in text
+    assert 'trip_provider_duration_seconds_count{provider="duckduckgo"}' in text
+
+
+def test_provider_error_kinds():
+    class ReadTimeout(Exception):
+        pass
+
+    metrics.provider_error("test-provider", ReadTimeout())
+    metrics.provider_error("test-provider", ValueError())
+    text = metrics.render()
+    assert 'trip_provider_errors_total{provider="test-provider",kind="timeout"} 1' in text
+    assert 'trip_provider_errors_total{provider="test-provider",kind="error"} 1' in text
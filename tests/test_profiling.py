@@ -0,0 +1,37 @@
+import contextvars
+import threading
+import time
+
+import profiling
+
+
+def _tool_work():
+    time.sleep(0.01)
+    return "tool"
+
+
+def _agent():
+    # Like llm_agent1's tool pool: a worker thread running with the request's context
+    result = []
+    context = contextvars.copy_context()
+    worker = threading.Thread(target=lambda: result.append(context.run(profiling.call_in_worker, _tool_work)))
+    worker.start()
+    worker.join()
+    return result[0]
+
+
+def test_worker_threads_are_in_the_profile(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    token = profiling.start("req-1")
+    try:
+        assert profiling.call(_agent) == "tool"
+    finally:
+        summary = profiling.finish(token)
+
+    assert summary["worker_threads"] == 1
+    assert any("(_tool_work)" in row["function"] for row in summary["top_functions"])
+    assert (tmp_path / summary["file"].rsplit("/", 1)[-1]).exists()
+
+
+def test_call_in_worker_outside_a_profile():
+    assert profiling.call_in_worker(_tool_work) == "tool"
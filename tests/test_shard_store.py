@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+import shard_store
+
+
+def _record(name: str, markdown: str) -> dict:
+    return {"success": True, "data": {
+        "json": {"Attraction_name": name}, "metadata": {"sourceURL": f"https://example.com/{name}"},
+        "markdown": markdown}}
+
+
+def test_write_and_read_back(tmp_path):
+    writer = shard_store.ShardWriter(str(tmp_path), shard_size=2)
+    for i in range(3):
+        writer.write(f"a{i}.json", f"/data/a{i}.json", _record(f"Attraction {i}", "# Heading\n" * i))
+    paths = writer.close()
+
+    assert len(paths) == 2
+    assert shard_store.list_shards(str(tmp_path)) == paths
+    with shard_store.ShardReader(paths[0]) as reader:
+        assert len(reader) == 2
+        assert reader.structured(1)["json"] == {"Attraction_name": "Attraction 1"}
+        assert reader.markdown(0) == ""
+        assert reader.markdown(1) == "# Heading\n"
+        filename, file_path, loaded_data = reader.record(1)
+        assert (filename, file_path) == ("a1.json", "/data/a1.json")
+        assert loaded_data["data"]["metadata"] == {"sourceURL": "https://example.com/Attraction 1"}
+        assert [head["filename"] for head in reader] == ["a0.json", "a1.json"]
+        with pytest.raises(IndexError):
+            reader.structured(2)
+
+    records = list(shard_store.iter_shard_records(str(tmp_path)))
+    assert [r[2]["data"]["json"]["Attraction_name"] for r in records] == [f"Attraction {i}" for i in range(3)]
+    assert list(shard_store.iter_shard_items(str(tmp_path))) == [(paths[0], 0), (paths[0], 1), (paths[1], 0)]
+
+
+def test_reader_rejects_a_non_index(tmp_path):
+    (tmp_path / "bad.idx").write_bytes(b"not an index")
+    with pytest.raises(ValueError):
+        shard_store.ShardReader(str(tmp_path / "bad"))
+
+
+def test_convert_from_folder_and_raw_jsonl(tmp_path):
+    folder = tmp_path / "dataset"
+    folder.mkdir()
+    (folder / "one.json").write_text(json.dumps(_record("One", "one")), encoding="utf-8")
+    raw = tmp_path / "raw.jsonl"
+    raw.write_text(json.dumps({"filename": "two.json", "file_path": "https://x/two",
+                               "record": _record("Two", "two")}) + "\n" + "{torn\n", encoding="utf-8")
+
+    paths = shard_store.convert([str(folder), str(raw)], str(tmp_path / "out"))
+
+    with shard_store.ShardReader(paths[0]) as reader:
+        assert [reader.markdown(i) for i in range(len(reader))] == ["one", "two"]
@@ -0,0 +1,55 @@
+import logging
+
+import timing
+
+
+def test_spans_are_collected_per_request():
+    token = timing.start_request("req-1")
+    assert timing.request_id() == "req-1"
+    with timing.span("embed"):
+        pass
+    with timing.span("llm.groq"):
+        pass
+    with timing.span("llm.groq"):
+        pass
+    spans = timing.end_request(token)
+
+    assert [name for name, _ in spans] == ["embed", "llm.groq", "llm.groq"]
+    assert all(millis >= 0 for _, millis in spans)
+    assert timing.request_id() == "-"
+    assert timing.current_spans() == []
+
+
+def test_timed_decorator_records_a_span():
+    @timing.timed("agent.Test")
+    def work(x):
+        return x * 2
+
+    token = timing.start_request()
+    assert work(21) == 42
+    assert [name for name, _ in timing.end_request(token)] == ["agent.Test"]
+
+
+def test_summarize_and_server_timing_header():
+    spans = [("embed", 10.0), ("llm.groq", 100.0), ("llm.groq", 50.25)]
+    assert timing.summarize(spans) == {"embed": {"ms": 10.0, "count": 1}, "llm.groq": {"ms": 150.25, "count": 2}}
+    assert timing.server_timing_header(spans, total_ms=200) == (
+        'embed;dur=10.0, llm.groq;dur=150.2;desc="2 calls", total;dur=200.0')
+
+
+def test_observers_see_spans_outside_a_request(monkeypatch):
+    seen = []
+    monkeypatch.setattr(timing, "_observers", [lambda name, millis: seen.append(name)])
+    with timing.span("web_search"):
+        pass
+    assert seen == ["web_search"]
+
+
+def test_request_id_filter():
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "message", None, None)
+    token = timing.start_request("abc")
+    try:
+        assert timing.RequestIdFilter().filter(record)
+    finally:
+        timing.end_request(token)
+    assert record.request_id == "abc"
@@ -0,0 +1,148 @@
+"""
+Per-request timing spans.
+
+A request handler calls start_request(); everything it calls (in the same
+task, or in threads started with asyncio.to_thread / contextvars.copy_context)
+can then wrap work in span("name") and the durations are collected for that
+request only. Outside a request span() does nothing, so the agents and tools
+can be instrumented unconditionally.
+
+Span names used by the agent:
+
+    embed             query embedding (Hugging Face)
+    vector_search     Qdrant similarity search
+    relevance_filter  score threshold + attraction-name check on RAG hits
+    web_search        DuckDuckGo
+    gyg               GetYourGuide lookup
+    llm.groq          one call_llm() answered by Groq
+    llm.ollama        one call_llm() answered by Ollama
+    agent.<Name>      a whole agent run
+
+The API turns them into a Server-Timing header, an optional "timings" field
+in the response body and one structured log line per request. Observers
+registered with add_observer() (metrics.py) see every span, in or outside a
+request.
+"""
+
+import contextvars
+import functools
+import json
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+
+_spans = contextvars.ContextVar("trip_timing_spans", default=None)
+_request_id = contextvars.ContextVar("trip_request_id", default="-")
+_observers = []
+
+
+def start_request(request_id: str = None) -> tuple:
+    """
+    Starts collecting spans for the current request.
+
+    Returns:
+        tuple: Token to pass to end_request()
+    """
+    request_id = request_id or uuid.uuid4().hex[:16]
+    return _spans.set([]), _request_id.set(request_id)
+
+
+def end_request(token: tuple) -> list:
+    """Stops collecting and returns the request's spans."""
+    spans = _spans.get() or []
+    _spans.reset(token[0])
+    _request_id.reset(token[1])
+    return spans
+
+
+def request_id() -> str:
+    """Id of the current request ("-" outside a request)."""
+    return _request_id.get()
+
+
+def current_spans() -> list:
+    """Spans recorded so far in the current request ([] outside a request)."""
+    return list(_spans.get() or [])
+
+
+def add_observer(observer):
+    """Registers observer(name, millis), called for every finished span."""
+    _observers.append(observer)
+
+
+@contextmanager
+def span(name: str):
+    """Times the enclosed block as `name` if a request is being timed or an observer is registered."""
+    spans = _spans.get()
+    if spans is None and not _observers:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        millis = (time.perf_counter() - started) * 1000
+        if spans is not None:
+            # list.append is atomic, so spans from worker threads of one request can share the list
+            spans.append((name, millis))
+        for observer in _observers:
+            observer(name, millis)
+
+
+def timed(name: str):
+    """Decorator form of span()."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def summarize(spans: list) -> dict:
+    """{name: {"ms": total, "count": calls}} in first-seen order."""
+    summary = {}
+    for name, millis in spans:
+        entry = summary.setdefault(name, {"ms": 0.0, "count": 0})
+        entry["ms"] += millis
+        entry["count"] += 1
+    for entry in summary.values():
+        entry["ms"] = round(entry["ms"], 2)
+    return summary
+
+
+def server_timing_header(spans: list, total_ms: float = None) -> str:
+    """Server-Timing value, e.g. 'embed;dur=41.2, llm.groq;dur=1830.5;desc="2 calls", total;dur=2101.7'."""
+    parts = []
+    for name, entry in summarize(spans).items():
+        part = f"{name};dur={entry['ms']:.1f}"
+        if entry["count"] > 1:
+            part += f';desc="{entry["count"]} calls"'
+        parts.append(part)
+    if total_ms is not None:
+        parts.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(parts)
+
+
+def log_request(logger: logging.Logger, method: str, path: str, status_code: int, total_ms: float, spans: list):
+    """One structured (JSON) log line per request with its spans."""
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({
+            "event": "request_timing",
+            "request_id": request_id(),
+            "method": method,
+            "path": path,
+            "status": status_code,
+            "total_ms": round(total_ms, 2),
+            "spans": summarize(spans),
+        }))
+
+
+class RequestIdFilter(logging.Filter):
+    """Adds %(request_id)s to every log record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return True
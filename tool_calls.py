@@ -2,21 +2,34 @@ from langchain_huggingface import HuggingFaceEndpointEmbeddings
 from langchain_qdrant import QdrantVectorStore
 from qdrant_client import QdrantClient
 from qdrant_client.http.models import Distance, VectorParams
+from qdrant_client.http import models
 from langchain_community.tools import DuckDuckGoSearchRun
 import json
+import logging
 import os
+import time
+import threading
 from dotenv import load_dotenv
 import atexit
+from rag_index import COLLECTION_ALIAS, MEMORY_COLLECTION, build_search_params, memory_filter, resolve_index_version
+from doc_store import get_documents
+from memory_store import get_memory_client, require_user_id
+from local_snapshots import SnapshotReader, snapshots_enabled
+from timing import span
+from metrics import cache_lookup, provider_error
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Ensure ddgs is available for DuckDuckGoSearchRun
 try:
     import ddgs
 except ImportError:
-    print("Warning: ddgs package not found. DuckDuckGo search may not work.")
-    print("Install it with: pip install ddgs")
+    logger.warning("ddgs package not found. DuckDuckGo search may not work. Install it with: pip install ddgs")
 
+# Superseded by RAG_LOCAL_SNAPSHOTS=true (see local_snapshots.py), which lets several
+# processes search the local store while rag_upload.py writes.
 # LOCK_PATH = os.path.join(os.path.dirname(__file__), ".trip_rag.lock")
 # try:
 #     _lock_fd = os.open(LOCK_PATH, os.O_CREAT | os.O_EXCL | os.O_RDWR)
@@ -47,6 +60,7 @@ except ImportError:
 
 QDRANT_URL = os.getenv("QDRANT_URL")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
+LOCAL_SNAPSHOTS = snapshots_enabled()
 
 # Use Hugging Face Inference API for both Local and Cloud
 # This avoids installing heavy 'torch' and CUDA dependencies (saves ~2GB)
@@ -57,14 +71,98 @@ embeddings = HuggingFaceEndpointEmbeddings(
     model="sentence-transformers/all-mpnet-base-v2"
 )
 
+_snapshot_reader = None
 if QDRANT_URL and QDRANT_API_KEY:
-    print("🚀 Connecting to Qdrant Cloud")
+    logger.info("🚀 Connecting to Qdrant Cloud")
     client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+elif LOCAL_SNAPSHOTS:
+    logger.info("🏠 Using Local Qdrant Snapshots (read-only)")
+    client = None
+    _snapshot_reader = SnapshotReader(check_interval=float(os.getenv("RAG_INDEX_VERSION_TTL", "30")))
 else:
-    print("🏠 Using Local Qdrant Store")
+    logger.info("🏠 Using Local Qdrant Store")
     client = QdrantClient(path="trip_rag_name")
 
 
+def get_client(force_refresh: bool = False) -> QdrantClient:
+    """Returns the Qdrant client; in snapshot mode, the one for the current local snapshot."""
+    if _snapshot_reader is not None:
+        return _snapshot_reader.client(force_refresh)
+    return client
+
+
+# Quantized collections (rag_upload.py --quantization) are searched on the compressed
+# vectors first, then the top limit * oversampling candidates are rescored with the
+# originals. Local mode always does exact search, so the params are only sent to a server.
+RAG_SEARCH_RESCORE = os.getenv("RAG_SEARCH_RESCORE", "true").lower() == "true"
+RAG_SEARCH_OVERSAMPLING = float(os.getenv("RAG_SEARCH_OVERSAMPLING", "2.0"))
+SEARCH_PARAMS = (
+    build_search_params(rescore=RAG_SEARCH_RESCORE, oversampling=RAG_SEARCH_OVERSAMPLING)
+    if QDRANT_URL and QDRANT_API_KEY else None
+)
+
+# How long a resolved index version is trusted before the alias is looked up again.
+# A reindex becomes visible to a running API within this many seconds.
+INDEX_VERSION_TTL = float(os.getenv("RAG_INDEX_VERSION_TTL", "30"))
+
+_index_lock = threading.Lock()
+_index_state = {"version": None, "checked_at": 0.0, "vector_store": None, "client": None}
+
+
+def get_index_version(force_refresh: bool = False) -> str:
+    """
+    Returns the collection the RAG alias currently points at.
+
+    The value changes whenever rag_upload.py publishes a new index, so callers
+    can use it as part of a cache key.
+    """
+    with _index_lock:
+        now = time.monotonic()
+        if force_refresh or _index_state["version"] is None or now - _index_state["checked_at"] > INDEX_VERSION_TTL:
+            cache_lookup("index_version", "miss")
+            try:
+                current_client = get_client(force_refresh)
+                version = resolve_index_version(current_client) or COLLECTION_ALIAS
+            except Exception as e:
+                logger.warning("Could not resolve RAG index version: %s", e)
+                current_client = _index_state["client"]
+                version = _index_state["version"] or COLLECTION_ALIAS
+            if version != _index_state["version"] or current_client is not _index_state["client"]:
+                _index_state["vector_store"] = None
+                _index_state["client"] = current_client
+            _index_state["version"] = version
+            _index_state["checked_at"] = now
+        else:
+            cache_lookup("index_version", "hit")
+        return _index_state["version"]
+
+
+def peek_index_version() -> str:
+    """
+    The cached index version while it is within INDEX_VERSION_TTL, else None.
+
+    Never resolves the alias, so async code can call it without blocking.
+    """
+    version, checked_at = _index_state["version"], _index_state["checked_at"]
+    if version is not None and time.monotonic() - checked_at <= INDEX_VERSION_TTL:
+        cache_lookup("index_version", "hit")
+        return version
+    return None
+
+
+def _get_vector_store() -> QdrantVectorStore:
+    """Returns a vector store bound to the current index version, rebuilding it after a switch."""
+    get_index_version()
+    with _index_lock:
+        if _index_state["vector_store"] is None:
+            _index_state["vector_store"] = QdrantVectorStore(
+                client=_index_state["client"] or get_client(),
+                collection_name=_index_state["version"],
+                embedding=embeddings,
+            )
+        return _index_state["vector_store"]
+
+
 def search_rag(query: str = "San Diego Zoo Day Pass?", k: int = 1) -> list:
     """
     Search for recipes in the RAG vector store.
@@ -76,15 +174,157 @@ def search_rag(query: str = "San Diego Zoo Day Pass?", k: int = 1) -> list:
     Returns:
         list: List of search results with scores
     """
-    vector_store = QdrantVectorStore(
-        client=client,
-        collection_name="trip_rag_name",
-        embedding=embeddings,
-    )
+    # Whole-document search; section chunks are served by search_sections()
+    doc_filter = models.Filter(must_not=[
+        models.FieldCondition(key="metadata.doc_type", match=models.MatchValue(value="section"))
+    ])
+    return _similarity_search(query, k, doc_filter)
+
+
+def _similarity_search(query: str, k: int, doc_filter=None) -> list:
+    # Embedded separately so the embedding and the Qdrant search are timed as their own spans
+    with span("embed"):
+        try:
+            vector = embeddings.embed_query(query)
+        except Exception as e:
+            provider_error("huggingface", e)
+            raise
+    with span("vector_search"):
+        try:
+            return _get_vector_store().similarity_search_with_score_by_vector(
+                vector, k=k, filter=doc_filter, search_params=SEARCH_PARAMS
+            )
+        except Exception:
+            # The cached version may have been garbage-collected by a newer upload
+            get_index_version(force_refresh=True)
+            try:
+                return _get_vector_store().similarity_search_with_score_by_vector(
+                    vector, k=k, filter=doc_filter, search_params=SEARCH_PARAMS
+                )
+            except Exception as e:
+                provider_error("qdrant", e)
+                raise
+
+
+def search_sections(query: str, k: int = 3) -> list:
+    """
+    Search the section chunks of scraped pages and hydrate their parent metadata.
+
+    Only the matching markdown sections are returned, not whole pages. Each
+    result's metadata gets a "parent" key holding the parent document's metadata
+    (attraction fields, source URL, ...).
+
+    Args:
+        query: The search query string
+        k: Number of sections to return
+
+    Returns:
+        list: List of (Document, score) tuples for the matching sections
+    """
+    section_filter = models.Filter(must=[
+        models.FieldCondition(key="metadata.doc_type", match=models.MatchValue(value="section"))
+    ])
+    results = _similarity_search(query, k, section_filter)
+
+    parent_ids = list({doc.metadata.get("parent_id") for doc, _ in results if doc.metadata.get("parent_id")})
+    parents = {}
+    for doc_id, record in get_documents(parent_ids, version=get_index_version()).items():
+        parents[doc_id] = {
+            **record.get("metadata", {}),
+            "doc_id": doc_id,
+            "source": record.get("source", ""),
+            "Attraction_name": record.get("json", {}).get("Attraction_name", ""),
+        }
+
+    missing = [doc_id for doc_id in parent_ids if doc_id not in parents]
+    if missing:
+        # No local side store (e.g. cloud deploy): fall back to the slim parent payloads
+        try:
+            points = get_client().retrieve(
+                collection_name=get_index_version(),
+                ids=missing,
+                with_payload=True,
+                with_vectors=False,
+            )
+            parents.update({str(point.id): (point.payload or {}).get("metadata", {}) for point in points})
+        except Exception as e:
+            logger.warning("Could not hydrate parent documents: %s", e)
 
-    results = vector_store.similarity_search_with_score(query, k=k)
+    for doc, _ in results:
+        doc.metadata["parent"] = parents.get(doc.metadata.get("parent_id"), {})
     return results
 
+
+# Must match rag_upload.MEMORY_TTL_SECONDS; entries past it are hidden even before eviction runs
+MEMORY_TTL_SECONDS = int(os.getenv("MEMORY_TTL_SECONDS", str(30 * 24 * 3600)))
+
+_memory_store = None
+
+
+def search_memory(query: str, user_id: str, session_id: str = None, k: int = 3) -> list:
+    """
+    Search one user's conversational memory.
+
+    Memory is kept in its own collection and store (see memory_store.py), so
+    this never scans the attraction corpus, and the user_id filter keeps the
+    scan to that user's points.
+
+    Args:
+        query: The search query string
+        user_id: Whose memory to search
+        session_id: Optionally restrict to one session
+        k: Number of results to return
+
+    Returns:
+        list: List of (Document, score) tuples, or [] if no memory exists yet
+
+    Raises:
+        ValueError: If user_id is empty
+    """
+    global _memory_store
+    user_id = require_user_id(user_id)
+    memory_client = get_memory_client()
+    if not memory_client.collection_exists(MEMORY_COLLECTION):
+        return []
+    if _memory_store is None:
+        _memory_store = QdrantVectorStore(client=memory_client, collection_name=MEMORY_COLLECTION, embedding=embeddings)
+
+    min_created_at = int(time.time()) - MEMORY_TTL_SECONDS if MEMORY_TTL_SECONDS > 0 else None
+    return _memory_store.similarity_search_with_score(
+        query, k=k, filter=memory_filter(user_id, session_id, min_created_at)
+    )
+
+
+def hydrate_document(doc) -> dict:
+    """
+    Loads the full record behind a search result from the local side store.
+
+    Qdrant payloads only carry the fields retrieval needs, so callers that want
+    the structured attraction fields or the markdown call this on demand.
+
+    Args:
+        doc: A LangChain Document from search_rag/search_sections, or its metadata dict
+
+    Returns:
+        dict: {"json": ..., "metadata": ..., "markdown": ...}, or {} if unavailable
+    """
+    meta = getattr(doc, "metadata", doc) or {}
+    doc_id = meta.get("doc_id") or meta.get("parent_id")
+    record = get_documents([doc_id], version=get_index_version()).get(doc_id) if doc_id else None
+    if record:
+        return record
+
+    # Documents indexed before the slim payload schema carry the record inline
+    legacy_json = meta.get("json")
+    if legacy_json:
+        try:
+            json_data = json.loads(legacy_json) if isinstance(legacy_json, str) else legacy_json
+        except json.JSONDecodeError:
+            json_data = {}
+        return {"json": json_data, "metadata": meta, "markdown": ""}
+    return {}
+
+
 def duckduckgo_search(query: str, max_results: int = 3) -> dict:
     """
     Performs a DuckDuckGo web search using LangChain's DuckDuckGoSearch tool.
@@ -103,7 +343,8 @@ def duckduckgo_search(query: str, max_results: int = 3) -> dict:
         search_tool = DuckDuckGoSearchRun(max_results=max_results)
         
         # Invoke the search tool
-        search_results = search_tool.invoke(query)
+        with span("web_search"):
+            search_results = search_tool.invoke(query)
         
         # Parse the results if they're in string format
         if isinstance(search_results, str):
@@ -123,6 +364,7 @@ def duckduckgo_search(query: str, max_results: int = 3) -> dict:
             "count": max_results
         }
     except Exception as e:
+        provider_error("duckduckgo", e)
         return {
             "status": "error",
             "query": query,
@@ -133,6 +375,8 @@ def duckduckgo_search(query: str, max_results: int = 3) -> dict:
 
 # Example usage:
 if __name__ == "__main__":
+    from logs import setup_logging
+    setup_logging()
     query = "tell me about SUMMIT One Vanderbilt Tickets?"
     # results = search_rag(query)
     # print("results from search_rag",results)
@@ -167,7 +411,7 @@ if __name__ == "__main__":
 try:
     from gyg_fetcher import search_tours, get_tour_details
 except ImportError:
-    print("Warning: gyg_fetcher not found.")
+    logger.warning("gyg_fetcher not found.")
     def search_tours(*args, **kwargs): return []
     def get_tour_details(*args, **kwargs): return {}
 
@@ -178,15 +422,16 @@ def search_gyg_activity(query: str) -> str:
     """
     try:
         # 1. Search
-        print(f"🎫 [GYG] Searching for: {query}")
-        results = search_tours(query, limit=1)
-        
-        if not results:
-            return ""
+        logger.debug("🎫 [GYG] Searching for: %s", query)
+        with span("gyg"):
+            results = search_tours(query, limit=1)
+            
+            if not results:
+                return ""
 
-        # 2. Get Details of top result
-        top_tour_id = results[0]["tour_id"]
-        tour_data = get_tour_details(top_tour_id)
+            # 2. Get Details of top result
+            top_tour_id = results[0]["tour_id"]
+            tour_data = get_tour_details(top_tour_id)
         
         # 3. Format as a readable string for the LLM
         if not tour_data:
@@ -206,6 +451,6 @@ def search_gyg_activity(query: str) -> str:
         return "\n".join(summary)
 
     except Exception as e:
-        print(f"❌ GYG Search failed: {e}")
+        logger.error("❌ GYG Search failed: %s", e)
         return ""
 